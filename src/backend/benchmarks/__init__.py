@@ -0,0 +1,16 @@
+# Offline benchmarks for the RFP backend
+import os
+import tempfile
+
+# Keep config.py from reaching out to Secret Manager for settings the benchmarks don't use
+for _name in ("SHAREPOINT_URL", "SHAREPOINT_CLIENT_ID", "SHAREPOINT_CLIENT_SECRET", "SHAREPOINT_TENANT_ID"):
+    os.environ.setdefault(_name, "offline")
+os.environ.setdefault("SITE_CRAWL_ENABLED", "false")
+os.environ.setdefault("SHAREPOINT_SYNC_ENABLED", "false")
+# Keep the shared corpus store, extraction cache, answer memo and draft lineage out of the real ones
+os.environ.setdefault("CORPUS_STORE_DIR", tempfile.mkdtemp(prefix="rfp_bench_corpus_"))
+os.environ.setdefault("EXTRACTION_CACHE_DIR", tempfile.mkdtemp(prefix="rfp_bench_extract_"))
+os.environ.setdefault("ANSWER_MEMO_DIR", tempfile.mkdtemp(prefix="rfp_bench_memo_"))
+os.environ.setdefault("LINEAGE_DIR", tempfile.mkdtemp(prefix="rfp_bench_lineage_"))
+# The fake upload server fails chunks on purpose; retry without real backoff delays
+os.environ.setdefault("DRIVE_UPLOAD_RETRY_BASE_SECONDS", "0.001")
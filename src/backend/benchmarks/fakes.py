@@ -0,0 +1,313 @@
+import json
+import random
+import re
+import threading
+import time
+
+import httplib2
+from googleapiclient.errors import HttpError
+
+# The LLM stand-in lives with the services so LLM_BACKEND=fake can use it too
+from services.fake_llm import FakeGenerativeModel, FakeResponse, FakeUsageMetadata  # noqa: F401
+
+
+class _FakeExecutable:
+    def __init__(self, result, latency: float):
+        self._result = result
+        self._latency = latency
+
+    def execute(self):
+        time.sleep(self._latency)
+        return self._result() if callable(self._result) else self._result
+
+
+class _FakeMediaHttp:
+    def __init__(self, data: bytes, latency: float):
+        self.data = data
+        self.latency = latency
+
+    def request(self, uri, method="GET", headers=None, **kwargs):
+        time.sleep(self.latency)
+        start, end = 0, len(self.data) - 1
+        range_header = (headers or {}).get("range")
+        if range_header:
+            start_text, end_text = range_header.split("=", 1)[1].split("-")
+            start, end = int(start_text), min(int(end_text), len(self.data) - 1)
+        body = self.data[start:end + 1]
+        response = httplib2.Response({
+            "status": 206 if range_header else 200,
+            "content-range": f"bytes {start}-{end}/{len(self.data)}",
+            "content-length": str(len(body)),
+        })
+        return response, body
+
+
+class _FakeMediaRequest:
+    def __init__(self, file_id: str, data: bytes, latency: float):
+        self.uri = f"https://fake-drive.local/files/{file_id}?alt=media"
+        self.headers = {}
+        self.http = _FakeMediaHttp(data, latency)
+
+
+class _FakeFilesResource:
+    def __init__(self, service):
+        self.service = service
+
+    def list(self, q="", **kwargs):
+        def run():
+            folder_name = re.search(r"name='([^']+)'", q)
+            if folder_name and "application/vnd.google-apps.folder" in q:
+                folder_id = self.service.folders.get(folder_name.group(1))
+                return {"files": [{"id": folder_id, "name": folder_name.group(1)}] if folder_id else []}
+            parent = re.search(r"'([^']+)' in parents", q)
+            files = self.service.files_by_folder.get(parent.group(1) if parent else "", [])
+            return {"files": [{k: v for k, v in f.items() if k != "data"} for f in files]}
+        return _FakeExecutable(run, self.service.latency)
+
+    def get(self, fileId, **kwargs):
+        meta = {k: v for k, v in self.service.file(fileId).items() if k != "data"}
+        return _FakeExecutable(meta, self.service.latency)
+
+    def get_media(self, fileId, **kwargs):
+        return _FakeMediaRequest(fileId, self.service.file(fileId)["data"], self.service.latency)
+
+    def export_media(self, fileId, mimeType=None, **kwargs):
+        return self.get_media(fileId)
+
+    def create(self, body=None, media_body=None, fields=None, **kwargs):
+        return _FakeUploadRequest(self.service, body, media_body)
+
+
+class _FakeUploadProgress:
+    def __init__(self, received: int, total: int):
+        self.resumable_progress = received
+        self.total_size = total
+
+    def progress(self):
+        return self.resumable_progress / self.total_size if self.total_size else 1.0
+
+
+class _FakeUploadRequest:
+    def __init__(self, service, body: dict, media_body):
+        """
+        files().create() on the fake upload server. Simple uploads use execute(); resumable
+        ones send chunks with next_chunk(), which (like googleapiclient) resumes from the
+        offset the server confirmed after an error. `service.upload_failure_rate` of chunks
+        fail: half as a 503 after the server kept part of the chunk, half as a dropped connection.
+        `service.upload_errors` ({n: HTTP status}) fails the service's nth chunk request instead.
+        """
+        self.service = service
+        self.body = body or {}
+        self.media_body = media_body
+        self.received = bytearray()
+        self.chunks = 0
+
+    def execute(self):
+        time.sleep(self.service.latency)
+        if self.media_body is not None:
+            self.received = bytearray(self.media_body.getbytes(0, self.media_body.size()))
+        return self._finish()
+
+    def next_chunk(self, http=None, num_retries=0):
+        time.sleep(self.service.latency)
+        total = self.media_body.size()
+        offset = len(self.received)  # the confirmed offset, as a status query would report
+        chunk = self.media_body.getbytes(offset, self.media_body.chunksize())
+        self.chunks += 1
+        with self.service._lock:
+            self.service.chunk_requests += 1
+            status = self.service.upload_errors.get(self.service.chunk_requests)
+        if status is not None:
+            if status >= 500:
+                self.received += chunk[:len(chunk) // 2]
+            raise HttpError(httplib2.Response({"status": status}), b"Scripted upload error")
+        if self.service.upload_failure_rate and random.random() < self.service.upload_failure_rate:
+            if random.random() < 0.5:
+                self.received += chunk[:len(chunk) // 2]
+                raise HttpError(httplib2.Response({"status": 503}), b"Backend Error")
+            raise ConnectionResetError("Connection reset by peer (simulated)")
+        self.received += chunk
+        if len(self.received) < total:
+            return _FakeUploadProgress(len(self.received), total), None
+        return None, self._finish()
+
+    def _finish(self) -> dict:
+        with self.service._lock:
+            self.service.created.append(self.body)
+            file_id = f"created-{len(self.service.created)}"
+            self.service.uploads[file_id] = {"data": bytes(self.received), "chunks": self.chunks}
+        return {"id": file_id, "name": self.body.get("name"), "webViewLink": f"https://fake-drive.local/{file_id}"}
+
+
+class FakeDriveService:
+    def __init__(self, corpus: list, latency: float = 0.0,
+                 source_folder_id: str = "fake-source", output_folder_id: str = "fake-output",
+                 upload_failure_rate: float = 0.0, upload_errors: dict = None):
+        """
+        In-memory stand-in for the googleapiclient Drive v3 service. `corpus` is a list of
+        file dicts with raw bytes under "data" (see synthetic.make_corpus). Each API call
+        sleeps for `latency` seconds; uploaded bytes are kept in `uploads` by file id.
+        """
+        self.latency = latency
+        self.upload_failure_rate = upload_failure_rate
+        self.upload_errors = upload_errors or {}
+        self.chunk_requests = 0
+        self.uploads = {}
+        self.folders = {"Source Information": source_folder_id, "RFP Output": output_folder_id}
+        self.files_by_folder = {source_folder_id: list(corpus), output_folder_id: []}
+        self.created = []
+        self._lock = threading.Lock()
+
+    def file(self, file_id: str) -> dict:
+        for files in self.files_by_folder.values():
+            for f in files:
+                if f["id"] == file_id:
+                    return f
+        raise KeyError(file_id)
+
+    def files(self):
+        return _FakeFilesResource(self)
+
+
+class FakeHTTPResponse:
+    def __init__(self, status_code: int, body=b"", headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+        self.content = body if isinstance(body, bytes) else json.dumps(body).encode("utf-8")
+
+    @property
+    def ok(self):
+        return self.status_code < 400
+
+    @property
+    def text(self):
+        return self.content.decode("utf-8", errors="replace")
+
+    def json(self):
+        return json.loads(self.content)
+
+    def iter_content(self, chunk_size=1024):
+        for start in range(0, len(self.content), chunk_size):
+            yield self.content[start:start + chunk_size]
+
+    def close(self):
+        pass
+
+
+class FakeGraphSession:
+    def __init__(self, files: list = None, latency: float = 0.0, page_size: int = 50,
+                 host: str = "contoso.sharepoint.com", site_path: str = "/sites/bids"):
+        """
+        In-memory stand-in for the Microsoft Graph endpoints the SharePoint connector uses:
+        client-credentials token, site and drive lookup, paged drive delta with expiring
+        tokens, item content, path-based children and uploads. `files` takes the same
+        dicts as synthetic.make_corpus. Each request sleeps for `latency` seconds;
+        fail_next() scripts error responses.
+        """
+        self.latency = latency
+        self.page_size = page_size
+        self.host = host
+        self.site_path = site_path
+        self.site_url = f"https://{host}{site_path}"
+        self.items = {}
+        self.sequence = 0
+        self.expired_before = 0
+        self.requests = []
+        self._failures = []  # [fragment, status, headers, remaining]
+        self._lock = threading.Lock()
+        for f in files or []:
+            self.put_file(f["name"], f["data"])
+
+    def put_file(self, name: str, data: bytes, item_id: str = None) -> str:
+        with self._lock:
+            self.sequence += 1
+            item_id = item_id or next((i for i, it in self.items.items() if it["name"] == name),
+                                      f"item-{len(self.items) + 1}")
+            self.items[item_id] = {"name": name, "data": data, "seq": self.sequence, "deleted": False}
+            return item_id
+
+    def delete_file(self, item_id: str):
+        with self._lock:
+            self.sequence += 1
+            self.items[item_id].update(deleted=True, seq=self.sequence)
+
+    def expire_delta_tokens(self):
+        """Make every delta link issued so far return 410 Gone."""
+        with self._lock:
+            self.sequence += 1
+            self.expired_before = self.sequence
+
+    def fail_next(self, fragment: str, status: int, headers: dict = None, times: int = 1):
+        """Answer the next `times` requests whose URL contains `fragment` with `status`."""
+        with self._lock:
+            self._failures.append([fragment, status, headers or {}, times])
+
+    def count(self, fragment: str) -> int:
+        return sum(1 for method, url in self.requests if fragment in url)
+
+    def _item_json(self, item_id: str, item: dict) -> dict:
+        if item["deleted"]:
+            return {"id": item_id, "deleted": {"state": "deleted"}}
+        return {
+            "id": item_id,
+            "name": item["name"],
+            "size": len(item["data"]),
+            "cTag": f"c:{{{item_id}}},{item['seq']}",
+            "lastModifiedDateTime": f"2025-01-01T00:00:{item['seq'] % 60:02d}Z",
+            "file": {"mimeType": "text/plain" if item["name"].endswith(".txt") else "application/octet-stream"},
+        }
+
+    def request(self, method, url, params=None, data=None, json=None, headers=None, stream=False, timeout=None):
+        time.sleep(self.latency)
+        with self._lock:
+            self.requests.append((method, url))
+            for failure in self._failures:
+                if failure[0] in url and failure[3] > 0:
+                    failure[3] -= 1
+                    return FakeHTTPResponse(failure[1], {"error": {"code": "scripted"}}, headers=failure[2])
+            return self._handle(method, url, data)
+
+    def _handle(self, method, url, data):
+        if "login.microsoftonline.com" in url:
+            return FakeHTTPResponse(200, {"access_token": "fake-token", "expires_in": 3600})
+        path = url.split("graph.microsoft.com/v1.0", 1)[-1]
+        if path == f"/sites/{self.host}:{self.site_path}":
+            return FakeHTTPResponse(200, {"id": "site-1"})
+        if path == "/sites/site-1/drives":
+            return FakeHTTPResponse(200, {"value": [
+                {"id": "drive-1", "name": "Documents", "webUrl": f"{self.site_url}/Shared%20Documents"},
+            ]})
+        if path.startswith("/drives/drive-1/root/delta"):
+            query = dict(part.split("=", 1) for part in path.partition("?")[2].split("&") if "=" in part)
+            since = int(query.get("token", 0))
+            if since and since < self.expired_before:
+                return FakeHTTPResponse(410, {"error": {"code": "resyncRequired"}})
+            changed = sorted((it["seq"], i) for i, it in self.items.items()
+                             if it["seq"] > since and not (since == 0 and it["deleted"]))
+            offset = int(query.get("skip", 0))
+            page = changed[offset:offset + self.page_size]
+            body = {"value": [self._item_json(i, self.items[i]) for _, i in page]}
+            base = "https://graph.microsoft.com/v1.0/drives/drive-1/root/delta"
+            if offset + self.page_size < len(changed):
+                body["@odata.nextLink"] = f"{base}?token={since}&skip={offset + self.page_size}"
+            else:
+                body["@odata.deltaLink"] = f"{base}?token={self.sequence}"
+            return FakeHTTPResponse(200, body)
+        if path.startswith("/drives/drive-1/items/") and path.endswith("/content"):
+            item = self.items.get(path.split("/")[4])
+            if not item or item["deleted"]:
+                return FakeHTTPResponse(404, {"error": {"code": "itemNotFound"}})
+            return FakeHTTPResponse(200, item["data"])
+        if path.startswith("/drives/drive-1/root:/") and method == "PUT" and path.endswith(":/content"):
+            name = path[len("/drives/drive-1/root:/"):-len(":/content")].rsplit("/", 1)[-1]
+            self._lock.release()
+            try:
+                self.put_file(name, data)
+            finally:
+                self._lock.acquire()
+            return FakeHTTPResponse(201, {"name": name})
+        if path.startswith("/drives/drive-1/root") and path.endswith("/children"):
+            return FakeHTTPResponse(200, {"value": [
+                {"id": i, "name": it["name"], "file": {}} for i, it in self.items.items() if not it["deleted"]
+            ]})
+        return FakeHTTPResponse(404, {"error": {"code": "itemNotFound", "message": path}})
@@ -0,0 +1,201 @@
+# In-process load test: boots main:app with fake LLM/Drive backends and drives a mixed
+# open-loop workload at a target rate. From src/backend:
+#   python -m benchmarks.load_test --rate 20 --duration 30 --mix assess=3,draft=1,health=6
+#   python -m benchmarks.load_test --llm-latency 2 --threadpool-size 40 --output load.json
+import argparse
+import asyncio
+import json
+import random
+import sys
+
+import httpx
+
+from benchmarks import synthetic
+from benchmarks.fakes import FakeDriveService, FakeGenerativeModel
+
+
+class LoadTestServices:
+    def __init__(self, llm_latency: float, drive_latency: float, corpus_documents: int):
+        from services.google_drive_client import GoogleDriveClient
+        from services.llm_client import LLMClient
+        from services.response_drafter import ResponseDrafter
+        from services.rfp_analyzer import RFPAnalyzer
+        from services.question_generator import QuestionGenerator
+
+        self.drive_service = FakeDriveService(synthetic.make_corpus(corpus_documents), latency=drive_latency)
+        self.drive_client = GoogleDriveClient(service=self.drive_service)
+        self.llm_model = FakeGenerativeModel(latency=llm_latency)
+        llm = LLMClient(model=self.llm_model)
+        self.drafter = ResponseDrafter(llm=llm, drive_client=self.drive_client)
+        self.analyzer = RFPAnalyzer(llm=llm)
+        self.q_gen = QuestionGenerator(llm=llm, drive_client=self.drive_client)
+
+
+class Workload:
+    def __init__(self, mix: dict, distinct: int, seed: int):
+        """
+        Request factory for the mixed workload. Uploads are drawn from a pool of
+        `distinct` documents so single-flight and artifact caching behave as they
+        would with a realistic mix of repeated and new RFPs.
+        """
+        self.rng = random.Random(seed)
+        self.names = list(mix)
+        self.weights = [mix[name] for name in self.names]
+        base_text = synthetic.make_text_rfp(20000, seed=seed)
+        self.text_rfps = [f"{base_text}\nReference {i}\n".encode("utf-8") for i in range(distinct)]
+        self.templates = [synthetic.make_docx_template(20, 2, seed=seed + i) for i in range(min(distinct, 20))]
+
+    def next_request(self):
+        name = self.rng.choices(self.names, self.weights)[0]
+        if name == "assess":
+            data = self.rng.choice(self.text_rfps)
+            return name, {"method": "POST", "url": "/assess", "files": {"file": ("rfp.txt", data)}}
+        if name == "draft":
+            data = self.rng.choice(self.templates)
+            return name, {"method": "POST", "url": "/draft", "files": {"file": ("rfp.docx", data)},
+                          "data": {"upload_to_drive": "true"}}
+        if name == "questions":
+            data = self.rng.choice(self.text_rfps)
+            return name, {"method": "POST", "url": "/questions", "files": {"file": ("rfp.txt", data)}}
+        return name, {"method": "GET", "url": "/health"}
+
+
+def _percentile(sorted_values: list, pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def _summarize(samples: list) -> dict:
+    values = sorted(samples)
+    return {
+        "count": len(values),
+        "p50_ms": _percentile(values, 50) * 1000,
+        "p95_ms": _percentile(values, 95) * 1000,
+        "p99_ms": _percentile(values, 99) * 1000,
+        "max_ms": (values[-1] if values else 0.0) * 1000,
+    }
+
+
+async def _monitor_loop_lag(samples: list, interval: float, stop: asyncio.Event):
+    """Sleep for `interval` repeatedly and record how late the loop wakes us up."""
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        expected = loop.time() + interval
+        await asyncio.sleep(interval)
+        samples.append(max(0.0, loop.time() - expected))
+
+
+async def run_load(app, workload: Workload, rate: float, duration: float, threadpool_size: int = None) -> dict:
+    """
+    Open-loop load: requests are issued on a fixed schedule regardless of how fast the
+    app answers, and latency is measured from the scheduled send time so queueing delay
+    is not hidden (no coordinated omission).
+    """
+    if threadpool_size:
+        import anyio.to_thread
+        anyio.to_thread.current_default_thread_limiter().total_tokens = threadpool_size
+
+    loop = asyncio.get_running_loop()
+    latencies = {}
+    errors = {}
+    lag_samples = []
+    stop = asyncio.Event()
+    monitor = asyncio.create_task(_monitor_loop_lag(lag_samples, 0.01, stop))
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://loadtest", timeout=None) as client:
+        async def send(name, request, scheduled):
+            try:
+                response = await client.request(**request)
+                ok = response.status_code < 400
+            except Exception:
+                ok = False
+            elapsed = loop.time() - scheduled
+            latencies.setdefault(name, []).append(elapsed)
+            if not ok:
+                errors[name] = errors.get(name, 0) + 1
+
+        tasks = []
+        started = loop.time()
+        total = int(rate * duration)
+        for i in range(total):
+            scheduled = started + i / rate
+            delay = scheduled - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            name, request = workload.next_request()
+            tasks.append(asyncio.create_task(send(name, request, scheduled)))
+        await asyncio.gather(*tasks)
+        elapsed = loop.time() - started
+
+    stop.set()
+    await monitor
+
+    completed = sum(len(v) for v in latencies.values())
+    return {
+        "target_rate": rate,
+        "duration_s": elapsed,
+        "requests": completed,
+        "throughput_rps": completed / elapsed if elapsed else 0.0,
+        "errors": errors,
+        "endpoints": {name: _summarize(samples) for name, samples in sorted(latencies.items())},
+        "event_loop_lag": _summarize(lag_samples),
+    }
+
+
+def _parse_mix(text: str) -> dict:
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in ("assess", "draft", "questions", "health"):
+            raise argparse.ArgumentTypeError(f"unknown endpoint in mix: {name}")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def _print_report(report: dict):
+    print(f"\n{report['requests']} requests in {report['duration_s']:.1f}s "
+          f"(target {report['target_rate']:.1f} rps, achieved {report['throughput_rps']:.1f} rps)")
+    print(f"{'endpoint':12s} {'count':>6s} {'errors':>6s} {'p50 ms':>9s} {'p95 ms':>9s} {'p99 ms':>9s} {'max ms':>9s}")
+    rows = list(report["endpoints"].items()) + [("loop lag", report["event_loop_lag"])]
+    for name, stats in rows:
+        print(f"{name:12s} {stats['count']:6d} {report['errors'].get(name, 0):6d} {stats['p50_ms']:9.1f} "
+              f"{stats['p95_ms']:9.1f} {stats['p99_ms']:9.1f} {stats['max_ms']:9.1f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="In-process load test for the RFP backend")
+    parser.add_argument("--rate", type=float, default=10, help="requests per second to issue")
+    parser.add_argument("--duration", type=float, default=20, help="seconds to generate load for")
+    parser.add_argument("--mix", type=_parse_mix, default=_parse_mix("assess=3,draft=1,health=6"),
+                        help="weighted endpoint mix, e.g. assess=3,draft=1,questions=1,health=5")
+    parser.add_argument("--llm-latency", type=float, default=1.0, help="seconds per fake LLM call")
+    parser.add_argument("--drive-latency", type=float, default=0.05, help="seconds per fake Drive API call")
+    parser.add_argument("--corpus-documents", type=int, default=10)
+    parser.add_argument("--distinct", type=int, default=50, help="distinct uploaded documents in the pool")
+    parser.add_argument("--threadpool-size", type=int, help="override the AnyIO worker thread limit (default 40)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="write the report as JSON")
+    args = parser.parse_args(argv)
+
+    import main as app_module
+    from benchmarks.run import install_fakes
+
+    install_fakes(LoadTestServices(args.llm_latency, args.drive_latency, args.corpus_documents))
+    workload = Workload(args.mix, args.distinct, args.seed)
+    report = asyncio.run(run_load(app_module.app, workload, args.rate, args.duration, args.threadpool_size))
+    report["settings"] = {k: v for k, v in vars(args).items() if k != "output"}
+    _print_report(report)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Wrote {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
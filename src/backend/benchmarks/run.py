@@ -0,0 +1,301 @@
+# Offline benchmarks against synthetic inputs, a fake Drive service and a fake LLM.
+# From src/backend:
+#   python -m benchmarks.run --output baseline.json
+#   python -m benchmarks.run --compare baseline.json --threshold 0.2
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+
+from benchmarks import synthetic
+from benchmarks.fakes import FakeDriveService, FakeGenerativeModel, FakeGraphSession
+
+SIZES = {
+    "docx_placeholders": 60,
+    "docx_tables": 6,
+    "pdf_pages": 60,
+    "xlsx_rows": 1000,
+    "xlsx_unique": 300,
+    "corpus_documents": 20,
+    "corpus_chars": 20000,
+    "revised_documents": 10,
+    "revisions": 3,
+    "upload_bytes": 16 * 1024 * 1024,
+    "upload_failure_rate": 0.05,
+    "drive_latency": 0.005,
+    "llm_latency": 0.05,
+}
+
+
+class BenchmarkContext:
+    def __init__(self, work_dir: str):
+        from services.google_drive_client import GoogleDriveClient
+        from services.llm_client import LLMClient
+        from services.response_drafter import ResponseDrafter
+        from services.rfp_analyzer import RFPAnalyzer
+        from services.question_generator import QuestionGenerator
+
+        self.work_dir = work_dir
+        self.docx_bytes = synthetic.make_docx_template(SIZES["docx_placeholders"], SIZES["docx_tables"])
+        self.docx_path = self._write("template.docx", self.docx_bytes)
+        self.pdf_path = self._write("rfp.pdf", synthetic.make_pdf(SIZES["pdf_pages"]))
+        self.xlsx_path = self._write("matrix.xlsx", synthetic.make_xlsx_matrix(SIZES["xlsx_rows"], SIZES["xlsx_unique"]))
+        self.corpus = synthetic.make_corpus(SIZES["corpus_documents"], SIZES["corpus_chars"])
+
+        self.drive_service = FakeDriveService(self.corpus, latency=SIZES["drive_latency"])
+        self.drive_client = GoogleDriveClient(service=self.drive_service)
+        self.llm_model = FakeGenerativeModel(latency=SIZES["llm_latency"])
+        llm = LLMClient(model=self.llm_model)
+        self.drafter = ResponseDrafter(llm=llm, drive_client=self.drive_client)
+        self.analyzer = RFPAnalyzer(llm=llm)
+        self.q_gen = QuestionGenerator(llm=llm, drive_client=self.drive_client)
+        self.source_documents = self.drive_client.get_all_rfp_documents()
+        self.upload_path = self._write("pack.docx", os.urandom(SIZES["upload_bytes"]))
+        self.revised_documents = synthetic.make_revised_documents(
+            SIZES["revised_documents"], SIZES["revisions"], SIZES["corpus_chars"])
+
+        self.graph = FakeGraphSession(self.corpus, latency=SIZES["drive_latency"])
+        self.sharepoint = self.make_sharepoint_client()
+        self.sharepoint.load_documents()
+
+    def make_sharepoint_client(self):
+        """SharePoint connector on the fake Graph with its own empty extraction cache and delta state."""
+        from integrations.sharepoint import SharePointClient
+        from services.extraction_cache import ExtractionCache
+
+        cache = ExtractionCache(tempfile.mkdtemp(dir=self.work_dir))
+        return SharePointClient(site_url=self.graph.site_url, tenant_id="tenant", client_id="client",
+                                client_secret="secret", session=self.graph, cache=cache)
+
+    def _write(self, name: str, data: bytes) -> str:
+        path = os.path.join(self.work_dir, name)
+        with open(path, "wb") as f:
+            f.write(data)
+        return path
+
+
+def bench_extract_docx(ctx):
+    import main
+    main.extract_text_from_file(ctx.docx_path)
+
+
+def bench_extract_pdf(ctx):
+    import main
+    main.extract_text_from_file(ctx.pdf_path)
+
+
+def bench_get_all_rfp_documents(ctx):
+    from services import corpus_store, extraction_cache
+    from services.document_source import source_composite
+
+    # Cold load: with a fresh corpus store and extraction cache every file is listed, downloaded,
+    # parsed and published, instead of the previous run's mapping being served
+    fresh = tempfile.mkdtemp(dir=ctx.work_dir)
+    source_id = source_composite(ctx.drive_client).source_id
+    corpus_store._stores[source_id] = corpus_store.CorpusStore(os.path.join(fresh, "corpus"))
+    extraction_cache._cache = extraction_cache.ExtractionCache(os.path.join(fresh, "extraction"))
+    if not ctx.drive_client.get_all_rfp_documents():
+        raise RuntimeError("get_all_rfp_documents loaded no documents")
+
+
+def bench_sharepoint_full_sync(ctx):
+    ctx.make_sharepoint_client().load_documents()
+
+
+def bench_sharepoint_incremental_sync(ctx):
+    ctx.graph.put_file(ctx.corpus[0]["name"], ctx.corpus[0]["data"] + b"\nRevised.")
+    ctx.sharepoint.load_documents()
+
+
+def bench_generate_draft_document(ctx):
+    from services.answer_memo import get_answer_memo
+    memo = get_answer_memo()
+    if memo:
+        memo.clear()  # measure generation, not memo hits
+    _generate_draft(ctx)
+
+
+def bench_generate_draft_document_memoized(ctx):
+    _generate_draft(ctx)
+
+
+def _generate_draft(ctx):
+    output_path = os.path.join(ctx.work_dir, "draft_out.docx")
+    result = ctx.drafter.generate_draft_document(
+        None, ctx.docx_path, output_path,
+        website_content="", source_documents=ctx.source_documents,
+    )
+    if not result:
+        raise RuntimeError("generate_draft_document returned no document")
+
+
+def bench_xlsx_matrix(ctx):
+    from services.answer_memo import get_answer_memo
+    from services.xlsx_responder import ComplianceMatrixResponder
+
+    memo = get_answer_memo()
+    if memo:
+        memo.clear()
+    summary = ComplianceMatrixResponder(ctx.drafter.llm).fill_workbook(
+        ctx.xlsx_path, os.path.join(ctx.work_dir, "matrix_out.xlsx"),
+        website_content="", source_documents=ctx.source_documents,
+    )
+    if not summary or summary["rows_answered"] != SIZES["xlsx_rows"]:
+        raise RuntimeError(f"fill_workbook answered {summary and summary['rows_answered']} rows")
+
+
+def bench_dedupe_documents(ctx):
+    from services.dedup import dedupe_documents
+    _, report = dedupe_documents(ctx.revised_documents)
+    if report["duplicate_paragraphs"] == 0:
+        raise RuntimeError("dedupe_documents found no near-duplicates in the revised corpus")
+
+
+def bench_drive_upload(ctx):
+    from benchmarks.fakes import FakeDriveService
+    from services.google_drive_client import GoogleDriveClient
+
+    service = FakeDriveService([], latency=SIZES["drive_latency"], upload_failure_rate=SIZES["upload_failure_rate"])
+    result = GoogleDriveClient(service=service).upload_file(ctx.upload_path, "Draft_pack.docx")
+    if not result or len(service.uploads[result["id"]]["data"]) != SIZES["upload_bytes"]:
+        raise RuntimeError("resumable upload did not deliver the whole file")
+
+
+def bench_draft_route(ctx):
+    import main
+    from fastapi.testclient import TestClient
+
+    from services.answer_memo import get_answer_memo
+
+    install_fakes(ctx)
+    memo = get_answer_memo()
+    if memo:
+        memo.clear()
+    client = TestClient(main.app)  # no lifespan: keep the fakes installed above
+    response = client.post(
+        "/draft",
+        # A fresh lineage each time so this measures a full draft, not an incremental re-draft
+        files={"file": ("synthetic_rfp.docx", ctx.docx_bytes)},
+        data={"upload_to_drive": "true", "lineage_id": uuid.uuid4().hex},
+    )
+    if response.status_code != 200:
+        raise RuntimeError(f"/draft returned {response.status_code}: {response.text[:200]}")
+    # The Drive upload finishes in the background; don't let it overlap the next run
+    main.upload_queue.wait(timeout=60)
+
+
+def install_fakes(ctx):
+    """Point the app's module-level services at the offline stand-ins and drop per-document caches."""
+    import main
+    main.analyzer = ctx.analyzer
+    main.drafter = ctx.drafter
+    main.q_gen = ctx.q_gen
+    main.drive_client = ctx.drive_client
+    main.DRIVE_AVAILABLE = True
+    main.artifact_store._entries.clear()
+
+
+BENCHMARKS = {
+    "extract_text_from_file.docx": bench_extract_docx,
+    "extract_text_from_file.pdf": bench_extract_pdf,
+    "get_all_rfp_documents": bench_get_all_rfp_documents,
+    "sharepoint_sync.full": bench_sharepoint_full_sync,
+    "sharepoint_sync.incremental": bench_sharepoint_incremental_sync,
+    "generate_draft_document": bench_generate_draft_document,
+    "generate_draft_document.memoized": bench_generate_draft_document_memoized,
+    "draft_route": bench_draft_route,
+    "xlsx_matrix": bench_xlsx_matrix,
+    "dedupe_documents": bench_dedupe_documents,
+    "drive_upload.resumable": bench_drive_upload,
+}
+
+
+def run_benchmarks(names, repeat: int) -> dict:
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="rfp_bench_") as work_dir:
+        ctx = BenchmarkContext(work_dir)
+        for name in names:
+            fn = BENCHMARKS[name]
+            fn(ctx)  # warm-up (imports, first-call caches)
+            timings = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                fn(ctx)
+                timings.append(time.perf_counter() - start)
+            timings.sort()
+            results[name] = {
+                "median_s": statistics.median(timings),
+                "min_s": timings[0],
+                "max_s": timings[-1],
+                "p95_s": timings[min(len(timings) - 1, int(round(0.95 * (len(timings) - 1))))],
+                "runs": repeat,
+            }
+            print(f"{name:35s} median {results[name]['median_s'] * 1000:9.1f} ms   "
+                  f"min {results[name]['min_s'] * 1000:9.1f} ms")
+    return results
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list:
+    """Return (name, baseline_median, current_median, ratio) for every regression beyond threshold."""
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get("results", {}).get(name)
+        if not previous:
+            print(f"{name:35s} (no baseline)")
+            continue
+        ratio = current["median_s"] / previous["median_s"] if previous["median_s"] else float("inf")
+        flag = "REGRESSION" if ratio > 1 + threshold else "ok"
+        print(f"{name:35s} {previous['median_s'] * 1000:9.1f} ms -> {current['median_s'] * 1000:9.1f} ms "
+              f"({ratio:5.2f}x) {flag}")
+        if ratio > 1 + threshold:
+            regressions.append((name, previous["median_s"], current["median_s"], ratio))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline benchmarks for the RFP backend")
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs per benchmark")
+    parser.add_argument("--only", help="comma-separated benchmark names")
+    parser.add_argument("--output", help="write results as a JSON baseline")
+    parser.add_argument("--compare", help="baseline JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed slowdown ratio before flagging")
+    args = parser.parse_args(argv)
+
+    names = args.only.split(",") if args.only else list(BENCHMARKS)
+    unknown = [n for n in names if n not in BENCHMARKS]
+    if unknown:
+        parser.error(f"unknown benchmarks: {', '.join(unknown)}")
+
+    results = run_benchmarks(names, args.repeat)
+    report = {
+        "meta": {
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "sizes": SIZES,
+        },
+        "results": results,
+    }
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Wrote {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} benchmark(s) regressed by more than {args.threshold:.0%}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,179 @@
+import io
+import random
+
+WORDS = (
+    "service delivery cloud migration security compliance governance platform data analytics "
+    "integration support capability experience team project stakeholder outcome risk mitigation "
+    "timeline budget innovation quality assurance reporting transition management framework "
+    "solution architecture customer engagement value procurement evaluation criteria"
+).split()
+
+FORM_FIELDS = [
+    "Trading name", "ABN", "ACN", "Address of registered office", "Date of incorporation",
+    "Name of authorised officer", "Name", "Address", "Position held", "Length of tenure",
+    "Public liability insurer", "Policy number", "Professional indemnity cover",
+]
+
+
+def _sentence(rng: random.Random, words: int = 14) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize() + "."
+
+
+def make_docx_template(n_placeholders: int = 20, m_tables: int = 3, paragraphs: int = 40, seed: int = 7) -> bytes:
+    """Build an RFP response template with N [placeholder] paragraphs and M form tables."""
+    from docx import Document
+
+    rng = random.Random(seed)
+    doc = Document()
+    doc.add_heading("Request for Proposal - Response Template", level=1)
+    for i in range(paragraphs):
+        if i % 10 == 0:
+            doc.add_heading(f"{i // 10 + 1}. Section {i // 10 + 1}", level=2)
+        doc.add_paragraph(_sentence(rng, 20) + " The supplier must describe its approach.")
+
+    for i in range(n_placeholders):
+        field = FORM_FIELDS[i % len(FORM_FIELDS)]
+        suffix = "" if i < len(FORM_FIELDS) else f" {i // len(FORM_FIELDS) + 1}"
+        doc.add_paragraph(f"{field}{suffix}: [{field}{suffix}]")
+
+    for t in range(m_tables):
+        doc.add_paragraph(f"Table {t + 1}. Directors' details")
+        table = doc.add_table(rows=4, cols=4)
+        for col, header in enumerate(["Name", "Address", "Position held", "Length of tenure"]):
+            table.cell(0, col).text = header
+            for row in range(1, 4):
+                table.cell(row, col).text = f"[{header}]"
+
+    buffer = io.BytesIO()
+    doc.save(buffer)
+    return buffer.getvalue()
+
+
+def make_xlsx_matrix(rows: int = 1000, unique: int = 300, seed: int = 13) -> bytes:
+    """Build a tender response matrix: a title block, then Ref / Requirement / Compliance / Response columns."""
+    from openpyxl import Workbook
+
+    rng = random.Random(seed)
+    requirements = [_sentence(rng, 12) + "?" for _ in range(unique)]
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet.title = "Response Matrix"
+    sheet.append(["Tender 2024-117: Supplier Response Schedule"])
+    sheet.append([])
+    sheet.append(["Ref", "Requirement", "Compliance (Y/N/Partial)", "Supplier Response"])
+    for i in range(rows):
+        if i % 50 == 0:
+            sheet.append([f"{i // 50 + 1}", f"Section {i // 50 + 1}"])
+        sheet.append([f"{i // 50 + 1}.{i % 50 + 1}", rng.choice(requirements)])
+
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+    return buffer.getvalue()
+
+
+def make_pdf(pages: int = 20, lines_per_page: int = 40, seed: int = 11) -> bytes:
+    """Build a minimal text PDF with P pages, without any PDF-writing dependency."""
+    rng = random.Random(seed)
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,  # Pages tree, filled in once the page object numbers are known
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    page_numbers = []
+    for page in range(pages):
+        lines = [f"{page + 1}. Section {page + 1}"] + [_sentence(rng, 10) for _ in range(lines_per_page - 1)]
+        text_ops = ["BT", "/F1 10 Tf", "12 TL", "50 780 Td"]
+        for line in lines:
+            escaped = line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+            text_ops.append(f"({escaped}) Tj T*")
+        text_ops.append("ET")
+        stream = "\n".join(text_ops).encode("latin-1")
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        content_number = len(objects)
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 842] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content_number
+        )
+        page_numbers.append(len(objects))
+
+    kids = " ".join(f"{n} 0 R" for n in page_numbers).encode("ascii")
+    objects[1] = b"<< /Type /Pages /Kids [" + kids + b"] /Count %d >>" % pages
+
+    out = io.BytesIO()
+    out.write(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(out.tell())
+        out.write(b"%d 0 obj\n" % number + body + b"\nendobj\n")
+    xref = out.tell()
+    out.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+    for offset in offsets:
+        out.write(b"%010d 00000 n \n" % offset)
+    out.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref))
+    return out.getvalue()
+
+
+def make_text_rfp(chars: int = 50000, seed: int = 3) -> str:
+    """Plain-text RFP with numbered sections and requirement sentences."""
+    rng = random.Random(seed)
+    parts = []
+    section = 1
+    while sum(len(p) for p in parts) < chars:
+        parts.append(f"\n{section}. {rng.choice(WORDS).upper()} {rng.choice(WORDS).upper()}\n")
+        for _ in range(8):
+            parts.append(_sentence(rng) + " The respondent shall " + _sentence(rng, 8).lower() + "\n")
+        section += 1
+    return "".join(parts)[:chars]
+
+
+def make_corpus(documents: int = 10, chars_per_doc: int = 20000, seed: int = 5) -> list:
+    """
+    Synthetic Source Information corpus. Returns Drive-style file dicts with raw bytes:
+    {"id", "name", "mimeType", "modifiedTime", "data"}.
+    """
+    rng = random.Random(seed)
+    corpus = []
+    for i in range(documents):
+        lines = [
+            "Company details", "Trading name: Example Consulting Pty Ltd", "ABN: 12 345 678 901",
+            f"Capability statement {i + 1}",
+        ]
+        while sum(len(line) for line in lines) < chars_per_doc:
+            lines.append(_sentence(rng, 18))
+        corpus.append({
+            "id": f"doc-{i}",
+            "name": f"capability_statement_{i + 1}.txt",
+            "mimeType": "text/plain",
+            "modifiedTime": "2025-01-01T00:00:00.000Z",
+            "data": "\n".join(lines).encode("utf-8"),
+        })
+    return corpus
+
+
+def make_revised_documents(documents: int = 10, revisions: int = 3, chars_per_doc: int = 20000,
+                           seed: int = 9) -> list:
+    """
+    Source documents as loaded ({"id", "name", "content", "modified"}): each capability
+    statement plus `revisions` older versions with a word changed in a third of the paragraphs.
+    """
+    rng = random.Random(seed)
+    loaded = []
+    for i in range(documents):
+        lines = [f"Capability statement {i + 1}"]
+        while sum(len(line) for line in lines) < chars_per_doc:
+            lines.append(" ".join(_sentence(rng, 14) for _ in range(2)))
+        for revision in range(revisions + 1):
+            if revision:
+                lines = list(lines)
+                for n in range(1, len(lines)):
+                    if rng.random() < 0.33:
+                        words = lines[n].split()
+                        words[rng.randrange(len(words))] = rng.choice(WORDS)
+                        lines[n] = " ".join(words)
+            loaded.append({
+                "id": f"statement-{i}-v{revision}",
+                "name": f"capability_statement_{i + 1}_v{revisions + 1 - revision}.docx",
+                "content": "\n".join(lines),
+                "modified": f"2025-0{revisions + 1 - revision}-01T00:00:00.000Z",
+            })
+    return loaded
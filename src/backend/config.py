@@ -12,10 +12,149 @@ class Settings:
     GCP_PROJECT_ID = os.getenv("GCP_PROJECT_ID", "rfp-accelerator-agent")
     GCP_LOCATION = os.getenv("GCP_LOCATION", "us-central1")
     
+    # LLM - max concurrent model calls shared by every service in this process
+    LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+    
+    # LLM routing: task types map to models and generation settings (see services/llm_routing.py).
+    # LLM_ROUTING_POLICY is a JSON object of per-task overrides, e.g. {"draft": {"max_output_tokens": 8192}}
+    LLM_BACKEND = os.getenv("LLM_BACKEND", "vertex")  # "vertex" or "fake" (offline stand-in)
+    LLM_MODEL = os.getenv("LLM_MODEL", "gemini-1.5-flash-002")
+    LLM_FAST_MODEL = os.getenv("LLM_FAST_MODEL", os.getenv("LLM_MODEL", "gemini-1.5-flash-002"))
+    LLM_FALLBACK_MODELS = [m.strip() for m in os.getenv("LLM_FALLBACK_MODELS", "gemini-1.5-pro-002").split(",") if m.strip()]
+    LLM_ROUTING_POLICY = os.getenv("LLM_ROUTING_POLICY", "")
+    LLM_ROUTING_WINDOW_SECONDS = float(os.getenv("LLM_ROUTING_WINDOW_SECONDS", "300"))
+    LLM_ROUTING_COOLDOWN_SECONDS = float(os.getenv("LLM_ROUTING_COOLDOWN_SECONDS", "60"))
+    LLM_ROUTING_MAX_ERROR_RATE = float(os.getenv("LLM_ROUTING_MAX_ERROR_RATE", "0.5"))
+    # Follow-up calls for the keys a structured (JSON) call left missing
+    LLM_JSON_MAX_REPAIRS = int(os.getenv("LLM_JSON_MAX_REPAIRS", "1"))
+    LLM_FAKE_LATENCY = float(os.getenv("LLM_FAKE_LATENCY", "0.05"))
+    LLM_FAKE_FAILURE_RATE = float(os.getenv("LLM_FAKE_FAILURE_RATE", "0"))
+    
+    # Batch assessment
+    BATCH_ASSESS_MAX_FILES = int(os.getenv("BATCH_ASSESS_MAX_FILES", "100"))
+    # Total uncompressed size of the RFPs extracted from .zip uploads in one batch
+    BATCH_ASSESS_MAX_EXTRACTED_BYTES = int(os.getenv("BATCH_ASSESS_MAX_EXTRACTED_BYTES", str(500 * 1024 * 1024)))
+    BATCH_ASSESS_WORKERS = int(os.getenv("BATCH_ASSESS_WORKERS", "8"))
+    
+    # Map-reduce assessment for long RFPs: section-aware chunks scored in parallel.
+    # Keep ASSESS_MAX_CHUNKS <= LLM_MAX_CONCURRENCY so all chunks are scored in one wave.
+    ASSESS_MAP_REDUCE = os.getenv("ASSESS_MAP_REDUCE", "true").lower() == "true"
+    ASSESS_CHUNK_CHARS = int(os.getenv("ASSESS_CHUNK_CHARS", "12000"))
+    ASSESS_MAX_CHUNKS = int(os.getenv("ASSESS_MAX_CHUNKS", "8"))
+    ASSESS_MAP_WORKERS = int(os.getenv("ASSESS_MAP_WORKERS", "8"))
+    ASSESS_PURSUE_THRESHOLD = int(os.getenv("ASSESS_PURSUE_THRESHOLD", "60"))
+    
+    # Per-document artifact cache (extracted text, outline, analysis) shared by endpoints
+    ARTIFACT_CACHE_MAX_DOCS = int(os.getenv("ARTIFACT_CACHE_MAX_DOCS", "64"))
+    
+    # Generated drafts kept for direct download
+    GENERATED_FILE_DIR = os.getenv("GENERATED_FILE_DIR")
+    GENERATED_FILE_TTL_SECONDS = int(os.getenv("GENERATED_FILE_TTL_SECONDS", "3600"))
+    GENERATED_FILE_MAX_FILES = int(os.getenv("GENERATED_FILE_MAX_FILES", "200"))
+    
+    # Drive uploads: resumable chunks retried from the last confirmed offset, run by background workers
+    DRIVE_UPLOAD_CHUNK_BYTES = int(os.getenv("DRIVE_UPLOAD_CHUNK_BYTES", str(8 * 1024 * 1024)))
+    DRIVE_UPLOAD_MAX_RETRIES = int(os.getenv("DRIVE_UPLOAD_MAX_RETRIES", "5"))
+    DRIVE_UPLOAD_RETRY_BASE_SECONDS = float(os.getenv("DRIVE_UPLOAD_RETRY_BASE_SECONDS", "1"))
+    DRIVE_CONVERT_TO_DOCS = os.getenv("DRIVE_CONVERT_TO_DOCS", "true").lower() == "true"
+    UPLOAD_QUEUE_ENABLED = os.getenv("UPLOAD_QUEUE_ENABLED", "true").lower() == "true"
+    UPLOAD_QUEUE_DIR = os.getenv("UPLOAD_QUEUE_DIR")
+    UPLOAD_QUEUE_MAX_JOBS = int(os.getenv("UPLOAD_QUEUE_MAX_JOBS", "32"))
+    UPLOAD_QUEUE_WORKERS = int(os.getenv("UPLOAD_QUEUE_WORKERS", "2"))
+    UPLOAD_JOB_TTL_SECONDS = int(os.getenv("UPLOAD_JOB_TTL_SECONDS", "3600"))
+    
+    # Source corpus synced from Drive into a versioned file memory-mapped by every worker process
+    CORPUS_STORE_ENABLED = os.getenv("CORPUS_STORE_ENABLED", "true").lower() == "true"
+    CORPUS_STORE_DIR = os.getenv("CORPUS_STORE_DIR")
+    CORPUS_SYNC_INTERVAL_SECONDS = int(os.getenv("CORPUS_SYNC_INTERVAL_SECONDS", "600"))
+    CORPUS_KEEP_VERSIONS = int(os.getenv("CORPUS_KEEP_VERSIONS", "3"))
+    
+    # Extracted text per (source, file, version), shared by every document source and worker
+    EXTRACTION_CACHE_DIR = os.getenv("EXTRACTION_CACHE_DIR")
+    EXTRACTION_CACHE_MAX_ENTRIES = int(os.getenv("EXTRACTION_CACHE_MAX_ENTRIES", "5000"))
+    
+    # Duplicate source paragraphs collapsed before prompting: exact repeats, and near-duplicates
+    # (MinHash similarity at least MIN_SIMILARITY, same numbers and names) between versions of one document
+    SOURCE_DEDUP_ENABLED = os.getenv("SOURCE_DEDUP_ENABLED", "true").lower() == "true"
+    SOURCE_DEDUP_MIN_SIMILARITY = float(os.getenv("SOURCE_DEDUP_MIN_SIMILARITY", "0.8"))
+    SOURCE_DEDUP_MIN_CHARS = int(os.getenv("SOURCE_DEDUP_MIN_CHARS", "120"))
+    
+    # Admission control: concurrent requests per endpoint class, queue bound and wait before a 429
+    ADMISSION_ENABLED = os.getenv("ADMISSION_ENABLED", "true").lower() == "true"
+    ADMISSION_MAX_ACTIVE = int(os.getenv("ADMISSION_MAX_ACTIVE", "16"))
+    ADMISSION_ASSESS_LIMIT = int(os.getenv("ADMISSION_ASSESS_LIMIT", "8"))
+    ADMISSION_QUESTIONS_LIMIT = int(os.getenv("ADMISSION_QUESTIONS_LIMIT", "4"))
+    ADMISSION_BATCH_LIMIT = int(os.getenv("ADMISSION_BATCH_LIMIT", "2"))
+    ADMISSION_DRAFT_LIMIT = int(os.getenv("ADMISSION_DRAFT_LIMIT", "3"))
+    ADMISSION_MAX_QUEUE = int(os.getenv("ADMISSION_MAX_QUEUE", "64"))
+    ADMISSION_MAX_WAIT_SECONDS = float(os.getenv("ADMISSION_MAX_WAIT_SECONDS", "30"))
+    ADMISSION_RETRY_AFTER_SECONDS = int(os.getenv("ADMISSION_RETRY_AFTER_SECONDS", "5"))
+    
+    # Draft lineage: section/placeholder maps of previous versions, so reissued tenders re-draft incrementally
+    LINEAGE_ENABLED = os.getenv("LINEAGE_ENABLED", "true").lower() == "true"
+    LINEAGE_DIR = os.getenv("LINEAGE_DIR")
+    LINEAGE_KEEP_VERSIONS = int(os.getenv("LINEAGE_KEEP_VERSIONS", "5"))
+    
+    # XLSX response matrices: unique questions per LLM call, concurrent calls, retrieved context per call
+    XLSX_BATCH_SIZE = int(os.getenv("XLSX_BATCH_SIZE", "20"))
+    XLSX_WORKERS = int(os.getenv("XLSX_WORKERS", os.getenv("LLM_MAX_CONCURRENCY", "8")))
+    XLSX_CONTEXT_CHARS = int(os.getenv("XLSX_CONTEXT_CHARS", "12000"))
+    XLSX_MAX_ROWS = int(os.getenv("XLSX_MAX_ROWS", "5000"))
+    
+    # Startup warm-up: prefetch the corpus (and optionally a company website) before reporting healthy
+    WARMUP_ENABLED = os.getenv("WARMUP_ENABLED", "true").lower() == "true"
+    WARMUP_TIMEOUT_SECONDS = float(os.getenv("WARMUP_TIMEOUT_SECONDS", "120"))
+    WARMUP_COMPANY_URL = os.getenv("WARMUP_COMPANY_URL", "")
+    
+    # Placeholder answers reused across drafts until the source documents change
+    ANSWER_MEMO_ENABLED = os.getenv("ANSWER_MEMO_ENABLED", "true").lower() == "true"
+    ANSWER_MEMO_DIR = os.getenv("ANSWER_MEMO_DIR")
+    ANSWER_MEMO_MAX_ENTRIES = int(os.getenv("ANSWER_MEMO_MAX_ENTRIES", "20000"))
+    
+    # Website scraping - shared cache and keep-alive connection pool
+    WEB_CACHE_TTL_SECONDS = int(os.getenv("WEB_CACHE_TTL_SECONDS", "900"))
+    WEB_CACHE_MAX_ENTRIES = int(os.getenv("WEB_CACHE_MAX_ENTRIES", "256"))
+    WEB_POOL_MAXSIZE = int(os.getenv("WEB_POOL_MAXSIZE", "32"))
+    WEB_MAX_BYTES = int(os.getenv("WEB_MAX_BYTES", str(1024 * 1024)))
+    HTML_PARSER = os.getenv("HTML_PARSER", "lxml")  # falls back to html.parser if lxml is missing
+    WEB_STREAMING_EXTRACT = os.getenv("WEB_STREAMING_EXTRACT", "true").lower() == "true"
+    
+    # Observability - per-stage latency histograms served on /metrics
+    METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+    LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+    
+    # LLM token and truncation accounting served on /usage (costs in USD per million tokens)
+    USAGE_MAX_REQUESTS = int(os.getenv("USAGE_MAX_REQUESTS", "1000"))
+    USAGE_WINDOW_SECONDS = int(os.getenv("USAGE_WINDOW_SECONDS", "3600"))
+    LLM_INPUT_COST_PER_MTOK = float(os.getenv("LLM_INPUT_COST_PER_MTOK", "0.075"))
+    LLM_OUTPUT_COST_PER_MTOK = float(os.getenv("LLM_OUTPUT_COST_PER_MTOK", "0.30"))
+    
+    # Opt-in request profiling (X-Profile header or sampling); disabled unless an admin token is set
+    PROFILING_ADMIN_TOKEN = os.getenv("PROFILING_ADMIN_TOKEN", "")
+    PROFILING_SAMPLE_RATE = float(os.getenv("PROFILING_SAMPLE_RATE", "0"))
+    PROFILING_MAX_PROFILES = int(os.getenv("PROFILING_MAX_PROFILES", "20"))
+    
+    # Multi-page company site crawl feeding the draft source corpus
+    # Off by default: a crawl can add up to SITE_CRAWL_TIME_BUDGET_SECONDS to a cold /draft
+    SITE_CRAWL_ENABLED = os.getenv("SITE_CRAWL_ENABLED", "false").lower() == "true"
+    SITE_CRAWL_MAX_PAGES = int(os.getenv("SITE_CRAWL_MAX_PAGES", "25"))
+    SITE_CRAWL_CONCURRENCY = int(os.getenv("SITE_CRAWL_CONCURRENCY", "16"))
+    SITE_CRAWL_PER_HOST_CONCURRENCY = int(os.getenv("SITE_CRAWL_PER_HOST_CONCURRENCY", "8"))
+    SITE_CRAWL_TIME_BUDGET_SECONDS = float(os.getenv("SITE_CRAWL_TIME_BUDGET_SECONDS", "15"))
+    # Link hops followed from the landing page (sitemap entries count as one hop)
+    SITE_CRAWL_MAX_DEPTH = int(os.getenv("SITE_CRAWL_MAX_DEPTH", "3"))
+    SITE_CRAWL_CACHE_MAX_ENTRIES = int(os.getenv("SITE_CRAWL_CACHE_MAX_ENTRIES", "64"))
+    
     # SharePoint
     SHAREPOINT_URL = os.getenv("SHAREPOINT_URL") or get_secret("SHAREPOINT_URL")
     SHAREPOINT_CLIENT_ID = os.getenv("SHAREPOINT_CLIENT_ID") or get_secret("SHAREPOINT_CLIENT_ID")
     SHAREPOINT_CLIENT_SECRET = os.getenv("SHAREPOINT_CLIENT_SECRET") or get_secret("SHAREPOINT_CLIENT_SECRET")
     SHAREPOINT_DOC_LIB = os.getenv("SHAREPOINT_DOC_LIB", "Shared Documents")
+    SHAREPOINT_TENANT_ID = os.getenv("SHAREPOINT_TENANT_ID") or get_secret("SHAREPOINT_TENANT_ID")
+    SHAREPOINT_SYNC_ENABLED = os.getenv("SHAREPOINT_SYNC_ENABLED", "true").lower() == "true"
+    SHAREPOINT_DOWNLOAD_WORKERS = int(os.getenv("SHAREPOINT_DOWNLOAD_WORKERS", "8"))
+    SHAREPOINT_MAX_FILE_BYTES = int(os.getenv("SHAREPOINT_MAX_FILE_BYTES", str(50 * 1024 * 1024)))
+    # Longest throttling backoff honoured per retry; syncs hold the connector's lock while waiting
+    SHAREPOINT_MAX_RETRY_AFTER_SECONDS = float(os.getenv("SHAREPOINT_MAX_RETRY_AFTER_SECONDS", "10"))
 
 settings = Settings()
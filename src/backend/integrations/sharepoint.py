@@ -1,14 +1,356 @@
-class SharePointClient:
-    def __init__(self):
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import parsedate_to_datetime
+from urllib.parse import quote, urlsplit
+import contextvars
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from config import settings
+from services.document_source import DocumentSource
+from services.extraction_cache import SUPPORTED_EXTENSIONS, extract_document_text, get_extraction_cache
+from services.telemetry import trace, traced
+
+logger = logging.getLogger(__name__)
+
+GRAPH_URL = "https://graph.microsoft.com/v1.0"
+TOKEN_URL = "https://login.microsoftonline.com/{tenant}/oauth2/v2.0/token"
+SIMPLE_UPLOAD_LIMIT = 4 * 1024 * 1024
+UPLOAD_CHUNK_BYTES = 5 * 1024 * 1024  # multiple of 320 KiB, as Graph upload sessions require
+DOWNLOAD_CHUNK_BYTES = 1024 * 1024
+MAX_RETRIES = 4
+
+
+class SharePointError(Exception):
+    pass
+
+
+def retry_after(response, default: float) -> float:
+    """Seconds the server asked us to wait; Retry-After may also be an HTTP date."""
+    value = response.headers.get("Retry-After")
+    if not value:
+        return default
+    try:
+        return max(0.0, float(value))
+    except ValueError:
         pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return default
+
+
+class SharePointClient(DocumentSource):
+    source_name = "sharepoint"
+
+    def __init__(self, site_url: str = None, library: str = None, tenant_id: str = None,
+                 client_id: str = None, client_secret: str = None, session=None,
+                 cache=None, state_dir: str = None, download_workers: int = None):
+        """
+        Microsoft Graph connector for a SharePoint document library. Incremental sync uses
+        drive delta queries: only files added or changed since the last delta link are
+        downloaded (in parallel), and extracted text comes from the shared extraction cache.
+        Pass `session` (anything with a requests-style request()) to talk to a fake Graph.
+        """
+        self.site_url = (site_url or settings.SHAREPOINT_URL or "").rstrip("/")
+        self.library = library or settings.SHAREPOINT_DOC_LIB
+        self.tenant_id = tenant_id or settings.SHAREPOINT_TENANT_ID
+        self.client_id = client_id or settings.SHAREPOINT_CLIENT_ID
+        self.client_secret = client_secret or settings.SHAREPOINT_CLIENT_SECRET
+        self.download_workers = download_workers or settings.SHAREPOINT_DOWNLOAD_WORKERS
+        self.cache = cache or get_extraction_cache()
+
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=self.download_workers * 2)
+            session.mount("https://", adapter)
+        self.session = session
+
+        state_dir = state_dir or self.cache.directory
+        key = hashlib.sha256(self.source_id.encode("utf-8")).hexdigest()[:16]
+        self.state_path = os.path.join(state_dir, f"sharepoint_delta_{key}.json")
+
+        self._token = None
+        self._token_expires = 0.0
+        self._token_lock = threading.Lock()
+        self._drive_id = None
+        self._sync_lock = threading.Lock()
+
+    @property
+    def source_id(self) -> str:
+        return f"sharepoint:{self.site_url}/{self.library}"
+
+    @property
+    def available(self) -> bool:
+        return bool(self.site_url and self.tenant_id and self.client_id and self.client_secret)
+
+    # --- Auth and requests -------------------------------------------------
+
+    def _access_token(self, refresh: bool = False) -> str:
+        with self._token_lock:
+            if refresh or not self._token or time.time() > self._token_expires - 60:
+                response = self.session.request(
+                    "POST", TOKEN_URL.format(tenant=self.tenant_id),
+                    data={
+                        "client_id": self.client_id,
+                        "client_secret": self.client_secret,
+                        "scope": "https://graph.microsoft.com/.default",
+                        "grant_type": "client_credentials",
+                    },
+                    timeout=30,
+                )
+                if response.status_code != 200:
+                    raise SharePointError(f"Token request failed ({response.status_code}): {response.text[:200]}")
+                payload = response.json()
+                self._token = payload["access_token"]
+                self._token_expires = time.time() + int(payload.get("expires_in", 3600))
+            return self._token
+
+    def _request(self, method: str, url: str, **kwargs):
+        """
+        Graph request with bearer auth, one token refresh on 401, and Retry-After backoff on
+        429/503, capped at SHAREPOINT_MAX_RETRY_AFTER_SECONDS since syncs wait under _sync_lock.
+        """
+        if not url.startswith("http"):
+            url = GRAPH_URL + url
+        kwargs.setdefault("timeout", 60)
+        extra_headers = kwargs.pop("headers", None) or {}
+        refreshed = False
+        for attempt in range(MAX_RETRIES + 1):
+            headers = {**extra_headers, "Authorization": f"Bearer {self._access_token()}"}
+            response = self.session.request(method, url, headers=headers, **kwargs)
+            if response.status_code == 401 and not refreshed:
+                refreshed = True
+                self._access_token(refresh=True)
+                continue
+            if response.status_code in (429, 503) and attempt < MAX_RETRIES:
+                delay = min(retry_after(response, 2 ** attempt), settings.SHAREPOINT_MAX_RETRY_AFTER_SECONDS)
+                logger.warning(f"SharePoint throttled ({response.status_code}), retrying in {delay:.0f}s")
+                response.close()
+                time.sleep(delay)
+                continue
+            return response
+        return response
+
+    def _get_json(self, url: str, params: dict = None) -> dict:
+        response = self._request("GET", url, params=params)
+        if response.status_code != 200:
+            raise SharePointError(f"GET {url} failed ({response.status_code}): {response.text[:200]}")
+        return response.json()
+
+    def _drive(self) -> str:
+        """Resolve the document library's drive ID from the site URL (cached)."""
+        if self._drive_id:
+            return self._drive_id
+        parts = urlsplit(self.site_url)
+        site = self._get_json(f"/sites/{parts.hostname}:{parts.path or '/'}")
+        drives = self._get_json(f"/sites/{site['id']}/drives").get("value", [])
+        wanted = self.library.strip("/")
+        for drive in drives:
+            web_path = urlsplit(drive.get("webUrl", "")).path.rstrip("/")
+            if drive.get("name") == wanted or web_path.endswith("/" + quote(wanted)):
+                self._drive_id = drive["id"]
+                return self._drive_id
+        # "Shared Documents" is exposed by Graph as the "Documents" drive
+        for drive in drives:
+            if wanted == "Shared Documents" and drive.get("name") == "Documents":
+                self._drive_id = drive["id"]
+                return self._drive_id
+        raise SharePointError(f"Document library '{self.library}' not found on {self.site_url}")
+
+    # --- Delta sync --------------------------------------------------------
+
+    def _load_state(self) -> dict:
+        try:
+            with open(self.state_path) as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {"delta_link": None, "items": {}}
+
+    def _save_state(self, state: dict):
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(self.state_path), suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump(state, f)
+        os.replace(temp_path, self.state_path)
+
+    def _fetch_changes(self, delta_link: str):
+        """
+        Page through the drive delta feed. Returns (changed items, new delta link, reset) where
+        reset means the saved link had expired and the items are a full enumeration.
+        """
+        url = delta_link or f"/drives/{self._drive()}/root/delta"
+        reset = delta_link is None
+        changes = []
+        while url:
+            response = self._request("GET", url)
+            if response.status_code == 410 and not reset:
+                logger.warning("SharePoint delta link expired; re-enumerating the library")
+                url, reset, changes = f"/drives/{self._drive()}/root/delta", True, []
+                continue
+            if response.status_code != 200:
+                raise SharePointError(f"Delta query failed ({response.status_code}): {response.text[:200]}")
+            page = response.json()
+            changes.extend(page.get("value", []))
+            url = page.get("@odata.nextLink")
+            if not url:
+                return changes, page.get("@odata.deltaLink"), reset
+        return changes, None, reset
+
+    def load_documents(self) -> list:
+        """Apply delta changes since the last sync, fetch new or changed files, and return all documents."""
+        with self._sync_lock, trace("sharepoint_sync"):
+            state = self._load_state()
+            changes, delta_link, reset = self._fetch_changes(state.get("delta_link"))
+            items = {} if reset else state.get("items", {})
+
+            for item in changes:
+                if "deleted" in item:
+                    items.pop(item["id"], None)
+                elif "file" in item and item.get("name", "").lower().endswith(SUPPORTED_EXTENSIONS):
+                    items[item["id"]] = {
+                        "name": item["name"],
+                        "mimeType": item["file"].get("mimeType", ""),
+                        "modified": item.get("lastModifiedDateTime", ""),
+                        "version": item.get("cTag") or item.get("eTag") or item.get("lastModifiedDateTime", ""),
+                        "size": item.get("size", 0),
+                    }
+                elif "folder" not in item and item["id"] in items:
+                    # Renamed to an unsupported type
+                    items.pop(item["id"], None)
+
+            pending = [(item_id, meta) for item_id, meta in items.items()
+                       if not self.cache.contains(self.source_id, item_id, meta["version"])]
+            if pending:
+                self._download_all(pending)
+
+            documents = []
+            for item_id, meta in items.items():
+                content = self.cache.get(self.source_id, item_id, meta["version"])
+                if content:
+                    documents.append({
+                        "id": item_id,
+                        "name": meta["name"],
+                        "content": content,
+                        "modified": meta["modified"],
+                    })
+
+            state = {"delta_link": delta_link, "items": items}
+            self._save_state(state)
+            logger.info(
+                f"SharePoint sync: {len(changes)} changes, {len(pending)} downloads, "
+                f"{len(documents)} documents{' (full re-enumeration)' if reset else ''}"
+            )
+            return documents
+
+    def _download_all(self, pending: list):
+        workers = min(self.download_workers, len(pending))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = [
+                pool.submit(contextvars.copy_context().run, self._download_and_extract, item_id, meta)
+                for item_id, meta in pending
+            ]
+            for future in futures:
+                future.result()
+
+    @traced("sharepoint_download_parse")
+    def _download_and_extract(self, item_id: str, meta: dict):
+        if meta.get("size", 0) > settings.SHAREPOINT_MAX_FILE_BYTES:
+            logger.warning(f"Skipping SharePoint file '{meta['name']}': {meta['size']} bytes exceeds the limit")
+            self.cache.put(self.source_id, item_id, meta["version"], "")
+            return
+        try:
+            data = self._download_bytes(f"/drives/{self._drive()}/items/{item_id}/content")
+        except Exception as e:
+            # Not cached, so the next sync retries this file
+            logger.error(f"Error downloading SharePoint file '{meta['name']}': {e}")
+            return
+        text = extract_document_text(data, meta["name"], meta.get("mimeType", ""))
+        self.cache.put(self.source_id, item_id, meta["version"], text)
+
+    def _download_bytes(self, url: str) -> bytes:
+        response = self._request("GET", url, stream=True)
+        try:
+            if response.status_code != 200:
+                raise SharePointError(f"Download failed ({response.status_code})")
+            chunks = []
+            size = 0
+            for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_BYTES):
+                size += len(chunk)
+                if size > settings.SHAREPOINT_MAX_FILE_BYTES:
+                    raise SharePointError("File exceeds SHAREPOINT_MAX_FILE_BYTES")
+                chunks.append(chunk)
+            return b"".join(chunks)
+        finally:
+            response.close()
+
+    # --- Path-based file operations ---------------------------------------
+
+    def _item_path(self, path: str) -> str:
+        return quote(path.strip("/"))
 
     def upload_file(self, local_path: str, remote_folder: str):
-        print(f"Mock uploading {local_path} to {remote_folder}")
-        return True
+        """Upload a local file into a library folder, using an upload session for files over 4 MB."""
+        name = os.path.basename(local_path)
+        target = f"/drives/{self._drive()}/root:/{self._item_path(remote_folder + '/' + name)}:"
+        try:
+            size = os.path.getsize(local_path)
+            if size <= SIMPLE_UPLOAD_LIMIT:
+                with open(local_path, "rb") as f:
+                    response = self._request("PUT", target + "/content", data=f.read())
+                if response.status_code not in (200, 201):
+                    raise SharePointError(f"Upload failed ({response.status_code}): {response.text[:200]}")
+                return True
+
+            session = self._request("POST", target + "/createUploadSession",
+                                    json={"item": {"@microsoft.graph.conflictBehavior": "replace"}})
+            if session.status_code != 200:
+                raise SharePointError(f"Could not create upload session ({session.status_code})")
+            upload_url = session.json()["uploadUrl"]
+            with open(local_path, "rb") as f:
+                offset = 0
+                while offset < size:
+                    chunk = f.read(UPLOAD_CHUNK_BYTES)
+                    end = offset + len(chunk) - 1
+                    # The upload URL is pre-authenticated; Graph rejects an Authorization header on it
+                    response = self.session.request(
+                        "PUT", upload_url, data=chunk, timeout=120,
+                        headers={"Content-Range": f"bytes {offset}-{end}/{size}"},
+                    )
+                    if response.status_code not in (200, 201, 202):
+                        raise SharePointError(f"Upload chunk failed ({response.status_code})")
+                    offset = end + 1
+            return True
+        except Exception as e:
+            logger.error(f"Error uploading {local_path} to SharePoint: {e}")
+            return False
 
     def download_file(self, remote_path: str, local_path: str):
-        print(f"Mock downloading {remote_path} to {local_path}")
-        return True
+        try:
+            data = self._download_bytes(f"/drives/{self._drive()}/root:/{self._item_path(remote_path)}:/content")
+            with open(local_path, "wb") as f:
+                f.write(data)
+            return True
+        except Exception as e:
+            logger.error(f"Error downloading {remote_path} from SharePoint: {e}")
+            return False
 
     def list_files(self, folder_path: str):
-        return ["previous_rfp_response.docx", "company_overview.pdf"]
+        """Names of the files directly inside a library folder (all pages)."""
+        if folder_path.strip("/"):
+            url = f"/drives/{self._drive()}/root:/{self._item_path(folder_path)}:/children"
+        else:
+            url = f"/drives/{self._drive()}/root/children"
+        names = []
+        try:
+            while url:
+                page = self._get_json(url)
+                names.extend(item["name"] for item in page.get("value", []) if "file" in item)
+                url = page.get("@odata.nextLink")
+        except Exception as e:
+            logger.error(f"Error listing SharePoint folder {folder_path}: {e}")
+        return names
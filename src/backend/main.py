@@ -1,13 +1,41 @@
-from fastapi import FastAPI, UploadFile, File, Form, HTTPException, BackgroundTasks
+from fastapi import FastAPI, UploadFile, File, Form, HTTPException, BackgroundTasks, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse, Response, PlainTextResponse, JSONResponse
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import contextvars
+import json
+import logging
 import os
+import re
 import shutil
+import tempfile
+import time
+import uuid
+import zipfile
+from config import settings
 from services.rfp_analyzer import RFPAnalyzer
 from services.question_generator import QuestionGenerator
 from services.response_drafter import ResponseDrafter
+from services.llm_client import LLMClient, get_router
+from services.web_scraper import WebScraper
+from services.draft_pipeline import build_draft_pipeline, build_matrix_pipeline, upload_draft
+from services.xlsx_responder import ComplianceMatrixResponder
+from services.draft_lineage import DraftLineage, lineage_key
+from services.single_flight import SingleFlight, content_key
+from services.artifact_store import DocumentArtifactStore
+from services.generated_files import GeneratedFileStore, parse_range, iter_file
+from services.upload_queue import UploadQueue
+from services.telemetry import REGISTRY, HTTP_SECONDS, configure_logging, request_id_var, trace, traced
+from services.warmup import Warmup
+from services.admission import AdmissionController, AdmissionMiddleware, EndpointClass
+from services import profiling, usage
+
+configure_logging()
+logger = logging.getLogger(__name__)
 
 try:
     from services.google_drive_client import GoogleDriveClient
@@ -19,6 +47,30 @@ except Exception as e:
 
 app = FastAPI(title="RFP AI Agent Accelerator")
 
+# Admission control: per-endpoint concurrency limits and a priority queue favouring quick endpoints,
+# so a burst of drafts cannot starve assessments. Health, metrics and downloads are never queued.
+admission = AdmissionController(
+    classes=[
+        EndpointClass("assess", settings.ADMISSION_ASSESS_LIMIT, priority=0),
+        EndpointClass("questions", settings.ADMISSION_QUESTIONS_LIMIT, priority=1),
+        EndpointClass("assess_batch", settings.ADMISSION_BATCH_LIMIT, priority=2),
+        EndpointClass("draft", settings.ADMISSION_DRAFT_LIMIT, priority=3),
+    ],
+    routes={
+        ("POST", "/assess"): "assess",
+        ("POST", "/questions"): "questions",
+        ("POST", "/assess/batch"): "assess_batch",
+        ("POST", "/draft"): "draft",
+    },
+    max_active=settings.ADMISSION_MAX_ACTIVE,
+    max_queue=settings.ADMISSION_MAX_QUEUE,
+    max_wait_seconds=settings.ADMISSION_MAX_WAIT_SECONDS,
+    default_retry_after=settings.ADMISSION_RETRY_AFTER_SECONDS,
+)
+if settings.ADMISSION_ENABLED:
+    # Added first so it runs inside CORS and the request context: 429s carry both
+    app.add_middleware(AdmissionMiddleware, controller=admission)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -27,22 +79,115 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Caller-supplied X-Request-ID values echoed back as X-Client-Request-ID
+CLIENT_REQUEST_ID_PATTERN = re.compile(r"[A-Za-z0-9._:-]{1,128}")
+
+@app.middleware("http")
+async def request_context_middleware(request: Request, call_next):
+    """
+    Assign a request ID (propagated through logs and worker threads) and time the request.
+    The ID is always generated here, since it keys the usage ledger and /usage/{request_id};
+    a caller's own X-Request-ID is only echoed back as X-Client-Request-ID.
+    """
+    request_id = uuid.uuid4().hex
+    client_request_id = request.headers.get("x-request-id", "")
+    token = request_id_var.set(request_id)
+    usage_token = usage.bind_request(request.method)
+    profile = None
+    if profiling.should_profile(request.method, request.headers):
+        profile, profile_token = profiling.begin(request_id, request.method, request.url.path)
+    started = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        response.headers["X-Request-ID"] = request_id
+        if CLIENT_REQUEST_ID_PATTERN.fullmatch(client_request_id):
+            response.headers["X-Client-Request-ID"] = client_request_id
+        if profile is not None:
+            response.headers["X-Profile-ID"] = profile.profile_id
+        return response
+    finally:
+        if profile is not None:
+            profiling.finish(profile, profile_token, status)
+        route = getattr(request.scope.get("route"), "path", "unmatched")
+        usage.set_route(route)
+        if settings.METRICS_ENABLED:
+            HTTP_SECONDS.observe(
+                time.perf_counter() - started,
+                method=request.method,
+                route=route,
+                status=status,
+            )
+        summary = usage.LEDGER.get(request_id)
+        if summary:
+            logger.info(
+                f"LLM usage {route}: {summary['llm_calls']} calls, {summary['input_tokens']} input / "
+                f"{summary['output_tokens']} output tokens, ~${summary['estimated_cost_usd']:.4f}, "
+                f"{sum(t['events'] for t in summary['truncations'].values())} truncations"
+            )
+        usage.request_info_var.reset(usage_token)
+        request_id_var.reset(token)
+
 # Initialize services lazily to prevent startup failures
 analyzer = None
 drafter = None
 q_gen = None
 drive_client = None
 
+# Concurrent identical uploads (same content and parameters) share one computation
+request_flight = SingleFlight("requests")
+
+# Extracted text, outline, analysis and placeholders per uploaded document, shared across endpoints
+artifact_store = DocumentArtifactStore(max_entries=settings.ARTIFACT_CACHE_MAX_DOCS)
+
+# Generated drafts kept locally for direct download, independent of Drive upload
+generated_files = GeneratedFileStore(
+    directory=settings.GENERATED_FILE_DIR,
+    ttl_seconds=settings.GENERATED_FILE_TTL_SECONDS,
+    max_files=settings.GENERATED_FILE_MAX_FILES,
+)
+
+# Drive uploads of generated drafts, run by background workers; clients poll /uploads/{job_id}
+upload_queue = UploadQueue(directory=settings.UPLOAD_QUEUE_DIR)
+
+# Startup warm-up; /health reports 503 until it finishes so traffic reaches warm instances only
+warmup = Warmup(timeout_seconds=settings.WARMUP_TIMEOUT_SECONDS)
+
+async def _build_clients():
+    """Construct the Vertex, website and Drive clients concurrently; services share one of each."""
+    async def stage(name, factory):
+        return await run_in_threadpool(warmup.run_stage, name, factory)
+
+    async def no_drive():
+        return None
+
+    return await asyncio.gather(
+        stage("llm_client", LLMClient),
+        stage("web_scraper", WebScraper),
+        stage("drive_client", GoogleDriveClient) if DRIVE_AVAILABLE else no_drive(),
+    )
+
+def _warm_caches():
+    """Prefetch and parse the source corpus and fetch the company website in the background."""
+    # Raise, so a failed corpus load shows up as a failed stage instead of a warm, empty corpus
+    stages = {"source_corpus": lambda: drafter.get_source_documents(raise_errors=True)}
+    if settings.WARMUP_COMPANY_URL:
+        stages["website"] = lambda: drafter.get_website_content(settings.WARMUP_COMPANY_URL)
+        if settings.SITE_CRAWL_ENABLED:
+            stages["site_crawl"] = lambda: drafter.get_company_pages(settings.WARMUP_COMPANY_URL)
+    warmup.run_in_background(stages)
+
 @app.on_event("startup")
 async def startup_event():
-    """Initialize services on startup with error handling"""
+    """Initialize services on startup with error handling, then warm caches in the background"""
     global analyzer, drafter, q_gen, drive_client
+    warmup.start()
     try:
-        analyzer = RFPAnalyzer()
-        drafter = ResponseDrafter()
-        q_gen = QuestionGenerator()
-        if DRIVE_AVAILABLE:
-            drive_client = GoogleDriveClient()
+        llm, scraper, drive_client = await _build_clients()
+        analyzer = RFPAnalyzer(llm=llm)
+        drafter = ResponseDrafter(llm=llm, scraper=scraper, drive_client=drive_client)
+        q_gen = QuestionGenerator(llm=llm, scraper=scraper, drive_client=drive_client)
         print("All services initialized successfully")
     except Exception as e:
         print(f"Warning: Some services failed to initialize: {e}")
@@ -53,16 +198,58 @@ async def startup_event():
             drafter = ResponseDrafter()
         if q_gen is None:
             q_gen = QuestionGenerator()
+    if settings.WARMUP_ENABLED:
+        _warm_caches()
+    else:
+        warmup.finish()
 
 @app.get("/")
 def read_root():
     return {"message": "RFP AI Agent Accelerator API is running", "status": "healthy"}
 
 @app.get("/health")
-def health_check():
-    """Health check endpoint for Cloud Run"""
+async def health_check():
+    """Health check endpoint for Cloud Run (503 while the instance is still warming up)"""
+    if not warmup.ready:
+        return JSONResponse(
+            status_code=503,
+            content={"status": "warming", "service": "rfp-backend", "warmup": warmup.status()},
+        )
     return {"status": "healthy", "service": "rfp-backend"}
 
+@app.get("/health/warmup")
+async def warmup_status():
+    """Per-stage timings of the startup warm-up"""
+    return warmup.status()
+
+@app.get("/admission")
+async def admission_status():
+    """Admitted and queued requests per endpoint class"""
+    return admission.status()
+
+@app.get("/llm-routing")
+def llm_routing():
+    """LLM routing policy and rolling latency / error rate per model and task"""
+    return get_router().snapshot()
+
+@app.get("/metrics")
+def metrics():
+    """Prometheus metrics: per-stage latency, LLM call sizes and HTTP request latency"""
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/usage")
+def usage_report():
+    """Rolling LLM token, cost and truncation report by route, stage and model"""
+    return usage.LEDGER.report()
+
+@app.get("/usage/{request_id}")
+def request_usage(request_id: str):
+    """LLM token, cost and truncation summary for one request (by the X-Request-ID the server returned)"""
+    summary = usage.LEDGER.get(request_id)
+    if summary is None:
+        raise HTTPException(status_code=404, detail="No LLM usage recorded for this request")
+    return summary
+
 @app.get("/debug-drive")
 def debug_drive():
     """Debug endpoint to check Google Drive status"""
@@ -70,6 +257,41 @@ def debug_drive():
         return drive_client.get_config_status()
     return {"status": "Drive client not initialized", "available": DRIVE_AVAILABLE}
 
+def _require_profiling_admin(request: Request):
+    if not settings.PROFILING_ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Profiling is disabled")
+    if not profiling.is_admin(request.headers.get("x-admin-token")):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+@app.get("/debug-profiles")
+def list_profiles(request: Request):
+    """Recent request profiles (newest first). Requires X-Admin-Token."""
+    _require_profiling_admin(request)
+    return {"profiles": profiling.STORE.list()}
+
+@app.get("/debug-profiles/{profile_id}")
+def download_profile(profile_id: str, request: Request, format: str = "text",
+                     sort: str = "cumulative", limit: int = 60):
+    """
+    Download one request profile: format=text for a pstats report, format=pstats for
+    the binary dump (open with `python -m pstats` or snakeviz). Requires X-Admin-Token.
+    """
+    _require_profiling_admin(request)
+    session = profiling.STORE.get(profile_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail="Profile not found or evicted")
+    if format == "pstats":
+        return Response(
+            content=session.pstats_bytes(),
+            media_type="application/octet-stream",
+            headers={"Content-Disposition": f'attachment; filename="profile_{profile_id}.pstats"'},
+        )
+    try:
+        return PlainTextResponse(session.text_report(sort, limit))
+    except KeyError:
+        raise HTTPException(status_code=400, detail=f"Unknown sort key: {sort}")
+
+@traced("extract_text")
 def extract_text_from_file(file_path: str) -> str:
     """Extract text from .docx, .pdf or .txt files"""
     if file_path.endswith('.docx'):
@@ -92,28 +314,175 @@ def extract_text_from_file(file_path: str) -> str:
             with open(file_path, "r", encoding="latin-1") as f:
                 return f.read()
 
+def load_rfp_text(file_path: str) -> str:
+    """Extract RFP text, falling back to the raw bytes if extraction yields nothing useful"""
+    rfp_content = extract_text_from_file(file_path)
+    
+    if not rfp_content or len(rfp_content.strip()) < 10:
+         # Fallback if extraction failed
+         with open(file_path, "rb") as f:
+             rfp_content = str(f.read()[:5000])
+    return rfp_content
+
+def _extract_document_artifacts(doc_hash: str, filename: str, data: bytes):
+    temp_path = f"temp_{doc_hash[:12]}_{os.path.basename(filename)}"
+    with open(temp_path, "wb") as buffer:
+        buffer.write(data)
+    try:
+        return artifact_store.put(doc_hash, filename, load_rfp_text(temp_path))
+    finally:
+        os.remove(temp_path)
+
+def load_document_artifacts(filename: str, data: bytes):
+    """
+    Return the cached artifacts for an uploaded document, extracting its text on first sight.
+    Keyed by content hash (plus extension, which decides the parser) so every endpoint shares them.
+    """
+    doc_hash = content_key("document", data, os.path.splitext(filename)[1].lower())
+    artifacts = artifact_store.get(doc_hash)
+    if artifacts is not None:
+        return artifacts
+    return request_flight.do(("document", doc_hash), _extract_document_artifacts, doc_hash, filename, data)
+
+def _assess_document(filename: str, data: bytes) -> dict:
+    artifacts = load_document_artifacts(filename, data)
+    if artifacts.analysis is not None:
+        return artifacts.analysis
+
+    result = analyzer.analyze_rfp(artifacts.text)
+    if "error" not in result:
+        artifact_store.update(artifacts.doc_hash, analysis=result)
+    return result
+
 @app.post("/assess")
 async def assess_rfp(file: UploadFile = File(...)):
     try:
-        temp_path = f"temp_{file.filename}"
-        with open(temp_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-            
-        rfp_content = extract_text_from_file(temp_path)
-        
-        if not rfp_content or len(rfp_content.strip()) < 10:
-             # Fallback if extraction failed
-             with open(temp_path, "rb") as f:
-                 rfp_content = str(f.read()[:5000])
+        with trace("upload_ingest"):
+            data = await file.read()
+        key = content_key("assess", data, file.filename)
 
-        result = analyzer.analyze_rfp(rfp_content)
-        
-        os.remove(temp_path)
+        result = await request_flight.do_async(
+            key, lambda: run_in_threadpool(_assess_document, file.filename, data)
+        )
         return result
     except Exception as e:
         print(f"Error in assess_rfp: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+BATCH_EXTENSIONS = ('.docx', '.pdf', '.txt')
+
+def _stage_batch_uploads(files: List[UploadFile], work_dir: str) -> list:
+    """
+    Save uploaded files into work_dir, expanding any .zip archives.
+    Returns a list of (display_name, local_path) tuples. Raises ValueError when the batch
+    exceeds BATCH_ASSESS_MAX_FILES or its archives would extract to more than
+    BATCH_ASSESS_MAX_EXTRACTED_BYTES; archives are checked before anything is extracted.
+    """
+    staged = []
+    extracted_bytes = 0
+    for index, upload in enumerate(files):
+        name = os.path.basename(upload.filename or f"upload_{index}")
+        local_path = os.path.join(work_dir, f"{index}_{name}")
+        with open(local_path, "wb") as buffer:
+            shutil.copyfileobj(upload.file, buffer)
+
+        if not name.lower().endswith('.zip'):
+            staged.append((name, local_path))
+            if len(staged) > settings.BATCH_ASSESS_MAX_FILES:
+                raise ValueError(f"Batch contains more than {settings.BATCH_ASSESS_MAX_FILES} files")
+            continue
+
+        with zipfile.ZipFile(local_path) as archive:
+            members = [
+                (member_index, member) for member_index, member in enumerate(archive.infolist())
+                if not member.is_dir() and os.path.basename(member.filename).lower().endswith(BATCH_EXTENSIONS)
+            ]
+            if len(staged) + len(members) > settings.BATCH_ASSESS_MAX_FILES:
+                raise ValueError(
+                    f"Batch contains {len(staged) + len(members)} files; the limit is {settings.BATCH_ASSESS_MAX_FILES}"
+                )
+            # Declared sizes are enforced on read (zipfile stops at file_size), so this bounds the extraction
+            extracted_bytes += sum(member.file_size for _, member in members)
+            if extracted_bytes > settings.BATCH_ASSESS_MAX_EXTRACTED_BYTES:
+                raise ValueError(
+                    f"Archives extract to more than {settings.BATCH_ASSESS_MAX_EXTRACTED_BYTES} bytes"
+                )
+            for member_index, member in members:
+                member_name = os.path.basename(member.filename)
+                # Flatten paths so archive entries cannot escape work_dir
+                member_path = os.path.join(work_dir, f"{index}_{member_index}_{member_name}")
+                with archive.open(member) as src, open(member_path, "wb") as dst:
+                    shutil.copyfileobj(src, dst)
+                staged.append((member_name, member_path))
+        os.remove(local_path)
+
+    return staged
+
+def _assess_batch_item(name: str, path: str) -> dict:
+    try:
+        with open(path, "rb") as f:
+            result = _assess_document(name, f.read())
+    except Exception as e:
+        result = {"error": f"Analysis failed: {str(e)}"}
+    return {"filename": name, **result}
+
+@app.post("/assess/batch")
+async def assess_rfp_batch(files: List[UploadFile] = File(...)):
+    """
+    Assess many RFPs (or .zip archives of RFPs) in one request.
+    Files are extracted and scored concurrently, sharing the process-wide LLM rate limit.
+    Streams NDJSON: one line per RFP as it completes, then a summary line ranked by score.
+    """
+    work_dir = tempfile.mkdtemp(prefix="assess_batch_")
+    try:
+        with trace("upload_ingest"):
+            staged = await run_in_threadpool(_stage_batch_uploads, files, work_dir)
+    except zipfile.BadZipFile as e:
+        shutil.rmtree(work_dir, ignore_errors=True)
+        raise HTTPException(status_code=400, detail=f"Invalid zip archive: {e}")
+    except ValueError as e:
+        shutil.rmtree(work_dir, ignore_errors=True)
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if not staged:
+        shutil.rmtree(work_dir, ignore_errors=True)
+        raise HTTPException(status_code=400, detail="No .docx, .pdf or .txt files found in upload")
+
+    async def stream_results():
+        loop = asyncio.get_running_loop()
+        executor = ThreadPoolExecutor(max_workers=settings.BATCH_ASSESS_WORKERS)
+        completed = []
+        try:
+            tasks = [
+                loop.run_in_executor(executor, contextvars.copy_context().run, _assess_batch_item, name, path)
+                for name, path in staged
+            ]
+            for next_done in asyncio.as_completed(tasks):
+                item = await next_done
+                completed.append(item)
+                yield json.dumps({"type": "result", **item}) + "\n"
+
+            ranking = sorted(
+                completed,
+                key=lambda r: r.get("score") if isinstance(r.get("score"), (int, float)) else -1,
+                reverse=True
+            )
+            yield json.dumps({
+                "type": "summary",
+                "total": len(completed),
+                "failed": sum(1 for r in completed if "error" in r),
+                "ranking": [
+                    {"rank": i + 1, "filename": r["filename"], "score": r.get("score"),
+                     "recommendation": r.get("recommendation")}
+                    for i, r in enumerate(ranking)
+                ]
+            }) + "\n"
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    return StreamingResponse(stream_results(), media_type="application/x-ndjson")
+
 class DraftRequest(BaseModel):
     pass
 
@@ -129,64 +498,165 @@ def cleanup_files(paths: list):
 async def draft_response(
     background_tasks: BackgroundTasks,
     file: UploadFile = File(...), 
-    company_url: Optional[str] = Form(None)
+    company_url: Optional[str] = Form(None),
+    upload_to_drive: bool = Form(True),
+    lineage_id: Optional[str] = Form(None)
 ):
     """
     Draft response using company knowledge base, fill placeholders, and return the document for download.
+    The generated document is always available from /download/{download_id} for a limited time,
+    whether or not the Drive upload is skipped or fails. The Drive upload runs in the background:
+    the response carries an upload_status_url to poll for the Drive link.
+    A reissued tender (same `lineage_id`, or the same filename apart from version/addendum markers)
+    is re-drafted incrementally: only sections that changed since the previous version are regenerated.
     """
     try:
         print(f"Received draft request for file: {file.filename}")
         
-        if not file.filename.endswith('.docx'):
-            raise HTTPException(status_code=400, detail="Input file must be a .docx document for drafting")
+        is_matrix = file.filename.lower().endswith('.xlsx')
+        if not (file.filename.endswith('.docx') or is_matrix):
+            raise HTTPException(
+                status_code=400,
+                detail="Input file must be a .docx document or an .xlsx response matrix for drafting"
+            )
 
         # 1. Save input file
-        input_path = f"temp_{file.filename}"
+        with trace("upload_ingest"):
+            data = await file.read()
+        key = content_key("draft", data, file.filename, (company_url or "").strip(), upload_to_drive, lineage_id)
+        input_path = f"temp_{key[:12]}_{file.filename}"
         output_filename = f"Draft_{file.filename}"
-        output_path = f"temp_{output_filename}"
-        
-        with open(input_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
+        output_path = f"temp_{key[:12]}_{output_filename}"
+        drive_target = drive_client if DRIVE_AVAILABLE and upload_to_drive else None
+        background_upload = settings.UPLOAD_QUEUE_ENABLED and drive_target is not None
 
-        # 2. Extract real text from document
-        rfp_content = extract_text_from_file(input_path)
-        
-        # 3. Generate Draft Content using real RFP context
-        draft_text = drafter.draft_response(rfp_content, company_url=company_url)
+        async def queue_upload(results):
+            # The pipeline skipped its upload stage; send the stored draft to Drive off the response path
+            if not background_upload or not results.get("download"):
+                return
+            path = results["download"].path
+            job = await run_in_threadpool(upload_queue.submit, drive_target, path, output_filename)
+            if job is None:
+                # Queue full: upload inline rather than drop the upload
+                results["upload"] = await run_in_threadpool(upload_draft, drive_target, path, output_filename)
+            results["upload_job"] = job
+
+        async def run_matrix():
+            with open(input_path, "wb") as buffer:
+                buffer.write(data)
+            # Answer every question row of the response matrix and write the answers back
+            pipeline = build_matrix_pipeline(
+                drafter,
+                ComplianceMatrixResponder(drafter.llm),
+                None if background_upload else drive_target,
+                input_path,
+                output_path,
+                output_filename,
+                company_url=company_url,
+            )
+            results = await run_in_threadpool(pipeline.run)
+            if results["fill"]:
+                results["matrix"] = results["fill"]
+                results["download"] = generated_files.put(output_path, output_filename)
+                await queue_upload(results)
+            return results
+
+        async def run_draft():
+            artifacts = await run_in_threadpool(load_document_artifacts, file.filename, data)
+            with open(input_path, "wb") as buffer:
+                buffer.write(data)
+            lineage = None
+            if settings.LINEAGE_ENABLED:
+                lineage = await run_in_threadpool(DraftLineage, lineage_key(file.filename, lineage_id))
+
+            # 2-5. Gather context once, fill placeholders and upload.
+            # Independent stages (scrape, corpus load, placeholder discovery) run concurrently.
+            pipeline = build_draft_pipeline(
+                drafter,
+                None if background_upload else drive_target,
+                input_path,
+                output_path,
+                output_filename,
+                company_url=company_url,
+                placeholders=artifacts.placeholders,
+                lineage=lineage,
+            )
+            results = await run_in_threadpool(pipeline.run)
+            artifact_store.update(artifacts.doc_hash, placeholders=results["placeholders"])
+            if lineage is not None and results["fill"]:
+                results["redraft"] = await run_in_threadpool(lineage.commit, artifacts.doc_hash, file.filename)
+            if results["fill"]:
+                results["download"] = generated_files.put(results["fill"], output_filename)
+                await queue_upload(results)
+            return results
+
+        # Identical concurrent uploads await the same draft instead of regenerating it
+        results = await request_flight.do_async(key, run_matrix if is_matrix else run_draft)
+        drive_response = results["upload"]
         
-        # 4. Modify Document (fill placeholders)
-        final_doc_path = drafter.generate_draft_document(draft_text, input_path, output_path, company_url=company_url)
+        # Add cleanup to background tasks
+        background_tasks.add_task(cleanup_files, [input_path])
         
-        if not final_doc_path:
+        if not results["fill"]:
+            if is_matrix:
+                raise HTTPException(
+                    status_code=500,
+                    detail="Failed to answer the response matrix. Ensure the workbook has a question or requirement column"
+                )
             raise HTTPException(status_code=500, detail="Failed to generate draft document. Ensure file is a valid .docx")
         
-        # 5. Upload to Google Drive and Return Link
-        drive_response = None
-        if drive_client and DRIVE_AVAILABLE:
-            try:
-                drive_response = drive_client.upload_file(final_doc_path, filename=output_filename)
-                print(f"Uploaded to Drive: {drive_response}")
-            except Exception as e:
-                print(f"Failed to upload to drive: {e}")
+        download = results["download"]
+        download_info = {
+            "download_id": download.id,
+            "download_url": f"/download/{download.id}",
+            "download_expires_in": settings.GENERATED_FILE_TTL_SECONDS,
+        }
+        if is_matrix:
+            download_info["matrix"] = results["matrix"]
+        if results.get("redraft"):
+            download_info["redraft"] = results["redraft"]
+        if results["sources"][1]:
+            download_info["source_dedup"] = results["sources"][1]
         
-        # Add cleanup to background tasks
-        background_tasks.add_task(cleanup_files, [input_path, final_doc_path])
-        
-        if drive_response:
+        upload_job = results.get("upload_job")
+        if upload_job:
+            return {
+                "message": "Draft generated; uploading to Google Drive in the background",
+                "drive_url": None,
+                "filename": output_filename,
+                "upload_job_id": upload_job["job_id"],
+                "upload_status_url": f"/uploads/{upload_job['job_id']}",
+                **download_info
+            }
+        elif drive_response and not drive_response.get("error"):
             return {
                 "message": "Draft generated and uploaded to Google Drive successfully",
                 "file_id": drive_response.get('id'),
                 "drive_url": drive_response.get('url'),
-                "filename": drive_response.get('name')
+                "filename": drive_response.get('name'),
+                **download_info
+            }
+        elif not upload_to_drive:
+            return {
+                "message": "Draft generated (Google Drive upload skipped)",
+                "drive_url": None,
+                "filename": output_filename,
+                **download_info
             }
         else:
-            # Fallback if drive upload fails
-            error_msg = getattr(drive_client, 'error_message', 'Drive upload failed or not configured')
+            # Fallback if drive upload fails - the draft is still downloadable directly.
+            # With no upload error, no upload was attempted: report why the client is unavailable.
+            error_msg = (
+                (drive_response or {}).get("error")
+                or getattr(drive_client, 'error_message', None)
+                or 'Drive upload failed or not configured'
+            )
             return {
                 "message": f"Draft generated but Google Drive upload failed: {error_msg}",
                 "drive_url": None,
                 "filename": output_filename,
-                "error": error_msg
+                "error": error_msg,
+                **download_info
             }
 
     except HTTPException as he:
@@ -199,6 +669,62 @@ async def draft_response(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get("/uploads/{job_id}")
+def upload_status(job_id: str):
+    """Status of a background Drive upload: queued, uploading, done (with drive_url) or failed (with error)"""
+    job = upload_queue.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Upload job not found or expired")
+    return job
+
+
+@app.get("/download/{download_id}")
+def download_generated_file(download_id: str, request: Request):
+    """
+    Stream a generated draft. Supports ETag/If-None-Match and single byte Range requests
+    so interrupted downloads can resume without regenerating the draft.
+    """
+    entry = generated_files.get(download_id)
+    if not entry or not os.path.exists(entry.path):
+        raise HTTPException(status_code=404, detail="Download not found or expired")
+
+    headers = {
+        "ETag": entry.etag,
+        "Accept-Ranges": "bytes",
+        "Content-Disposition": f'attachment; filename="{entry.filename}"',
+    }
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and entry.etag in [tag.strip() for tag in if_none_match.split(",")]:
+        return Response(status_code=304, headers=headers)
+
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if if_range and if_range.strip() != entry.etag:
+        # Representation changed since the client's partial download; send it whole
+        range_header = None
+
+    try:
+        byte_range = parse_range(range_header, entry.size)
+    except ValueError:
+        return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{entry.size}"})
+
+    if byte_range is None:
+        start, end, status_code = 0, entry.size - 1, 200
+    else:
+        start, end = byte_range
+        status_code = 206
+        headers["Content-Range"] = f"bytes {start}-{end}/{entry.size}"
+    headers["Content-Length"] = str(end - start + 1 if entry.size else 0)
+
+    return StreamingResponse(
+        iter_file(entry.path, start, end),
+        status_code=status_code,
+        media_type=entry.media_type,
+        headers=headers,
+    )
+
+
 @app.post("/questions")
 async def generate_questions(
     file: UploadFile = File(...),
@@ -206,10 +732,18 @@ async def generate_questions(
 ):
     """
     Generate questions using company capabilities context.
+    Reuses text and requirements already extracted for this document by /assess or /draft.
     """
     try:
-        rfp_content_preview = "Sample RFP content extracted from file..."
-        questions = q_gen.generate_questions(rfp_content_preview, company_url=company_url)
+        with trace("upload_ingest"):
+            data = await file.read()
+        artifacts = await run_in_threadpool(load_document_artifacts, file.filename, data)
+        questions = await run_in_threadpool(
+            q_gen.generate_questions,
+            artifacts.text,
+            company_url=company_url,
+            requirements=artifacts.requirements,
+        )
         return {"questions": questions}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -0,0 +1,209 @@
+import asyncio
+import itertools
+import json
+import logging
+import math
+import time
+from .telemetry import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+ADMISSION_ACTIVE = REGISTRY.gauge(
+    "rfp_admission_active", "Requests currently admitted per endpoint class", ("endpoint",))
+ADMISSION_QUEUE_DEPTH = REGISTRY.gauge(
+    "rfp_admission_queue_depth", "Requests waiting for admission per endpoint class", ("endpoint",))
+ADMISSION_WAIT_SECONDS = REGISTRY.histogram(
+    "rfp_admission_wait_seconds", "Time requests spent queued before admission", ("endpoint",))
+ADMISSION_REJECTED = REGISTRY.counter(
+    "rfp_admission_rejected_total", "Requests shed with a 429", ("endpoint", "reason"))
+
+
+class EndpointClass:
+    def __init__(self, name: str, limit: int, priority: int):
+        """
+        A group of endpoints sharing a concurrency limit. Lower `priority` is admitted
+        first, so quick endpoints overtake long-running ones in the queue.
+        """
+        self.name = name
+        self.limit = max(1, limit)
+        self.priority = priority
+        self.active = 0
+        self.queued = 0
+        self.mean_seconds = None  # moving average of admitted request durations
+
+    def record_duration(self, seconds: float):
+        if self.mean_seconds is None:
+            self.mean_seconds = seconds
+        else:
+            self.mean_seconds = 0.8 * self.mean_seconds + 0.2 * seconds
+
+
+class AdmissionRejected(Exception):
+    def __init__(self, endpoint: str, reason: str, retry_after: int):
+        super().__init__(f"{endpoint} request rejected ({reason})")
+        self.endpoint = endpoint
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    def __init__(self, classes: list, routes: dict, max_active: int, max_queue: int,
+                 max_wait_seconds: float, default_retry_after: int = 5):
+        """
+        Per-endpoint concurrency limits in front of the app, plus a global limit on
+        admitted requests. Requests over either limit wait in one bounded queue ordered
+        by class priority; when the queue is full (and the newcomer cannot displace a
+        lower-priority waiter), or a request waits longer than `max_wait_seconds`, it is
+        rejected with a Retry-After estimate.
+        `routes` maps (method, path) to a class name; unlisted routes are never queued.
+        """
+        self.classes = {c.name: c for c in classes}
+        self.routes = routes
+        self.max_active = max(1, max_active)
+        self.max_queue = max_queue
+        self.max_wait_seconds = max_wait_seconds
+        self.default_retry_after = default_retry_after
+        self.active = 0
+        self._waiters = []  # [(priority, seq, class, future)]
+        self._seq = itertools.count()
+
+    def classify(self, method: str, path: str):
+        name = self.routes.get((method, path.rstrip("/") or "/"))
+        return self.classes.get(name) if name else None
+
+    def _has_capacity(self, endpoint: EndpointClass) -> bool:
+        return self.active < self.max_active and endpoint.active < endpoint.limit
+
+    def _admit(self, endpoint: EndpointClass):
+        self.active += 1
+        endpoint.active += 1
+        ADMISSION_ACTIVE.set(endpoint.active, endpoint=endpoint.name)
+
+    def retry_after(self, endpoint: EndpointClass) -> int:
+        """Seconds until a slot is likely to free up for this class, from its recent durations."""
+        if endpoint.mean_seconds is None:
+            return self.default_retry_after
+        estimate = endpoint.mean_seconds * (endpoint.queued + 1) / endpoint.limit
+        return min(300, max(1, math.ceil(estimate)))
+
+    def _reject(self, endpoint: EndpointClass, reason: str):
+        ADMISSION_REJECTED.inc(endpoint=endpoint.name, reason=reason)
+        logger.warning(f"Shedding {endpoint.name} request ({reason}): {self.active} active, {len(self._waiters)} queued")
+        return AdmissionRejected(endpoint.name, reason, self.retry_after(endpoint))
+
+    async def acquire(self, endpoint: EndpointClass):
+        """Wait for a slot. Raises AdmissionRejected when the request is shed."""
+        if len(self._waiters) >= self.max_queue and not self._has_capacity(endpoint):
+            lowest = self._waiters[-1] if self._waiters else None
+            if lowest is None or lowest[0] <= endpoint.priority:
+                raise self._reject(endpoint, "queue_full")
+            # A quicker request displaces the most recently queued long-running one
+            self._waiters.remove(lowest)
+            self._dequeued(lowest[2])
+            lowest[3].set_exception(self._reject(lowest[2], "displaced"))
+
+        future = asyncio.get_running_loop().create_future()
+        waiter = (endpoint.priority, next(self._seq), endpoint, future)
+        self._waiters.append(waiter)
+        self._waiters.sort(key=lambda w: w[:2])
+        endpoint.queued += 1
+        ADMISSION_QUEUE_DEPTH.set(endpoint.queued, endpoint=endpoint.name)
+        self._dispatch()
+        if future.done():
+            ADMISSION_WAIT_SECONDS.observe(0.0, endpoint=endpoint.name)
+            return
+
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(asyncio.shield(future), timeout=self.max_wait_seconds)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if future.done() and not future.cancelled():
+                # Admitted just as we gave up: hand the slot back
+                self.release(endpoint)
+            else:
+                future.cancel()
+                self._waiters.remove(waiter)
+                self._dequeued(endpoint)
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            raise self._reject(endpoint, "wait_timeout")
+        ADMISSION_WAIT_SECONDS.observe(time.perf_counter() - started, endpoint=endpoint.name)
+
+    def _dequeued(self, endpoint: EndpointClass):
+        endpoint.queued -= 1
+        ADMISSION_QUEUE_DEPTH.set(endpoint.queued, endpoint=endpoint.name)
+
+    def release(self, endpoint: EndpointClass, seconds: float = None):
+        self.active -= 1
+        endpoint.active -= 1
+        ADMISSION_ACTIVE.set(endpoint.active, endpoint=endpoint.name)
+        if seconds is not None:
+            endpoint.record_duration(seconds)
+        self._dispatch()
+
+    def _dispatch(self):
+        """Admit queued requests in priority order while capacity allows."""
+        for waiter in list(self._waiters):
+            if self.active >= self.max_active:
+                return
+            endpoint, future = waiter[2], waiter[3]
+            if endpoint.active < endpoint.limit:
+                self._waiters.remove(waiter)
+                self._dequeued(endpoint)
+                self._admit(endpoint)
+                future.set_result(None)
+
+    def status(self) -> dict:
+        return {
+            "active": self.active,
+            "max_active": self.max_active,
+            "queued": len(self._waiters),
+            "max_queue": self.max_queue,
+            "endpoints": {
+                c.name: {"active": c.active, "limit": c.limit, "queued": c.queued, "priority": c.priority,
+                         "mean_seconds": round(c.mean_seconds, 3) if c.mean_seconds is not None else None}
+                for c in self.classes.values()
+            },
+        }
+
+
+class AdmissionMiddleware:
+    def __init__(self, app, controller: AdmissionController):
+        """
+        ASGI middleware rather than BaseHTTPMiddleware so the slot is held until the
+        response body has been sent: streaming endpoints do their work while streaming.
+        """
+        self.app = app
+        self.controller = controller
+
+    async def __call__(self, scope, receive, send):
+        endpoint = None
+        if scope["type"] == "http":
+            endpoint = self.controller.classify(scope["method"], scope["path"])
+        if endpoint is None:
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            await self.controller.acquire(endpoint)
+        except AdmissionRejected as e:
+            body = json.dumps({
+                "detail": f"Server busy: too many {e.endpoint} requests in progress. Retry in {e.retry_after}s.",
+            }).encode("utf-8")
+            await send({
+                "type": "http.response.start",
+                "status": 429,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode()),
+                    (b"retry-after", str(e.retry_after).encode()),
+                ],
+            })
+            await send({"type": "http.response.body", "body": body})
+            return
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.controller.release(endpoint, time.perf_counter() - started)
@@ -0,0 +1,151 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+from config import settings
+from .corpus_store import content_bytes
+from .telemetry import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+MEMO_LOOKUPS = REGISTRY.counter(
+    "rfp_answer_memo_lookups_total", "Placeholder answer memo lookups", ("result",))
+
+
+def normalize_text(text: str) -> str:
+    """Case-, whitespace- and edge-punctuation-insensitive form used in memo keys."""
+    text = re.sub(r'\s+', ' ', (text or '').casefold()).strip()
+    return text.strip(' :;,.-[]()')
+
+
+def corpus_version(source_documents: list, website_content: str = "") -> str:
+    """
+    Fingerprint of the context an answer was drawn from. Documents with a modified time
+    contribute (id, modified); others (crawled pages) contribute a hash of their content.
+    """
+    digest = hashlib.sha256()
+    entries = []
+    for doc in source_documents or []:
+        stamp = doc.get('modified') or hashlib.sha256(content_bytes(doc)).hexdigest()
+        entries.append(f"{doc['id']}\0{stamp}")
+    for entry in sorted(entries):
+        digest.update(entry.encode('utf-8'))
+        digest.update(b"\n")
+    digest.update(hashlib.sha256((website_content or '').encode('utf-8')).digest())
+    return digest.hexdigest()
+
+
+def is_confirmed_answer(value) -> bool:
+    """Real answers only: fallbacks and errors are bracketed ("[Information not available ...]")."""
+    if not isinstance(value, str):
+        return False
+    value = value.strip()
+    return bool(value) and not (value.startswith('[') and value.endswith(']'))
+
+
+class AnswerMemo:
+    def __init__(self, directory: str = None, max_entries: int = None):
+        """
+        Placeholder answers on disk keyed by (normalized placeholder, normalized context,
+        corpus version). A change to any source document changes the corpus version, so
+        stale answers are never served; they age out when the store is pruned.
+        """
+        self.directory = directory or os.path.join(tempfile.gettempdir(), "rfp_answer_memo")
+        self.max_entries = max_entries or settings.ANSWER_MEMO_MAX_ENTRIES
+        os.makedirs(self.directory, exist_ok=True)
+        self._writes = 0
+        self._lock = threading.Lock()
+
+    def _path(self, placeholder: str, context: str, version: str) -> str:
+        key = f"{normalize_text(placeholder)}\0{normalize_text(context)}\0{version}"
+        return os.path.join(self.directory, hashlib.sha256(key.encode('utf-8')).hexdigest() + ".json")
+
+    def get(self, placeholder: str, context: str, version: str):
+        try:
+            with open(self._path(placeholder, context, version), encoding='utf-8') as f:
+                answer = json.load(f)["answer"]
+        except (FileNotFoundError, ValueError, KeyError):
+            MEMO_LOOKUPS.inc(result="miss")
+            return None
+        MEMO_LOOKUPS.inc(result="hit")
+        return answer
+
+    def put(self, placeholder: str, context: str, version: str, answer: str):
+        if not is_confirmed_answer(answer):
+            return
+        path = self._path(placeholder, context, version)
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding='utf-8') as f:
+                json.dump({"placeholder": placeholder, "context": context, "answer": answer,
+                           "version": version, "stored": time.time()}, f)
+            os.replace(temp_path, path)
+        except OSError as e:
+            logger.warning(f"Could not store memoized answer for '{placeholder}': {e}")
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            return
+        with self._lock:
+            self._writes += 1
+            due = self._writes % 500 == 0
+        if due:
+            self.prune()
+
+    def lookup(self, placeholders, contexts: dict, version: str) -> dict:
+        """Memoized answers for whichever placeholders have one."""
+        found = {}
+        for placeholder in placeholders:
+            answer = self.get(placeholder, contexts.get(placeholder, ''), version)
+            if answer is not None:
+                found[placeholder] = answer
+        return found
+
+    def store(self, answers: dict, contexts: dict, version: str):
+        for placeholder, answer in answers.items():
+            self.put(placeholder, contexts.get(placeholder, ''), version, answer)
+
+    def clear(self):
+        for name in os.listdir(self.directory):
+            if name.endswith(".json"):
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                except OSError:
+                    pass
+
+    def prune(self):
+        """Drop the oldest entries beyond max_entries (entries for old corpus versions go first)."""
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.endswith(".json"):
+                path = os.path.join(self.directory, name)
+                try:
+                    entries.append((os.path.getmtime(path), path))
+                except OSError:
+                    pass
+        if len(entries) <= self.max_entries:
+            return
+        entries.sort()
+        for _, path in entries[:len(entries) - self.max_entries]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+_memo = None
+_memo_lock = threading.Lock()
+
+
+def get_answer_memo():
+    """The process-wide memo, or None when ANSWER_MEMO_ENABLED is off."""
+    global _memo
+    if not settings.ANSWER_MEMO_ENABLED:
+        return None
+    with _memo_lock:
+        if _memo is None:
+            _memo = AnswerMemo(settings.ANSWER_MEMO_DIR)
+        return _memo
@@ -0,0 +1,159 @@
+from collections import OrderedDict
+import logging
+import re
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Numbered clauses ("1.", "2.3 Scope", "Section 4") or short ALL CAPS lines
+HEADING_PATTERN = re.compile(r'^(?:(?:section|part|schedule)\s+)?\d+(?:\.\d+)*[.)]?\s+\S.{0,100}$', re.IGNORECASE)
+REQUIREMENT_PATTERN = re.compile(r'\b(?:must|shall|is required to|are required to|mandatory)\b', re.IGNORECASE)
+
+
+def is_heading(line: str) -> bool:
+    """True for a stripped line that looks like a section heading."""
+    if not line or len(line) > 120:
+        return False
+    is_numbered = HEADING_PATTERN.match(line)
+    is_caps = len(line) > 3 and line.isupper() and any(c.isalpha() for c in line)
+    return bool(is_numbered or is_caps)
+
+
+def extract_outline(text: str, limit: int = 200) -> list:
+    """
+    Build a lightweight structural outline of an RFP from its plain text.
+    Returns a list of {"title", "line"} dicts in document order.
+    """
+    outline = []
+    for line_number, raw_line in enumerate(text.splitlines()):
+        line = raw_line.strip()
+        if is_heading(line):
+            outline.append({"title": line, "line": line_number})
+            if len(outline) >= limit:
+                break
+    return outline
+
+
+def split_sections(text: str, max_chars: int) -> list:
+    """
+    Split RFP text into chunks of at most max_chars, breaking at section headings
+    where possible. Small sections are packed together; oversized sections are cut
+    at line boundaries. Returns a list of {"title", "start", "text"} dicts.
+    """
+    sections = []
+    title, start, lines = "Preamble", 0, []
+    offset = 0
+    for raw_line in text.splitlines(keepends=True):
+        stripped = raw_line.strip()
+        if is_heading(stripped) and any(l.strip() for l in lines):
+            sections.append((title, start, "".join(lines)))
+            title, start, lines = stripped, offset, []
+        elif is_heading(stripped) and not lines:
+            title = stripped
+        lines.append(raw_line)
+        offset += len(raw_line)
+    if lines:
+        sections.append((title, start, "".join(lines)))
+
+    chunks = []
+    current = None
+
+    def flush():
+        nonlocal current
+        if current and current["text"].strip():
+            chunks.append(current)
+        current = None
+
+    for title, start, body in sections:
+        if len(body) > max_chars:
+            flush()
+            piece_start = 0
+            while piece_start < len(body):
+                piece_end = min(len(body), piece_start + max_chars)
+                if piece_end < len(body):
+                    newline = body.rfind("\n", piece_start, piece_end)
+                    if newline > piece_start:
+                        piece_end = newline + 1
+                suffix = "" if piece_start == 0 else " (cont.)"
+                chunks.append({"title": title + suffix, "start": start + piece_start,
+                               "text": body[piece_start:piece_end]})
+                piece_start = piece_end
+        elif current and len(current["text"]) + len(body) <= max_chars:
+            current["text"] += body
+        else:
+            flush()
+            current = {"title": title, "start": start, "text": body}
+    flush()
+    return chunks
+
+
+def extract_requirements(text: str, limit: int = 300) -> list:
+    """
+    Pull out sentences that state obligations ("must", "shall", "mandatory").
+    """
+    requirements = []
+    for sentence in re.split(r'(?<=[.;!?])\s+|\n+', text):
+        sentence = sentence.strip()
+        if 15 <= len(sentence) <= 600 and REQUIREMENT_PATTERN.search(sentence):
+            requirements.append(sentence)
+            if len(requirements) >= limit:
+                break
+    return requirements
+
+
+class DocumentArtifacts:
+    def __init__(self, doc_hash: str, filename: str, text: str):
+        """
+        Everything derived from one uploaded RFP, keyed by its content hash.
+        `analysis` and `placeholders` are filled in by whichever endpoint computes them first.
+        """
+        self.doc_hash = doc_hash
+        self.filename = filename
+        self.text = text
+        self.outline = extract_outline(text)
+        self.requirements = extract_requirements(text)
+        self.analysis = None
+        self.placeholders = None
+        self.created = time.time()
+
+
+class DocumentArtifactStore:
+    def __init__(self, max_entries: int = 64):
+        """
+        In-memory LRU of DocumentArtifacts shared by /assess, /draft and /questions.
+        """
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, doc_hash: str):
+        with self._lock:
+            artifacts = self._entries.get(doc_hash)
+            if artifacts is not None:
+                self._entries.move_to_end(doc_hash)
+            return artifacts
+
+    def put(self, doc_hash: str, filename: str, text: str) -> DocumentArtifacts:
+        artifacts = DocumentArtifacts(doc_hash, filename, text)
+        with self._lock:
+            self._entries[doc_hash] = artifacts
+            self._entries.move_to_end(doc_hash)
+            while len(self._entries) > self.max_entries:
+                evicted, _ = self._entries.popitem(last=False)
+                logger.info(f"Evicted document artifacts {evicted[:12]}")
+        logger.info(
+            f"Cached artifacts for '{filename}' ({doc_hash[:12]}): {len(text)} chars, "
+            f"{len(artifacts.outline)} headings, {len(artifacts.requirements)} requirements"
+        )
+        return artifacts
+
+    def update(self, doc_hash: str, **fields):
+        """Attach derived results (e.g. analysis, placeholders) to cached artifacts."""
+        with self._lock:
+            artifacts = self._entries.get(doc_hash)
+            if artifacts is None:
+                return None
+            for name, value in fields.items():
+                setattr(artifacts, name, value)
+            return artifacts
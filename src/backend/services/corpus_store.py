@@ -0,0 +1,298 @@
+from collections.abc import Mapping
+import hashlib
+import json
+import logging
+import mmap
+import os
+import re
+import struct
+import tempfile
+import threading
+import time
+from config import settings
+from .single_flight import SingleFlight
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# File layout: header, fixed-size offsets index, JSON metadata, UTF-8 content blob.
+#   magic(8) | count u32 | meta_len u32 | count x (offset u64, length u64) | meta JSON | blob
+MAGIC = b"RFPCORP1"
+HEADER = struct.Struct("<8sII")
+INDEX_ENTRY = struct.Struct("<QQ")
+CURRENT_FILE = "CURRENT"
+
+_sync_flight = SingleFlight("corpus-sync")
+
+
+class MappedDocument(Mapping):
+    """
+    A source document backed by the shared corpus file. Behaves like the
+    {"id", "name", "content", "modified"} dicts the Drive client used to return,
+    but `content` is decoded from the memory map on access rather than held in memory.
+    """
+    __slots__ = ("_reader", "_index", "_meta")
+
+    def __init__(self, reader, index: int, meta: dict):
+        self._reader = reader
+        self._index = index
+        self._meta = meta
+
+    def __getitem__(self, key):
+        if key == "content":
+            return str(self.content_bytes(), "utf-8")
+        return self._meta[key]
+
+    def __iter__(self):
+        yield from ("id", "name", "content", "modified")
+
+    def __len__(self):
+        return 4
+
+    def content_bytes(self) -> memoryview:
+        """Zero-copy view of the UTF-8 content in the memory map."""
+        return self._reader.content_view(self._index)
+
+    @property
+    def content_length(self) -> int:
+        return self._reader.content_length(self._index)
+
+    def __repr__(self):
+        return f"MappedDocument({self._meta.get('name')!r}, {self.content_length} bytes)"
+
+
+def content_bytes(doc) -> bytes:
+    """UTF-8 content of a source document, read straight from the memory map when it is mapped."""
+    if isinstance(doc, MappedDocument):
+        return doc.content_bytes()
+    return doc["content"].encode("utf-8")
+
+
+class CorpusReader:
+    def __init__(self, path: str):
+        """Read-only memory map of one corpus version; pages are shared by every process mapping it."""
+        self.path = path
+        self.version = os.path.basename(path)
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, count, meta_len = HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a corpus file")
+        index_start = HEADER.size
+        meta_start = index_start + count * INDEX_ENTRY.size
+        self._blob_start = meta_start + meta_len
+        self._index = [INDEX_ENTRY.unpack_from(self._mmap, index_start + i * INDEX_ENTRY.size) for i in range(count)]
+        meta = json.loads(bytes(self._mmap[meta_start:self._blob_start]))
+        self.synced_at = meta["synced_at"]
+        self.digest = meta["digest"]
+        self._documents = [MappedDocument(self, i, doc) for i, doc in enumerate(meta["documents"])]
+
+    def content_view(self, index: int) -> memoryview:
+        offset, length = self._index[index]
+        start = self._blob_start + offset
+        return memoryview(self._mmap)[start:start + length]
+
+    def content_length(self, index: int) -> int:
+        return self._index[index][1]
+
+    def documents(self) -> list:
+        return list(self._documents)
+
+
+def corpus_digest(documents: list) -> str:
+    digest = hashlib.sha256()
+    for doc in documents:
+        for field in ("id", "name", "modified", "content"):
+            value = str(doc.get(field, "")).encode("utf-8")
+            digest.update(len(value).to_bytes(8, "little"))
+            digest.update(value)
+    return digest.hexdigest()
+
+
+def write_corpus(directory: str, documents: list) -> str:
+    """Write documents as a new corpus version file and return its path (not yet made current)."""
+    digest = corpus_digest(documents)
+    blobs = [doc["content"].encode("utf-8") for doc in documents]
+    meta = json.dumps({
+        "synced_at": time.time(),
+        "digest": digest,
+        "documents": [
+            {"id": doc["id"], "name": doc["name"], "modified": doc.get("modified", "")}
+            for doc in documents
+        ],
+    }).encode("utf-8")
+
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".corpus-", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(HEADER.pack(MAGIC, len(blobs), len(meta)))
+            offset = 0
+            for blob in blobs:
+                f.write(INDEX_ENTRY.pack(offset, len(blob)))
+                offset += len(blob)
+            f.write(meta)
+            for blob in blobs:
+                f.write(blob)
+            f.flush()
+            os.fsync(f.fileno())
+        path = os.path.join(directory, f"corpus-{int(time.time() * 1000)}-{digest[:12]}.bin")
+        os.replace(temp_path, path)
+        return path
+    except Exception:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+class CorpusStore:
+    def __init__(self, directory: str = None, sync_interval: int = None, keep_versions: int = None):
+        """
+        Versioned on-disk corpus shared by every worker process. A sync writes a new
+        version file and atomically repoints CURRENT at it; readers remap when CURRENT
+        changes. Old versions stay readable until they are pruned, and pruning only
+        unlinks files, so processes that still map them are unaffected.
+        """
+        self.directory = directory or os.path.join(tempfile.gettempdir(), "rfp_corpus")
+        self.sync_interval = sync_interval if sync_interval is not None else settings.CORPUS_SYNC_INTERVAL_SECONDS
+        self.keep_versions = keep_versions or settings.CORPUS_KEEP_VERSIONS
+        os.makedirs(self.directory, exist_ok=True)
+        self._reader = None
+        self._lock = threading.Lock()
+
+    def _current_name(self):
+        try:
+            with open(os.path.join(self.directory, CURRENT_FILE)) as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def current(self):
+        """The reader for the current version (remapped if another process swapped it), or None."""
+        name = self._current_name()
+        if not name:
+            return None
+        with self._lock:
+            if self._reader is None or self._reader.version != name:
+                try:
+                    self._reader = CorpusReader(os.path.join(self.directory, name))
+                    logger.info(f"Mapped corpus version {name} ({len(self._reader.documents())} documents)")
+                except (OSError, ValueError) as e:
+                    logger.error(f"Could not map corpus version {name}: {e}")
+                    return self._reader
+            return self._reader
+
+    def is_fresh(self, reader) -> bool:
+        return reader is not None and time.time() - reader.synced_at < self.sync_interval
+
+    def publish(self, documents: list):
+        """Write `documents` as a new version and atomically make it current. Returns the current reader."""
+        path = write_corpus(self.directory, documents)
+        pointer = os.path.join(self.directory, f".{CURRENT_FILE}.tmp.{os.getpid()}")
+        with open(pointer, "w") as f:
+            f.write(os.path.basename(path))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(pointer, os.path.join(self.directory, CURRENT_FILE))
+        self._prune()
+        return self.current()
+
+    def _prune(self):
+        current = self._current_name()
+        versions = sorted(
+            (name for name in os.listdir(self.directory) if re.match(r"corpus-\d+-\w+\.bin$", name)),
+            reverse=True,
+        )
+        for name in versions[self.keep_versions:]:
+            if name != current:
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                except OSError:
+                    pass
+
+    def sync(self, load_documents, force: bool = False):
+        """
+        Load documents with `load_documents()` and publish them. One process syncs at a
+        time (file lock); others waiting on the lock pick up its result instead of refetching.
+        If the load fails or returns nothing while a non-empty version exists, that version
+        stays current; with no version to fall back on, the error propagates.
+        """
+        def run():
+            with open(os.path.join(self.directory, ".sync.lock"), "w") as lock_file:
+                if fcntl:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    reader = self.current()
+                    if not force and self.is_fresh(reader):
+                        return reader
+                    started = time.time()
+                    try:
+                        documents = load_documents()
+                    except Exception as e:
+                        if reader is None:
+                            raise
+                        logger.error(f"Corpus sync failed, keeping version {reader.version}: {e}")
+                        return reader
+                    if not documents and reader is not None and reader.documents():
+                        logger.warning(f"Corpus sync loaded no documents, keeping version {reader.version}")
+                        return reader
+                    reader = self.publish(documents)
+                    logger.info(f"Synced corpus: {len(documents)} documents in {time.time() - started:.1f}s")
+                    return reader
+                finally:
+                    if fcntl:
+                        fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+        return _sync_flight.do(self.directory, run)
+
+    def sync_in_background(self, load_documents):
+        def run():
+            try:
+                self.sync(load_documents)
+            except Exception as e:
+                logger.error(f"Background corpus sync failed: {e}")
+        threading.Thread(target=run, name="corpus-sync", daemon=True).start()
+
+    def documents(self, load_documents) -> list:
+        """
+        Current documents, syncing first if there is no version yet. A stale version is
+        served as-is while a background sync refreshes it.
+        """
+        reader = self.current()
+        if reader is None:
+            reader = self.sync(load_documents)
+        elif not self.is_fresh(reader):
+            self.sync_in_background(load_documents)
+        return reader.documents() if reader else []
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_corpus_store(source_id: str) -> CorpusStore:
+    """Process-wide store for one source folder, so every service shares the same mapping."""
+    with _stores_lock:
+        store = _stores.get(source_id)
+        if store is None:
+            base = settings.CORPUS_STORE_DIR or os.path.join(tempfile.gettempdir(), "rfp_corpus")
+            safe_id = re.sub(r"[^A-Za-z0-9_-]", "_", source_id)
+            store = _stores[source_id] = CorpusStore(os.path.join(base, safe_id))
+        return store
+
+
+if __name__ == "__main__":
+    # Sync step for a scheduled job or container start: python -m services.corpus_store
+    # Writes the store the app reads (keyed by every configured library, as load_source_documents does)
+    from services.document_source import sync_source_documents
+    from services.google_drive_client import GoogleDriveClient
+
+    logging.basicConfig(level=settings.LOG_LEVEL)
+    try:
+        reader = sync_source_documents(GoogleDriveClient())
+    except RuntimeError as e:
+        raise SystemExit(str(e))
+    print(f"Corpus version {reader.version} with {len(reader.documents())} documents in {os.path.dirname(reader.path)}")
@@ -0,0 +1,189 @@
+import hashlib
+import json
+import logging
+import re
+import struct
+from config import settings
+from .corpus_store import content_bytes
+from .draft_lineage import lineage_key
+from .extraction_cache import get_extraction_cache
+from .telemetry import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+SOURCE_DUPLICATION_RATIO = REGISTRY.gauge(
+    "rfp_source_duplication_ratio", "Share of source document characters dropped as near-duplicates in the last build")
+SOURCE_DEDUP_CHARS = REGISTRY.counter(
+    "rfp_source_dedup_chars_removed_total", "Source document characters kept out of prompts as near-duplicates")
+
+WORD_PATTERN = re.compile(r"\w+")
+# Bump when the signature format changes so cached signatures are recomputed
+SIGNATURE_VERSION = 2
+# Each 64-byte BLAKE2b digest of a shingle supplies 32 16-bit hash values; two digests fill the slots
+SLOTS = 64
+ROWS_PER_BAND = 4
+
+
+def minhash(text: str, shingle: int = 3) -> list:
+    """MinHash over word shingles: the share of equal slots estimates the texts' Jaccard similarity."""
+    words = WORD_PATTERN.findall(text.casefold())
+    shingles = {" ".join(words[i:i + shingle]) for i in range(max(1, len(words) - shingle + 1))}
+    signature = [0xFFFF] * SLOTS
+    for value in shingles:
+        data = value.encode("utf-8")
+        digest = hashlib.blake2b(data, digest_size=64, person=b"minhash-0").digest() + \
+            hashlib.blake2b(data, digest_size=64, person=b"minhash-1").digest()
+        hashes = struct.unpack(f">{SLOTS}H", digest[:SLOTS * 2])
+        signature = [min(a, b) for a, b in zip(signature, hashes)]
+    return signature
+
+
+def similarity(a: list, b: list) -> float:
+    return sum(1 for x, y in zip(a, b) if x == y) / SLOTS
+
+
+def fact_tokens(line: str) -> str:
+    """Hash of the numbers and capitalised words (names, products, acronyms) in a paragraph."""
+    facts = sorted({w for w in WORD_PATTERN.findall(line) if w[0].isupper() or any(c.isdigit() for c in w)})
+    return hashlib.sha256(" ".join(facts).encode("utf-8")).hexdigest()[:16]
+
+
+def paragraph_signatures(text: str, min_chars: int = None) -> list:
+    """
+    [exact_hash, facts_hash, minhash] per line of `text` (extracted documents hold one
+    paragraph per line); None for lines shorter than `min_chars`, which are always kept.
+    """
+    min_chars = settings.SOURCE_DEDUP_MIN_CHARS if min_chars is None else min_chars
+    signatures = []
+    for line in text.split("\n"):
+        normalized = " ".join(WORD_PATTERN.findall(line.casefold()))
+        if len(line.strip()) < min_chars or not normalized:
+            signatures.append(None)
+        else:
+            signatures.append([hashlib.sha256(normalized.encode("utf-8")).hexdigest()[:16], fact_tokens(line),
+                               minhash(normalized)])
+    return signatures
+
+
+def document_signatures(doc: dict, min_chars: int = None, text: str = None) -> list:
+    """
+    Signatures for one document version, computed once and kept in the extraction cache.
+    Pass the already-decoded content as text to avoid decoding a mapped document again.
+    """
+    min_chars = settings.SOURCE_DEDUP_MIN_CHARS if min_chars is None else min_chars
+    text = doc["content"] if text is None else text
+    content_hash = hashlib.sha256(content_bytes(doc)).hexdigest()
+    version = f"minhash-v{SIGNATURE_VERSION}:{min_chars}:{content_hash}"
+    cached = get_extraction_cache().get_or_extract(
+        "dedup", doc.get("id") or doc["name"], version,
+        lambda: json.dumps(paragraph_signatures(text, min_chars)),
+    )
+    try:
+        signatures = json.loads(cached)
+    except ValueError:
+        signatures = None
+    if not isinstance(signatures, list) or len(signatures) != text.count("\n") + 1:
+        signatures = paragraph_signatures(text, min_chars)
+    return signatures
+
+
+class NearDuplicateIndex:
+    def __init__(self, min_similarity: float):
+        """
+        Kept paragraph signatures with locality-sensitive lookup: signatures are split into
+        bands of ROWS_PER_BAND slots and only paragraphs sharing a whole band are compared,
+        which catches pairs above about 0.75 similarity with near certainty.
+
+        Exact duplicates match across all documents. Near-duplicates only match within one
+        document family (versions of the same file) and only when they mention the same
+        numbers and names, so "42 endpoints for Acme in 2023" never stands in for
+        "18 endpoints for Globex in 2021".
+        """
+        self.min_similarity = min_similarity
+        self._bands = [{} for _ in range(SLOTS // ROWS_PER_BAND)]
+        self._exact = {}
+
+    def _keys(self, family: str, facts: str, signature: list):
+        return [(family, facts) + tuple(signature[i * ROWS_PER_BAND:(i + 1) * ROWS_PER_BAND])
+                for i in range(len(self._bands))]
+
+    def find(self, family: str, exact: str, facts: str, signature: list):
+        """The owner of a kept paragraph this one duplicates, or None."""
+        if exact in self._exact:
+            return self._exact[exact]
+        for band, key in zip(self._bands, self._keys(family, facts, signature)):
+            for other, owner in band.get(key, ()):
+                if similarity(signature, other) >= self.min_similarity:
+                    return owner
+        return None
+
+    def add(self, family: str, exact: str, facts: str, signature: list, owner: str):
+        self._exact[exact] = owner
+        for band, key in zip(self._bands, self._keys(family, facts, signature)):
+            band.setdefault(key, []).append((signature, owner))
+
+
+def dedupe_documents(documents: list, min_similarity: float = None, min_chars: int = None) -> tuple:
+    """
+    Collapse duplicate paragraphs across source documents before they are put in a prompt:
+    exact repeats anywhere, and near-duplicates between versions of the same document
+    (filenames equal once version markers are stripped). Newer documents keep their text;
+    in older versions each run of duplicated paragraphs becomes a one-line pointer to the
+    document that holds it (short lines such as headings and table values are always
+    kept). Returns (documents, report) with the duplication ratio.
+    """
+    min_similarity = settings.SOURCE_DEDUP_MIN_SIMILARITY if min_similarity is None else min_similarity
+    index = NearDuplicateIndex(min_similarity)
+    chars_before = chars_after = duplicates = paragraphs = collapsed = 0
+    deduped = list(documents)
+
+    # Most recently modified first, so the current version of a statement is the one kept
+    for position in sorted(range(len(documents)), key=lambda i: documents[i].get("modified") or "", reverse=True):
+        doc = documents[position]
+        family = lineage_key(doc["name"])
+        # Decode once; mapped documents decode from the memory map on every ["content"]
+        text = doc["content"]
+        lines = text.split("\n")
+        signatures = document_signatures(doc, min_chars, text)
+        output, new_paragraphs, removed, duplicate_of = [], 0, 0, None
+        for line, signature in zip(lines, signatures):
+            owner = None
+            if signature is not None:
+                paragraphs += 1
+                owner = index.find(family, *signature)
+            if owner is None:
+                if duplicate_of:
+                    output.append(f"[Near-duplicate passage omitted; see {duplicate_of}]")
+                    duplicate_of = None
+                output.append(line)
+                if signature is not None:
+                    index.add(family, *signature, doc["name"])
+                    new_paragraphs += 1
+            else:
+                removed += 1
+                duplicate_of = duplicate_of or owner
+        if duplicate_of:
+            output.append(f"[Near-duplicate passage omitted; see {duplicate_of}]")
+        chars_before += len(text)
+        if removed:
+            duplicates += removed
+            collapsed += new_paragraphs == 0
+            text = "\n".join(output)
+            deduped[position] = {**doc, "content": text}
+        chars_after += len(text)
+
+    ratio = round(1 - chars_after / chars_before, 4) if chars_before else 0.0
+    report = {
+        "documents": len(documents),
+        "documents_collapsed": collapsed,
+        "paragraphs": paragraphs,
+        "duplicate_paragraphs": duplicates,
+        "chars_before": chars_before,
+        "chars_after": chars_after,
+        "duplication_ratio": ratio,
+    }
+    SOURCE_DUPLICATION_RATIO.set(ratio)
+    SOURCE_DEDUP_CHARS.inc(chars_before - chars_after)
+    if duplicates:
+        logger.info(f"Source dedup: {duplicates}/{paragraphs} paragraphs collapsed, ratio {ratio:.1%}")
+    return deduped, report
@@ -0,0 +1,135 @@
+from concurrent.futures import ThreadPoolExecutor
+import contextvars
+import hashlib
+import logging
+import threading
+import time
+from config import settings
+from .corpus_store import get_corpus_store
+from .single_flight import SingleFlight
+from .telemetry import trace
+
+logger = logging.getLogger(__name__)
+
+# Concurrent direct loads of the same libraries (corpus store disabled or unavailable) share one fetch
+_load_flight = SingleFlight("source-load")
+
+
+class DocumentSource:
+    """
+    A library of source documents (a Drive folder, a SharePoint document library).
+    Implementations return documents as {"id", "name", "content", "modified"} dicts.
+    """
+    source_name = "source"
+
+    @property
+    def source_id(self) -> str:
+        """Stable identifier for this library, used to key the shared corpus store."""
+        raise NotImplementedError
+
+    @property
+    def available(self) -> bool:
+        return True
+
+    def load_documents(self) -> list:
+        raise NotImplementedError
+
+
+class CompositeDocumentSource(DocumentSource):
+    source_name = "composite"
+
+    def __init__(self, sources: list):
+        """Loads several sources concurrently and concatenates their documents."""
+        self.sources = [s for s in sources if s is not None and s.available]
+
+    @property
+    def source_id(self) -> str:
+        ids = "|".join(sorted(s.source_id for s in self.sources))
+        return "corpus-" + hashlib.sha256(ids.encode("utf-8")).hexdigest()[:16]
+
+    @property
+    def available(self) -> bool:
+        return bool(self.sources)
+
+    def load_documents(self) -> list:
+        if len(self.sources) == 1:
+            return self._load(self.sources[0])
+        with ThreadPoolExecutor(max_workers=len(self.sources)) as pool:
+            futures = [pool.submit(contextvars.copy_context().run, self._load, s) for s in self.sources]
+            results = [f.result() for f in futures]
+        return [doc for documents in results for doc in documents]
+
+    def _load(self, source: DocumentSource) -> list:
+        started = time.time()
+        try:
+            documents = source.load_documents()
+        except Exception as e:
+            # Propagate, so a sync keeps the last good corpus instead of publishing a partial one
+            logger.error(f"Loading documents from {source.source_name} failed: {e}")
+            raise
+        logger.info(f"Loaded {len(documents)} documents from {source.source_name} in {time.time() - started:.1f}s")
+        return documents
+
+
+_sharepoint = None
+_sharepoint_lock = threading.Lock()
+
+
+def get_sharepoint_source():
+    """The process-wide SharePoint connector, or None when SharePoint is not configured."""
+    global _sharepoint
+    if not settings.SHAREPOINT_SYNC_ENABLED:
+        return None
+    if not (settings.SHAREPOINT_URL and settings.SHAREPOINT_CLIENT_ID
+            and settings.SHAREPOINT_CLIENT_SECRET and settings.SHAREPOINT_TENANT_ID):
+        return None
+    with _sharepoint_lock:
+        if _sharepoint is None:
+            from integrations.sharepoint import SharePointClient
+            _sharepoint = SharePointClient()
+        return _sharepoint
+
+
+def source_composite(drive_client=None, sources: list = None) -> CompositeDocumentSource:
+    """
+    Every configured library (Drive and SharePoint by default) as one source. Its
+    source_id keys the shared corpus store, for both the app and the sync step.
+    """
+    if sources is None:
+        sources = [drive_client, get_sharepoint_source()]
+    return CompositeDocumentSource(sources)
+
+
+def load_source_documents(drive_client=None, sources: list = None, raise_errors: bool = False) -> list:
+    """
+    Source documents from every configured library (Drive and SharePoint by default),
+    loaded concurrently and served from the shared corpus store. A failed load returns
+    [] unless `raise_errors` is set.
+    """
+    composite = source_composite(drive_client, sources)
+    if not composite.available:
+        logger.warning("No document sources available - cannot retrieve source documents")
+        return []
+    with trace("corpus_load"):
+        if settings.CORPUS_STORE_ENABLED:
+            try:
+                return get_corpus_store(composite.source_id).documents(composite.load_documents)
+            except Exception as e:
+                if raise_errors:
+                    raise
+                logger.error(f"Corpus store unavailable, loading sources directly: {e}")
+        try:
+            return _load_flight.do(composite.source_id, composite.load_documents)
+        except Exception as e:
+            if raise_errors:
+                raise
+            logger.error(f"Could not load source documents: {e}")
+            return []
+
+
+def sync_source_documents(drive_client=None, sources: list = None):
+    """Force a corpus store sync of the libraries load_source_documents reads. Returns the new reader."""
+    composite = source_composite(drive_client, sources)
+    if not composite.available:
+        raise RuntimeError("No document sources available - check Drive and SharePoint credentials")
+    return get_corpus_store(composite.source_id).sync(composite.load_documents, force=True)
@@ -0,0 +1,179 @@
+import difflib
+import hashlib
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+from config import settings
+from .answer_memo import is_confirmed_answer
+
+logger = logging.getLogger(__name__)
+
+# Version markers stripped from filenames so "Tender_v2 (Addendum 1).docx" shares "tender"'s lineage
+VERSION_MARKERS = re.compile(
+    r"[\s_\-.]*(\(\d+\)|v\d+(\.\d+)*|version[\s_\-]*\d+|rev(ision)?[\s_\-]*[\w\d]{1,3}|"
+    r"addend(um|a)[\s_\-]*\d*|amendment[\s_\-]*\d*|reissued?|updated?|final|draft)\b",
+    re.IGNORECASE,
+)
+
+
+def lineage_key(filename: str, lineage_id: str = None) -> str:
+    """Identify a tender across reissues: the caller's lineage_id, else the filename without version markers."""
+    if lineage_id and lineage_id.strip():
+        return "id:" + lineage_id.strip().casefold()
+    stem = os.path.splitext(os.path.basename(filename))[0]
+    previous = None
+    while previous != stem:
+        previous, stem = stem, VERSION_MARKERS.sub("", stem)
+    return "name:" + re.sub(r"[\s_\-.]+", " ", stem).strip().casefold()
+
+
+def diff_sections(previous: list, current: list) -> list:
+    """
+    Status of each current section against the previous version: "unchanged" (same text,
+    even if moved), "changed" (replaced in place) or "added". Sections are {"title", "hash"} dicts.
+    """
+    previous_hashes = [s["hash"] for s in previous]
+    current_hashes = [s["hash"] for s in current]
+    statuses = ["added"] * len(current)
+    matcher = difflib.SequenceMatcher(None, previous_hashes, current_hashes, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            statuses[j1:j2] = ["unchanged"] * (j2 - j1)
+        elif tag == "replace":
+            replaced = min(i2 - i1, j2 - j1)
+            statuses[j1:j1 + replaced] = ["changed"] * replaced
+    known = set(previous_hashes)
+    return ["unchanged" if h in known else status for h, status in zip(current_hashes, statuses)]
+
+
+class DraftLineageStore:
+    def __init__(self, directory: str = None, keep_versions: int = None):
+        """
+        The section and placeholder map of each drafted version, per tender lineage, so a
+        reissued tender (addendum) can reuse everything outside the sections that changed.
+        """
+        self.directory = directory or os.path.join(tempfile.gettempdir(), "rfp_draft_lineage")
+        self.keep_versions = keep_versions or settings.LINEAGE_KEEP_VERSIONS
+        os.makedirs(self.directory, exist_ok=True)
+        self._lock = threading.Lock()
+
+    def _lineage_dir(self, key: str) -> str:
+        return os.path.join(self.directory, hashlib.sha256(key.encode("utf-8")).hexdigest()[:24])
+
+    def _versions(self, key: str) -> list:
+        try:
+            names = os.listdir(self._lineage_dir(key))
+        except FileNotFoundError:
+            return []
+        return sorted(int(name[:-5]) for name in names if re.match(r"\d+\.json$", name))
+
+    def latest(self, key: str):
+        versions = self._versions(key)
+        if not versions:
+            return None
+        try:
+            with open(os.path.join(self._lineage_dir(key), f"{versions[-1]}.json"), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not read draft lineage for {key}: {e}")
+            return None
+
+    def save(self, key: str, record: dict) -> int:
+        """Store a new version for the lineage and return its number."""
+        directory = self._lineage_dir(key)
+        os.makedirs(directory, exist_ok=True)
+        with self._lock:
+            versions = self._versions(key)
+            version = (versions[-1] + 1) if versions else 1
+            record = {**record, "lineage": key, "version": version, "saved": time.time()}
+            fd, temp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(record, f)
+            os.replace(temp_path, os.path.join(directory, f"{version}.json"))
+            for old in versions[:max(0, len(versions) + 1 - self.keep_versions)]:
+                try:
+                    os.remove(os.path.join(directory, f"{old}.json"))
+                except OSError:
+                    pass
+        return version
+
+
+class DraftLineage:
+    def __init__(self, key: str, store: DraftLineageStore = None):
+        """
+        One /draft call's view of its tender lineage. The drafter asks it which placeholder
+        answers can be carried over from the previous version, then
+        reports what it produced; commit() records this version for the next reissue.
+        """
+        self.key = key
+        self.store = store or get_lineage_store()
+        self.previous = self.store.latest(key)
+        self.sections = []
+        self.corpus_version = None
+        self.answers = {}
+        self.summary = {"lineage": key, "previous_version": self.previous["version"] if self.previous else None}
+
+    def plan_placeholders(self, sections: list, corpus_version: str, placeholders) -> tuple:
+        """
+        Split placeholders into ones whose previous answer still holds (every section
+        containing them is unchanged and the source documents are the same) and ones to
+        regenerate. Returns ({placeholder: previous_answer}, {placeholders in changed sections}).
+        """
+        self.sections = sections
+        self.corpus_version = corpus_version
+        previous = self.previous or {}
+        statuses = diff_sections(previous.get("sections", []), sections)
+        self.summary["sections"] = {
+            status: statuses.count(status) for status in ("unchanged", "changed", "added")
+        }
+        self.summary["sections"]["removed"] = max(
+            0, len(previous.get("sections", [])) - statuses.count("unchanged") - statuses.count("changed"))
+
+        stale = set()
+        for section, status in zip(sections, statuses):
+            if status != "unchanged":
+                stale.update(section["placeholders"])
+        reusable = {}
+        if previous.get("corpus_version") == corpus_version:
+            for placeholder in placeholders:
+                answer = previous.get("answers", {}).get(placeholder)
+                if placeholder not in stale and is_confirmed_answer(answer):
+                    reusable[placeholder] = answer
+        self.summary["placeholders_reused"] = len(reusable)
+        self.summary["placeholders_regenerated"] = len(set(placeholders) - set(reusable))
+        return reusable, stale
+
+    def record_answers(self, answers: dict):
+        self.answers = {p: a for p, a in answers.items() if is_confirmed_answer(a)}
+
+    def commit(self, doc_hash: str, filename: str) -> dict:
+        """Record this version (only if the fill ran) and return the re-draft summary."""
+        if not self.sections:
+            return self.summary
+        try:
+            self.summary["version"] = self.store.save(self.key, {
+                "doc_hash": doc_hash,
+                "filename": filename,
+                "corpus_version": self.corpus_version,
+                "sections": self.sections,
+                "answers": self.answers,
+            })
+        except OSError as e:
+            logger.warning(f"Could not save draft lineage for {self.key}: {e}")
+        return self.summary
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_lineage_store() -> DraftLineageStore:
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = DraftLineageStore(settings.LINEAGE_DIR)
+        return _store
@@ -0,0 +1,180 @@
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+import contextvars
+import logging
+import time
+from .telemetry import trace
+
+logger = logging.getLogger(__name__)
+
+
+class Stage:
+    def __init__(self, name: str, fn, deps=()):
+        """
+        A single unit of work in the pipeline.
+        `fn` is called with the results of `deps` as keyword arguments.
+        """
+        self.name = name
+        self.fn = fn
+        self.deps = tuple(deps)
+
+
+class PipelineExecutor:
+    def __init__(self, max_workers: int = 4):
+        """
+        Runs a small DAG of stages, starting every stage as soon as its
+        dependencies have finished so independent work overlaps.
+        """
+        self.max_workers = max_workers
+        self.stages = {}
+
+    def add_stage(self, name: str, fn, deps=()):
+        if name in self.stages:
+            raise ValueError(f"Duplicate pipeline stage: {name}")
+        for dep in deps:
+            if dep not in self.stages:
+                raise ValueError(f"Stage '{name}' depends on unknown stage '{dep}'")
+        self.stages[name] = Stage(name, fn, deps)
+        return self
+
+    def run(self) -> dict:
+        """
+        Execute all stages and return a dict of {stage_name: result}.
+        The first stage error cancels anything not yet started and is re-raised.
+        """
+        results = {}
+        timings = {}
+        pending = dict(self.stages)
+        running = {}
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            while pending or running:
+                for name, stage in list(pending.items()):
+                    if all(dep in results for dep in stage.deps):
+                        kwargs = {dep: results[dep] for dep in stage.deps}
+                        # Copy the context so request IDs follow the stage into its thread
+                        context = contextvars.copy_context()
+                        running[pool.submit(context.run, self._run_stage, stage, kwargs, timings)] = name
+                        del pending[name]
+
+                if not running:
+                    # Deps are validated in add_stage, so this only guards against a stalled graph
+                    break
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    error = future.exception()
+                    if error:
+                        for other in running:
+                            other.cancel()
+                        logger.error(f"Pipeline stage '{name}' failed: {error}")
+                        raise error
+                    results[name] = future.result()
+
+        logger.info("Pipeline stage timings: " + ", ".join(f"{k}={v:.2f}s" for k, v in timings.items()))
+        return results
+
+    @staticmethod
+    def _run_stage(stage: Stage, kwargs: dict, timings: dict):
+        start = time.perf_counter()
+        try:
+            with trace(f"pipeline.{stage.name}"):
+                return stage.fn(**kwargs)
+        finally:
+            timings[stage.name] = time.perf_counter() - start
+
+
+def upload_draft(drive_client, path: str, filename: str) -> dict:
+    """
+    Upload a generated file to Drive. Returns the Drive file dict, or {"error": reason}
+    when the upload failed, so each request reports its own failure.
+    """
+    try:
+        drive_response = drive_client.upload_file(path, filename=filename, raise_errors=True)
+        print(f"Uploaded to Drive: {drive_response}")
+        return drive_response
+    except Exception as e:
+        print(f"Failed to upload to drive: {e}")
+        return {"error": str(e)}
+
+
+def build_draft_pipeline(drafter, drive_client, input_path: str, output_path: str,
+                         output_filename: str, company_url: str = "", placeholders: set = None,
+                         lineage=None) -> PipelineExecutor:
+    """
+    Wire up the /draft flow:
+
+        scrape ───────────────┐
+        corpus ─┐             │
+        site ───┴─> sources ──┼─> fill ─> upload
+        placeholders ─────────┘
+
+    Website content, source documents and crawled company pages are fetched
+    once for the placeholder fill, after near-duplicate source paragraphs are
+    collapsed (`sources` is (documents, dedup report)).
+    Pass `placeholders` when they are already known for this document to skip rediscovery,
+    and a `lineage` (DraftLineage) to carry over the answers of unchanged sections from
+    the previous version.
+    """
+    pipeline = PipelineExecutor(max_workers=5)
+
+    pipeline.add_stage("scrape", lambda: drafter.get_website_content(company_url))
+    pipeline.add_stage("corpus", drafter.get_source_documents)
+    pipeline.add_stage("site", lambda: drafter.get_company_pages(company_url))
+    if placeholders is not None:
+        pipeline.add_stage("placeholders", lambda: placeholders)
+    else:
+        pipeline.add_stage("placeholders", lambda: drafter.find_placeholders(input_path))
+
+    pipeline.add_stage("sources", lambda corpus, site: drafter.dedupe_sources(corpus + site), deps=("corpus", "site"))
+    pipeline.add_stage(
+        "fill",
+        lambda placeholders, scrape, sources: drafter.generate_draft_document(
+            None, input_path, output_path,
+            website_content=scrape, source_documents=sources[0], placeholders=placeholders,
+            lineage=lineage
+        ),
+        deps=("placeholders", "scrape", "sources"),
+    )
+
+    def upload(fill):
+        if not fill or not drive_client:
+            return None
+        return upload_draft(drive_client, fill, output_filename)
+
+    pipeline.add_stage("upload", upload, deps=("fill",))
+    return pipeline
+
+
+def build_matrix_pipeline(drafter, responder, drive_client, input_path: str, output_path: str,
+                          output_filename: str, company_url: str = "") -> PipelineExecutor:
+    """
+    Wire up /draft for an XLSX response matrix:
+
+        scrape ─────────────┐
+        corpus ─┬─> sources ┴─> fill ─> upload
+        site ───┘
+
+    `fill` is the responder's summary dict (None on failure); the filled workbook is at output_path.
+    """
+    pipeline = PipelineExecutor(max_workers=4)
+
+    pipeline.add_stage("scrape", lambda: drafter.get_website_content(company_url))
+    pipeline.add_stage("corpus", drafter.get_source_documents)
+    pipeline.add_stage("site", lambda: drafter.get_company_pages(company_url))
+    pipeline.add_stage("sources", lambda corpus, site: drafter.dedupe_sources(corpus + site), deps=("corpus", "site"))
+    pipeline.add_stage(
+        "fill",
+        lambda scrape, sources: responder.fill_workbook(
+            input_path, output_path, website_content=scrape, source_documents=sources[0]
+        ),
+        deps=("scrape", "sources"),
+    )
+
+    def upload(fill):
+        if not fill or not drive_client:
+            return None
+        return upload_draft(drive_client, output_path, output_filename)
+
+    pipeline.add_stage("upload", upload, deps=("fill",))
+    return pipeline
@@ -0,0 +1,114 @@
+import json
+import random
+import re
+import threading
+import time
+import zlib
+
+
+class FakeUsageMetadata:
+    def __init__(self, prompt_token_count: int, candidates_token_count: int):
+        self.prompt_token_count = prompt_token_count
+        self.candidates_token_count = candidates_token_count
+        self.total_token_count = prompt_token_count + candidates_token_count
+
+
+class FakeResponse:
+    def __init__(self, text: str, prompt: str):
+        self.text = text
+        # Roughly four characters per token, like the real tokenizer on English text
+        self.usage_metadata = FakeUsageMetadata(len(prompt) // 4, len(text) // 4)
+
+
+class FakeGenerativeModel:
+    model_name = "fake-llm"
+
+    def __init__(self, latency: float = 0.0, per_1k_chars: float = 0.0, model_name: str = None,
+                 failure_rate: float = 0.0):
+        """
+        Offline stand-in for vertexai GenerativeModel (LLM_BACKEND=fake, benchmarks).
+        Sleeps for `latency` plus `per_1k_chars` per thousand prompt characters, then
+        returns a plausible answer for the prompt shapes this service sends (scores,
+        placeholders, prose). Honours JSON mode, response_schema properties, streaming
+        and max_output_tokens, and raises on a `failure_rate` fraction of calls (midway
+        through a stream) to exercise failover and partial-output recovery.
+        """
+        self.latency = latency
+        self.per_1k_chars = per_1k_chars
+        self.failure_rate = failure_rate
+        if model_name:
+            self.model_name = model_name
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def generate_content(self, prompt, generation_config=None, safety_settings=None, stream=False):
+        with self._lock:
+            self.calls += 1
+        time.sleep(self.latency + self.per_1k_chars * len(prompt) / 1000)
+        fail = self.failure_rate and random.random() < self.failure_rate
+        if fail and not stream:
+            raise RuntimeError(f"503 {self.model_name} unavailable (simulated)")
+        config = generation_config or {}
+        text = self._answer(prompt)
+        if config.get("response_mime_type") == "application/json":
+            text = re.sub(r'^```json\s*|\s*```$', '', text.strip())
+            properties = (config.get("response_schema") or {}).get("properties")
+            if properties:
+                data = json.loads(text)
+                text = json.dumps({k: v for k, v in data.items() if k in properties})
+        if config.get("max_output_tokens"):
+            text = text[:config["max_output_tokens"] * 4]
+        if stream:
+            return self._stream(text, prompt, fail)
+        return FakeResponse(text, prompt)
+
+    def _stream(self, text: str, prompt: str, fail: bool, piece_chars: int = 64):
+        """Yield the answer in pieces, usage on the last one; a failing call breaks off halfway."""
+        pieces = [text[i:i + piece_chars] for i in range(0, len(text), piece_chars)] or [""]
+        for i, piece in enumerate(pieces):
+            if fail and i >= len(pieces) // 2:
+                raise RuntimeError(f"503 {self.model_name} stream interrupted (simulated)")
+            response = FakeResponse(piece, prompt)
+            if i == len(pieces) - 1:
+                response.usage_metadata = FakeUsageMetadata(len(prompt) // 4, len(text) // 4)
+            yield response
+
+    def _answer(self, prompt: str) -> str:
+        if '{"questions"' in prompt:
+            # Clarifying questions: one per stated requirement, or a couple of generic ones
+            stated = prompt.split("STATED REQUIREMENTS", 1)[1].split("Guidelines:", 1)[0] \
+                if "STATED REQUIREMENTS" in prompt else ""
+            requirements = re.findall(r'^\s*- (.+)$', stated, re.MULTILINE)
+            topics = [r.strip()[:60] for r in requirements[:5]] or ["the KPIs for success", "the Phase 2 timeline"]
+            return json.dumps({"questions": [
+                {"question": f"Can you clarify {topic}?", "priority": "High" if i == 0 else "Medium",
+                 "category": "Scope", "rationale": "Synthetic clarification."}
+                for i, topic in enumerate(topics)
+            ]})
+        if '"relevance"' in prompt:
+            # Map step of the long-document assessment: vary scores by excerpt
+            seed = zlib.crc32(prompt.encode("utf-8"))
+            return "```json\n" + json.dumps({
+                "relevance": seed % 100,
+                "criteria_scores": {c: 40 + (seed >> i) % 60 for i, c in
+                                    enumerate(("strategy", "offerings", "resources", "risks"))},
+                "evidence": [{"criterion": "risks", "quote": "The respondent shall maintain insurance."}],
+                "summary": "Synthetic excerpt finding.",
+            }) + "\n```"
+        if '"score"' in prompt:
+            # Gemini wraps JSON answers in a ```json fence unless JSON mode is on
+            return "```json\n" + json.dumps({
+                "score": 72,
+                "recommendation": "Pursue",
+                "criteria_scores": {"strategy": 70, "offerings": 80, "resources": 65, "risks": 72},
+                "reasoning": "Synthetic assessment.",
+            }) + "\n```"
+        if "REQUIREMENTS:" in prompt:
+            # Response matrix batch: numbered requirements
+            requirements = re.findall(r'^\s*(\d+)\. (.+)$', prompt.split("REQUIREMENTS:", 1)[1], re.MULTILINE)
+            return json.dumps({n: {"answer": f"Synthetic answer to: {q.strip()[:60]}", "compliance": "Compliant"}
+                               for n, q in requirements})
+        placeholders = re.findall(r'^\s*- (.+)$', prompt, re.MULTILINE)
+        if "Return a JSON object" in prompt and placeholders:
+            return json.dumps({p.strip(): f"Synthetic value for {p.strip()}" for p in placeholders})
+        return "Synthetic draft response. " * 50
@@ -0,0 +1,191 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+
+logger = logging.getLogger(__name__)
+
+MIME_TYPES = {
+    '.docx': 'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
+    '.xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    '.pdf': 'application/pdf',
+    '.txt': 'text/plain',
+}
+FILE_ID_PATTERN = re.compile(r"[0-9a-f]{32}")
+# How often a store looks for files that other workers' entries have left to expire
+SWEEP_SECONDS = 60
+
+
+class GeneratedFile:
+    def __init__(self, file_id: str, filename: str, path: str, size: int, etag: str, expires: float):
+        self.id = file_id
+        self.filename = filename
+        self.path = path
+        self.size = size
+        self.etag = etag
+        self.expires = expires
+
+    @property
+    def media_type(self) -> str:
+        return MIME_TYPES.get(os.path.splitext(self.filename)[1].lower(), 'application/octet-stream')
+
+    def to_dict(self) -> dict:
+        return {"filename": self.filename, "size": self.size, "etag": self.etag, "expires": self.expires}
+
+
+class GeneratedFileStore:
+    def __init__(self, directory: str = None, ttl_seconds: int = 3600, max_files: int = 200):
+        """
+        Short-lived local store for generated drafts so they can be downloaded
+        directly (and re-downloaded) without regenerating or going through Drive.
+        Files are evicted after `ttl_seconds` or when more than `max_files` are held.
+        Each file has its metadata in "<id>.json" beside it, so any worker sharing the
+        directory (GENERATED_FILE_DIR on a shared volume across hosts) can serve it.
+        """
+        self.directory = directory or os.path.join(tempfile.gettempdir(), "rfp_generated")
+        self.ttl_seconds = ttl_seconds
+        self.max_files = max_files
+        self._files = {}
+        self._lock = threading.Lock()
+        self._swept = 0.0
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _meta_path(self, file_id: str) -> str:
+        return os.path.join(self.directory, f"{file_id}.json")
+
+    def put(self, source_path: str, filename: str) -> GeneratedFile:
+        """Move a generated file into the store and return its entry."""
+        file_id = uuid.uuid4().hex
+        stored_path = os.path.join(self.directory, file_id)
+        shutil.move(source_path, stored_path)
+
+        digest = hashlib.sha256()
+        with open(stored_path, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(chunk)
+
+        entry = GeneratedFile(
+            file_id=file_id,
+            filename=filename,
+            path=stored_path,
+            size=os.path.getsize(stored_path),
+            etag=f'"{digest.hexdigest()[:32]}"',
+            expires=time.time() + self.ttl_seconds,
+        )
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(entry.to_dict(), f)
+        os.replace(temp_path, self._meta_path(file_id))
+        with self._lock:
+            self._files[file_id] = entry
+        self.evict()
+        logger.info(f"Stored generated file '{filename}' as {file_id} ({entry.size} bytes)")
+        return entry
+
+    def get(self, file_id: str):
+        """Return the entry for file_id, or None if unknown or expired (stored by any worker)."""
+        self.evict()
+        with self._lock:
+            entry = self._files.get(file_id)
+        if entry is None and FILE_ID_PATTERN.fullmatch(file_id or ""):
+            entry = self._load(file_id)
+        if entry is None or entry.expires <= time.time() or not os.path.exists(entry.path):
+            return None
+        with self._lock:
+            self._files[file_id] = entry
+        return entry
+
+    def _load(self, file_id: str):
+        try:
+            with open(self._meta_path(file_id), encoding="utf-8") as f:
+                meta = json.load(f)
+            return GeneratedFile(file_id=file_id, path=os.path.join(self.directory, file_id), **meta)
+        except (OSError, ValueError, TypeError):
+            return None
+
+    def evict(self):
+        """
+        Drop expired files, then the oldest ones beyond max_files. Every SWEEP_SECONDS the
+        whole directory is checked, covering files other workers stored.
+        """
+        now = time.time()
+        with self._lock:
+            sweep = now - self._swept >= SWEEP_SECONDS
+            if sweep:
+                self._swept = now
+            entries = dict(self._files)
+        if sweep:
+            for name in os.listdir(self.directory):
+                file_id = name[:-len(".json")]
+                if name.endswith(".json") and file_id not in entries and FILE_ID_PATTERN.fullmatch(file_id):
+                    entry = self._load(file_id)
+                    if entry is not None:
+                        entries[file_id] = entry
+
+        expired = [e for e in entries.values() if e.expires <= now]
+        live = sorted((e for e in entries.values() if e.expires > now), key=lambda e: e.expires)
+        expired += live[:max(0, len(live) - self.max_files)]
+        if not expired:
+            return
+        with self._lock:
+            for entry in expired:
+                self._files.pop(entry.id, None)
+
+        for entry in expired:
+            for path in (entry.path, self._meta_path(entry.id)):
+                try:
+                    if os.path.exists(path):
+                        os.remove(path)
+                except Exception as e:
+                    logger.error(f"Error evicting generated file {entry.id}: {e}")
+
+
+def parse_range(range_header: str, size: int):
+    """
+    Parse a single-range "bytes=start-end" header.
+    Returns (start, end) inclusive, None if the header should be ignored,
+    or raises ValueError if the range is unsatisfiable.
+    """
+    if not range_header or not range_header.startswith("bytes="):
+        return None
+    spec = range_header[len("bytes="):].strip()
+    if "," in spec:
+        # Multipart ranges are not supported; serve the full body instead
+        return None
+
+    start_text, _, end_text = spec.partition("-")
+    try:
+        if start_text == "":
+            suffix = int(end_text)
+            if suffix <= 0:
+                raise ValueError("Empty suffix range")
+            start, end = max(0, size - suffix), size - 1
+        else:
+            start = int(start_text)
+            end = int(end_text) if end_text else size - 1
+    except ValueError:
+        raise ValueError(f"Malformed range: {range_header}")
+
+    end = min(end, size - 1)
+    if start > end or start >= size:
+        raise ValueError(f"Unsatisfiable range: {range_header}")
+    return start, end
+
+
+def iter_file(path: str, start: int, end: int, chunk_size: int = 64 * 1024):
+    """Yield bytes start..end (inclusive) of a file in chunks."""
+    with open(path, "rb") as f:
+        f.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = f.read(min(chunk_size, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
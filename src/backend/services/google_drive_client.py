@@ -10,18 +10,50 @@ import io
 import os
 import json
 import tempfile
+import time
 import logging
 from services.secret_manager import get_secret
+from config import settings
+from services.document_source import DocumentSource, load_source_documents
+from services.extraction_cache import get_extraction_cache
+from services.telemetry import REGISTRY, traced
 
 logger = logging.getLogger(__name__)
 
-class GoogleDriveClient:
-    def __init__(self):
+DRIVE_UPLOAD_RETRIES = REGISTRY.counter(
+    "rfp_drive_upload_retries_total", "Resumable Drive upload chunks retried after a transient failure")
+# Drive requires resumable chunks in multiples of 256 KiB
+UPLOAD_CHUNK_UNIT = 256 * 1024
+
+
+class DriveUploadError(Exception):
+    pass
+
+
+def upload_chunk_bytes() -> int:
+    return max(1, settings.DRIVE_UPLOAD_CHUNK_BYTES // UPLOAD_CHUNK_UNIT) * UPLOAD_CHUNK_UNIT
+
+
+def _retryable_upload_error(error) -> bool:
+    """Server errors, rate limiting and dropped connections are worth resuming; other 4xx are not."""
+    status = getattr(getattr(error, "resp", None), "status", None)
+    if status is not None:
+        return int(status) in (429, 500, 502, 503, 504)
+    return isinstance(error, (ConnectionError, TimeoutError, OSError))
+
+
+class GoogleDriveClient(DocumentSource):
+    source_name = "google_drive"
+
+    def __init__(self, service=None):
         """
         Initialize Google Drive client using service account credentials.
         Expects GOOGLE_APPLICATION_CREDENTIALS environment variable to be set.
+        Pass an already-built Drive v3 `service` to skip credential loading.
         """
         self.service = None
+        self.service_account_email = None
+        self.error_message = None
         # Folder IDs - will be dynamically found or can be set via environment variables
         self.source_folder_id = os.environ.get('GOOGLE_DRIVE_SOURCE_FOLDER_ID')  # Source Information folder
         self.output_folder_id = os.environ.get('GOOGLE_DRIVE_OUTPUT_FOLDER_ID')  # RFP Output folder
@@ -29,6 +61,12 @@ class GoogleDriveClient:
         self.source_folder_name = "Source Information"
         self.output_folder_name = "RFP Output"
         
+        if service is not None:
+            self.service = service
+            if not self.source_folder_id or not self.output_folder_id:
+                self._discover_folders()
+            return
+
         if not GOOGLE_DRIVE_AVAILABLE:
             logger.info("Google Drive libraries not available - integration disabled")
             return
@@ -90,6 +128,17 @@ class GoogleDriveClient:
             self.service_account_email = None
             self.error_message = str(e)
 
+    @property
+    def source_id(self) -> str:
+        return f"drive:{self.source_folder_id}"
+
+    @property
+    def available(self) -> bool:
+        return bool(self.service and self.source_folder_id)
+
+    def load_documents(self) -> list:
+        return self._load_all_rfp_documents()
+
     def get_config_status(self):
         """Returns the current configuration status for debugging."""
         parent_id = os.environ.get('GOOGLE_DRIVE_PARENT_FOLDER_ID', '0AJriKoRrgD4nUk9PVA')
@@ -215,9 +264,11 @@ class GoogleDriveClient:
             logger.error(f"Error creating folder '{folder_name}': {e}")
             raise e
 
-    def list_files_in_folder(self, folder_id=None):
+    @traced("drive_list")
+    def list_files_in_folder(self, folder_id=None, raise_errors=False):
         """
         List all files in the specified Google Drive folder.
+        Errors return [] unless `raise_errors` is set.
         """
         if not self.service:
             logger.warning("Google Drive service not initialized")
@@ -240,6 +291,8 @@ class GoogleDriveClient:
             return files
         except Exception as e:
             logger.error(f"Error listing files from Google Drive: {e}")
+            if raise_errors:
+                raise
             return []
 
     def download_file(self, file_id, output_path):
@@ -268,6 +321,7 @@ class GoogleDriveClient:
             logger.error(f"Error downloading file {file_id}: {e}")
             return None
 
+    @traced("drive_download_parse")
     def get_file_content_as_text(self, file_id):
         """
         Download and extract text content from a file.
@@ -346,15 +400,19 @@ class GoogleDriveClient:
 
     def get_all_rfp_documents(self):
         """
-        Get all supporting documents from the Source Information folder.
-        Returns a list of dicts with file metadata and content.
+        Get all supporting documents from the Source Information folder (and any other
+        configured library), as a list of dicts with file metadata and content. Served
+        from the same shared corpus store the drafter reads and the sync step writes.
         """
         if not self.source_folder_id:
             logger.warning("Source folder ID not set - cannot retrieve documents")
             return []
-            
-        files = self.list_files_in_folder(self.source_folder_id)
+        return load_source_documents(self)
+
+    def _load_all_rfp_documents(self):
+        files = self.list_files_in_folder(self.source_folder_id, raise_errors=True)
         documents = []
+        cache = get_extraction_cache()
         
         for file in files:
             # Only process document files
@@ -364,7 +422,13 @@ class GoogleDriveClient:
                 'application/vnd.google-apps.document',
                 'application/pdf'
             ]:
-                content = self.get_file_content_as_text(file['id'])
+                # Only files whose modifiedTime changed since the last load are downloaded again.
+                # Download errors also come back as "", so empty text is not cached.
+                content = cache.get_or_extract(
+                    self.source_id, file['id'], file.get('modifiedTime', ''),
+                    lambda: self.get_file_content_as_text(file['id']),
+                    cache_empty=False
+                )
                 if content:
                     documents.append({
                         'id': file['id'],
@@ -377,17 +441,27 @@ class GoogleDriveClient:
         logger.info(f"Retrieved {len(documents)} source documents from '{self.source_folder_name}' folder")
         return documents
 
-    def upload_file(self, file_path, filename=None, folder_id=None):
+    @traced("drive_upload")
+    def upload_file(self, file_path, filename=None, folder_id=None, raise_errors=False):
         """
-        Upload a file to Google Drive RFP Output folder.
-        Returns the file ID if successful, None otherwise.
+        Upload a file to Google Drive RFP Output folder as a resumable, chunked upload:
+        a failed chunk is retried from the last offset Drive confirmed, not from the start.
+        Returns {"id", "url", "name"} if successful, None otherwise. Uploads share this
+        client across requests and threads, so the reason is not stored on it: pass
+        raise_errors to get a DriveUploadError carrying it instead.
         """
-        self.error_message = None
+        try:
+            return self._upload_file(file_path, filename, folder_id)
+        except DriveUploadError:
+            if raise_errors:
+                raise
+            return None
+
+    def _upload_file(self, file_path, filename=None, folder_id=None):
         if not self.service:
             msg = "Google Drive service not initialized - check credentials"
             logger.warning(msg)
-            self.error_message = msg
-            return None
+            raise DriveUploadError(msg)
         
         # Use output folder by default
         if not folder_id:
@@ -396,16 +470,14 @@ class GoogleDriveClient:
         if not folder_id:
             msg = "No output folder ID available (RFP Output folder not found or could not be created)"
             logger.error(msg)
-            self.error_message = msg
-            return None
+            raise DriveUploadError(msg)
         
         if not filename:
             filename = os.path.basename(file_path)
         
         try:
             if not GOOGLE_DRIVE_AVAILABLE:
-                self.error_message = "Google Drive libraries not available"
-                return None
+                raise DriveUploadError("Google Drive libraries not available")
                 
             from googleapiclient.http import MediaFileUpload
             
@@ -417,6 +489,8 @@ class GoogleDriveClient:
                 mime_type = 'text/plain'
             elif filename.endswith('.pdf'):
                 mime_type = 'application/pdf'
+            elif filename.endswith('.xlsx'):
+                mime_type = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
             
             file_metadata = {
                 'name': filename,
@@ -424,17 +498,18 @@ class GoogleDriveClient:
             }
             
             # Convert DOCX to Google Doc to avoid storage quota issues for Service Accounts
-            if filename.endswith('.docx'):
+            if filename.endswith('.docx') and settings.DRIVE_CONVERT_TO_DOCS:
                 file_metadata['mimeType'] = 'application/vnd.google-apps.document'
             
-            media = MediaFileUpload(file_path, mimetype=mime_type, resumable=False)
-            
-            file = self.service.files().create(
+            media = MediaFileUpload(file_path, mimetype=mime_type, resumable=True,
+                                    chunksize=upload_chunk_bytes())
+            request = self.service.files().create(
                 body=file_metadata,
                 media_body=media,
                 fields='id, name, webViewLink',
                 supportsAllDrives=True
-            ).execute()
+            )
+            file = self._run_resumable(request, filename)
             
             logger.info(f"File uploaded successfully to output folder: {file.get('name')} (ID: {file.get('id')})")
             return {
@@ -443,14 +518,38 @@ class GoogleDriveClient:
                 'name': file.get('name')
             }
             
+        except DriveUploadError:
+            raise
         except Exception as e:
             error_msg = str(e)
-            self.error_message = error_msg
             if "storageQuotaExceeded" in error_msg:
-                msg = "Upload Failed: Service Account storage quota exceeded. Please move the folder to a Shared Drive."
-                logger.error(msg)
-                self.error_message = msg
+                error_msg = "Upload Failed: Service Account storage quota exceeded. Please move the folder to a Shared Drive."
+                logger.error(error_msg)
             
             logger.error(f"Error uploading file to Google Drive: {e}")
-            return None
+            raise DriveUploadError(error_msg) from e
+
+    def _run_resumable(self, request, filename: str) -> dict:
+        """
+        Send a resumable upload chunk by chunk. After a transient failure (5xx, 429, dropped
+        connection) next_chunk() resumes from the last offset Drive confirmed, so only the
+        unconfirmed chunk is sent again.
+        """
+        response = None
+        failures = 0
+        while response is None:
+            try:
+                status, response = request.next_chunk()
+                failures = 0
+                if status is not None:
+                    logger.debug(f"Uploading {filename}: {status.progress():.0%}")
+            except Exception as e:
+                failures += 1
+                if not _retryable_upload_error(e) or failures > settings.DRIVE_UPLOAD_MAX_RETRIES:
+                    raise
+                DRIVE_UPLOAD_RETRIES.inc()
+                delay = min(settings.DRIVE_UPLOAD_RETRY_BASE_SECONDS * 2 ** (failures - 1), 30)
+                logger.warning(f"Upload of {filename} interrupted ({e}); resuming in {delay:.1f}s")
+                time.sleep(delay)
+        return response
 
@@ -0,0 +1,176 @@
+import json
+
+WHITESPACE = " \t\r\n"
+
+
+class JSONObjectStream:
+    def __init__(self):
+        """
+        Incremental parser for one top-level JSON object arriving in pieces (a streamed
+        model response). feed() returns the (key, value) pairs each piece completes, so
+        finished keys can be used before the object closes, and whatever completed
+        before a cut-off survives it. Text before the opening brace (a ```json fence)
+        and after the closing brace is ignored.
+        """
+        self.buffer = ""
+        self.items = {}
+        self.complete = False
+        self.error = None
+        self._pos = 0
+        self._state = "start"  # start -> key -> colon -> value -> next -> ... -> done
+        self._key = None
+        # Resumable scan of the current key or value: start offset, depth and string state
+        self._start = None
+        self._scan = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+
+    def feed(self, piece: str) -> list:
+        """Add the next piece of text; returns the [(key, value)] pairs it completed."""
+        if self._state in ("done", "error") or not piece:
+            return []
+        self.buffer += piece
+        completed = []
+        while self._step(completed):
+            pass
+        return completed
+
+    def _skip_whitespace(self) -> bool:
+        """Advance past whitespace; False if the buffer ran out."""
+        while self._pos < len(self.buffer) and self.buffer[self._pos] in WHITESPACE:
+            self._pos += 1
+        return self._pos < len(self.buffer)
+
+    def _fail(self, message: str) -> bool:
+        self._state = "error"
+        self.error = f"{message} at offset {self._pos}"
+        return False
+
+    def _step(self, completed: list) -> bool:
+        """Advance the state machine as far as the buffer allows; False when it needs more text."""
+        state = self._state
+        if state == "start":
+            brace = self.buffer.find("{", self._pos)
+            if brace == -1:
+                self._pos = len(self.buffer)
+                return False
+            self._pos = brace + 1
+            self._state = "key"
+            return True
+        if state in ("key", "value") and self._start is None:
+            if not self._skip_whitespace():
+                return False
+            if state == "key":
+                char = self.buffer[self._pos]
+                if char == "}" and not self.items:
+                    return self._close()
+                if char != '"':
+                    return self._fail("Expected a key")
+            self._begin_scan()
+        if state in ("key", "value"):
+            end = self._scan_to_end()
+            if end is None:
+                return False
+            text = self.buffer[self._start:end]
+            self._start = None
+            self._pos = end
+            try:
+                value = json.loads(text)
+            except ValueError as e:
+                return self._fail(f"Invalid JSON ({e})")
+            if state == "key":
+                self._key = value
+                self._state = "colon"
+            else:
+                self.items[self._key] = value
+                completed.append((self._key, value))
+                self._state = "next"
+            return True
+        if state == "colon":
+            if not self._skip_whitespace():
+                return False
+            if self.buffer[self._pos] != ":":
+                return self._fail("Expected ':'")
+            self._pos += 1
+            self._state = "value"
+            return True
+        if state == "next":
+            if not self._skip_whitespace():
+                return False
+            char = self.buffer[self._pos]
+            self._pos += 1
+            if char == ",":
+                self._state = "key"
+                return True
+            if char == "}":
+                return self._close()
+            return self._fail("Expected ',' or '}'")
+        return False
+
+    def _close(self) -> bool:
+        self._state = "done"
+        self.complete = True
+        # Nothing after the object is needed; drop the text parsed so far
+        self.buffer = ""
+        self._pos = 0
+        return False
+
+    def _begin_scan(self):
+        self._start = self._scan = self._pos
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+
+    def _scan_to_end(self):
+        """End offset of the key or value starting at self._start, or None if it is not complete yet."""
+        buffer = self.buffer
+        first = buffer[self._start]
+        if first not in '"{[':
+            # Number, true, false or null: ends at the next delimiter, which may not have arrived
+            i = self._start
+            while i < len(buffer) and buffer[i] not in ",}]" + WHITESPACE:
+                i += 1
+            return i if i < len(buffer) else None
+        i = self._scan
+        while i < len(buffer):
+            char = buffer[i]
+            i += 1
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                    if self._depth == 0:
+                        return i
+            elif char == '"':
+                self._in_string = True
+            elif char in "{[":
+                self._depth += 1
+            elif char in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    return i
+        self._scan = i
+        return None
+
+
+def parse_object_prefix(text: str) -> tuple:
+    """The top-level keys completed in `text` and whether the whole object was there: (dict, complete)."""
+    stream = JSONObjectStream()
+    stream.feed(text)
+    return stream.items, stream.complete
+
+
+def restrict_schema(schema: dict, keys: list) -> dict:
+    """An object schema narrowed to `keys` (all required), for re-requesting just those keys."""
+    if not schema:
+        return None
+    properties = schema.get("properties", {})
+    return {
+        **schema,
+        "properties": {k: properties[k] for k in keys if k in properties},
+        "required": [k for k in keys if k in properties],
+    }
@@ -1,15 +1,68 @@
 import vertexai
-from vertexai.generative_models import GenerativeModel, Part
+from vertexai.generative_models import GenerationConfig, GenerativeModel, Part
+import json
 import os
 import logging
+import threading
+import time
 from config import settings
+from .json_stream import JSONObjectStream, restrict_schema
+from .telemetry import REGISTRY, record_llm_call, trace
+from .usage import record_llm_usage
+from .llm_routing import LLM_FAILOVERS, ModelRouter
 
 logger = logging.getLogger(__name__)
 
+LLM_JSON_REPAIRS = REGISTRY.counter(
+    "rfp_llm_json_repairs_total", "Structured LLM calls re-requested for missing keys", ("task",))
+
+# Shared by every LLMClient instance so all services draw from one rate limit
+_request_slots = threading.BoundedSemaphore(settings.LLM_MAX_CONCURRENCY)
+
+# Model health and latency are shared too, so one client's failures steer every client
+_router = None
+_router_lock = threading.Lock()
+
+
+def get_router() -> ModelRouter:
+    global _router
+    with _router_lock:
+        if _router is None:
+            _router = ModelRouter()
+        return _router
+
+
+def _piece_text(response) -> str:
+    """Text of one streamed piece; the closing piece may carry only the finish reason and usage."""
+    try:
+        return response.text
+    except ValueError:
+        return ""
+
+
 class LLMClient:
-    def __init__(self):
-        """Initialize Vertex AI and the Gemini model with proper error handling."""
+    def __init__(self, model=None):
+        """
+        Initialize Vertex AI and the Gemini model with proper error handling.
+        Pass `model` (anything with a Vertex-style generate_content) to skip Vertex entirely;
+        every task then uses that model. LLM_BACKEND=fake uses the offline stand-in for every model.
+        """
         self.model = None
+        self.model_name = settings.LLM_MODEL
+        self.safety_settings = None
+        self.router = get_router()
+        self._pinned = model is not None
+        self._models = {}
+        self._models_lock = threading.Lock()
+        if model is not None:
+            self.model = model
+            self.model_name = getattr(model, "model_name", type(model).__name__)
+            self._models[self.model_name] = model
+            return
+        if settings.LLM_BACKEND == "fake":
+            self.model = self._model_for(self.model_name)
+            logger.info("LLM Client using the offline fake backend")
+            return
         try:
             # Get GCP configuration from settings
             project_id = settings.GCP_PROJECT_ID
@@ -30,36 +83,163 @@ class LLMClient:
                 HarmCategory.HARM_CATEGORY_SEXUALLY_EXPLICIT: HarmBlockThreshold.BLOCK_ONLY_HIGH,
                 HarmCategory.HARM_CATEGORY_HARASSMENT: HarmBlockThreshold.BLOCK_ONLY_HIGH,
             }
-            self.model = GenerativeModel("gemini-1.5-flash-002")
-            logger.info("LLM Client initialized with gemini-1.5-flash-002")
+            self.model = self._model_for(self.model_name)
+            logger.info(f"LLM Client initialized with {self.model_name}")
         except Exception as e:
             logger.error(f"Error initializing LLM client: {e}")
             # Don't raise - allow the app to start even if LLM isn't available
 
-    def generate_content(self, prompt: str) -> str:
-        """Generate content using the Gemini model."""
+    def _model_for(self, model_name: str):
+        """The model object for `model_name`, created on first use."""
+        with self._models_lock:
+            model = self._models.get(model_name)
+            if model is None:
+                if settings.LLM_BACKEND == "fake":
+                    from .fake_llm import FakeGenerativeModel
+                    model = FakeGenerativeModel(latency=settings.LLM_FAKE_LATENCY, model_name=model_name,
+                                                failure_rate=settings.LLM_FAKE_FAILURE_RATE)
+                else:
+                    model = GenerativeModel(model_name)
+                self._models[model_name] = model
+            return model
+
+    def generate_content(self, prompt: str, task: str = "general") -> str:
+        """
+        Generate content for a task type ("score", "section_score", "placeholders", "matrix",
+        "questions", "draft", "general"). The routing policy picks the model and generation settings; on failure
+        the call fails over to the next healthy candidate.
+        """
         if not self.model:
             logger.error("LLM model not initialized")
             return "Error: LLM service not available."
-            
         try:
-            logger.info(f"Sending request to LLM. Prompt length: {len(prompt)} chars")
-            # Log first 100 chars to verify content
-            logger.info(f"Prompt preview: {prompt[:100]}...")
-            
-            response = self.model.generate_content(
-                prompt,
-                generation_config={
-                    "temperature": 0.4,  # Slightly higher for better extraction and synthesis
-                    "max_output_tokens": 16384,  # Allow longer, more detailed responses
-                },
-                safety_settings=self.safety_settings
-            )
-            return response.text
+            return self._generate(prompt, task)
         except Exception as e:
-            logger.error(f"Error generating content: {e}")
-            # If it's a 400/403, try to extract more details
-            if hasattr(e, 'message'):
-                logger.error(f"Error details: {e.message}")
             return f"Error generating content: {str(e)}"
 
+    def generate_json(self, prompt: str, task: str = "general", schema: dict = None, required: list = None,
+                      on_item=None, max_repairs: int = None) -> dict:
+        """
+        Structured call: the model is asked for a JSON object (constrained to `schema` when
+        given) and its streamed output is parsed as it arrives, calling on_item(key, value)
+        for each completed top-level key. If the call fails or is cut short, only the keys
+        of `required` (default: the schema's) still missing are re-requested, up to
+        `max_repairs` times. Returns the keys obtained, which may be partial or empty.
+        """
+        if not self.model:
+            logger.error("LLM model not initialized")
+            return {}
+        required = list(required if required is not None else (schema or {}).get("required", []))
+        repairs = settings.LLM_JSON_MAX_REPAIRS if max_repairs is None else max_repairs
+        result = {}
+
+        def collect(stream, piece):
+            for key, value in stream.feed(piece):
+                if key not in result:
+                    result[key] = value
+                    if on_item:
+                        on_item(key, value)
+
+        attempt_prompt, attempt_schema = prompt, schema
+        for attempt in range(repairs + 1):
+            stream = JSONObjectStream()
+            overrides = {"response_mime_type": "application/json"}
+            if attempt_schema:
+                overrides["response_schema"] = attempt_schema
+            try:
+                self._generate(attempt_prompt, task, overrides, on_text=lambda piece: collect(stream, piece))
+            except Exception as e:
+                logger.warning(f"Structured {task} call failed with {len(result)} keys parsed: {e}")
+            if stream.error:
+                logger.warning(f"Structured {task} output stopped parsing: {stream.error}")
+
+            missing = [key for key in required if key not in result]
+            if result and not missing:
+                break
+            if attempt == repairs:
+                if missing:
+                    logger.warning(f"Structured {task} call still missing {len(missing)} keys")
+                break
+            LLM_JSON_REPAIRS.inc(task=task)
+            if result:
+                logger.info(f"Re-requesting {len(missing)} missing keys of {task} output")
+                attempt_prompt = (
+                    f"{prompt}\n\nReturn ONLY a JSON object with these keys (the others are already answered): "
+                    f"{json.dumps(missing)}"
+                )
+                attempt_schema = restrict_schema(schema, missing)
+        return result
+
+    def _generate(self, prompt: str, task: str, overrides: dict = None, on_text=None) -> str:
+        """
+        Route the call and return the model's text, raising the last error if every candidate
+        fails. With `on_text` the response is streamed and each piece passed to it; once any
+        text has been delivered a failure is raised instead of failing over, since a fresh
+        answer from another model would not continue the pieces already consumed.
+        """
+        policy = self.router.settings_for(task)
+        generation_config = {
+            key: policy[key] for key in ("temperature", "max_output_tokens", "top_p", "response_mime_type")
+            if key in policy
+        }
+        generation_config.update(overrides or {})
+        models = [self.model_name] if self._pinned else self.router.candidates(task)
+        logger.info(f"Sending {task} request to LLM. Prompt length: {len(prompt)} chars")
+        # Log first 100 chars to verify content
+        logger.info(f"Prompt preview: {prompt[:100]}...")
+
+        error = None
+        for attempt, model_name in enumerate(models):
+            if attempt:
+                LLM_FAILOVERS.inc(task=task, model=model_name)
+                logger.warning(f"Failing over {task} request to {model_name}")
+            started = time.perf_counter()
+            pieces = []
+            try:
+                model = self._model_for(model_name)
+                config = generation_config
+                if "response_schema" in config and isinstance(model, GenerativeModel):
+                    # The SDK converts a dict schema only through its GenerationConfig type
+                    config = GenerationConfig(**config)
+                with _request_slots, trace("llm_generate"):
+                    # Time the model call itself, not the wait for a free slot
+                    started = time.perf_counter()
+                    if on_text is None:
+                        response = model.generate_content(
+                            prompt,
+                            generation_config=config,
+                            safety_settings=self.safety_settings
+                        )
+                        text = response.text
+                    else:
+                        response = None
+                        for response in model.generate_content(
+                            prompt,
+                            generation_config=config,
+                            safety_settings=self.safety_settings,
+                            stream=True
+                        ):
+                            pieces.append(_piece_text(response))
+                            on_text(pieces[-1])
+                        text = "".join(pieces)
+                seconds = time.perf_counter() - started
+                record_llm_call(model_name, seconds, len(prompt), len(text), ok=True)
+                self.router.record(task, model_name, seconds, ok=True)
+                # Outside the llm_generate span so tokens are attributed to the calling stage
+                # (a streamed response carries its usage on the last piece)
+                record_llm_usage(model_name, response, prompt, text)
+                return text
+            except Exception as e:
+                seconds = time.perf_counter() - started
+                partial = "".join(pieces)
+                record_llm_call(model_name, seconds, len(prompt), len(partial), ok=False)
+                self.router.record(task, model_name, seconds, ok=False)
+                logger.error(f"Error generating content with {model_name}: {e}")
+                # If it's a 400/403, try to extract more details
+                if hasattr(e, 'message'):
+                    logger.error(f"Error details: {e.message}")
+                error = e
+                if partial:
+                    record_llm_usage(model_name, None, prompt, partial)
+                    raise
+        raise error or RuntimeError(f"No model available for {task}")
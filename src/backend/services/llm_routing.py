@@ -0,0 +1,153 @@
+from collections import deque
+import json
+import logging
+import threading
+import time
+from config import settings
+from .telemetry import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+LLM_FAILOVERS = REGISTRY.counter(
+    "rfp_llm_failovers_total", "LLM calls retried on another model after a failure", ("task", "model"))
+
+JSON_MIME = "application/json"
+
+
+def default_policy() -> dict:
+    """
+    Task type -> candidate models (in preference order) and generation settings.
+    Small structured tasks get the fast model, a tight output budget and JSON mode;
+    narrative drafting keeps the long budget. Fallback models are appended to every task.
+    """
+    fast, primary = settings.LLM_FAST_MODEL, settings.LLM_MODEL
+    return {
+        "score": {"models": [fast, primary], "temperature": 0.2, "max_output_tokens": 1024,
+                  "response_mime_type": JSON_MIME},
+        "section_score": {"models": [fast, primary], "temperature": 0.2, "max_output_tokens": 1024,
+                          "response_mime_type": JSON_MIME},
+        "placeholders": {"models": [primary], "temperature": 0.3, "max_output_tokens": 8192,
+                         "response_mime_type": JSON_MIME},
+        "matrix": {"models": [primary], "temperature": 0.3, "max_output_tokens": 8192,
+                   "response_mime_type": JSON_MIME},
+        "questions": {"models": [primary], "temperature": 0.4, "max_output_tokens": 4096,
+                      "response_mime_type": JSON_MIME},
+        "draft": {"models": [primary], "temperature": 0.4, "max_output_tokens": 16384},
+        "general": {"models": [primary], "temperature": 0.4, "max_output_tokens": 16384},
+    }
+
+
+def load_policy() -> dict:
+    """The default policy with per-task overrides from LLM_ROUTING_POLICY (a JSON object) applied."""
+    policy = default_policy()
+    if settings.LLM_ROUTING_POLICY:
+        try:
+            overrides = json.loads(settings.LLM_ROUTING_POLICY)
+            for task, override in overrides.items():
+                policy[task] = {**policy.get(task, policy["general"]), **override}
+        except (ValueError, AttributeError) as e:
+            logger.error(f"Ignoring invalid LLM_ROUTING_POLICY: {e}")
+    for entry in policy.values():
+        models = list(entry["models"]) + list(settings.LLM_FALLBACK_MODELS)
+        entry["models"] = list(dict.fromkeys(m for m in models if m))
+    return policy
+
+
+class ModelHealth:
+    def __init__(self, window_seconds: float, max_samples: int = 200):
+        """Rolling latency and error rate of one model over the last `window_seconds`."""
+        self.window_seconds = window_seconds
+        self._samples = deque(maxlen=max_samples)  # (timestamp, seconds, ok)
+        self.consecutive_failures = 0
+        self.last_failure = 0.0
+
+    def record(self, seconds: float, ok: bool):
+        now = time.time()
+        self._samples.append((now, seconds, ok))
+        if ok:
+            self.consecutive_failures = 0
+        else:
+            self.consecutive_failures += 1
+            self.last_failure = now
+
+    def _recent(self) -> list:
+        cutoff = time.time() - self.window_seconds
+        return [s for s in self._samples if s[0] >= cutoff]
+
+    def p50(self):
+        latencies = sorted(s[1] for s in self._recent() if s[2])
+        return latencies[len(latencies) // 2] if latencies else None
+
+    def error_rate(self) -> float:
+        recent = self._recent()
+        return sum(1 for s in recent if not s[2]) / len(recent) if recent else 0.0
+
+    def healthy(self, cooldown_seconds: float, max_error_rate: float) -> bool:
+        """Unhealthy after repeated or frequent failures, until the cooldown since the last one passes."""
+        if time.time() - self.last_failure >= cooldown_seconds:
+            return True
+        if self.consecutive_failures >= 2:
+            return False
+        return not (len(self._recent()) >= 4 and self.error_rate() > max_error_rate)
+
+    def snapshot(self) -> dict:
+        p50 = self.p50()
+        return {
+            "samples": len(self._recent()),
+            "p50_seconds": round(p50, 3) if p50 is not None else None,
+            "error_rate": round(self.error_rate(), 3),
+            "consecutive_failures": self.consecutive_failures,
+        }
+
+
+class ModelRouter:
+    def __init__(self, policy: dict = None):
+        """
+        Picks models for a task: the task's candidates ordered fastest healthy first.
+        The preferred model stays first until another candidate is measurably faster on
+        the same task; untried fallbacks go last. Health (errors) is tracked per model,
+        latency per (task, model). Shared by every LLMClient so both are process-wide.
+        """
+        self.policy = policy if policy is not None else load_policy()
+        self._health = {}
+        self._latency = {}
+        self._lock = threading.Lock()
+
+    def settings_for(self, task: str) -> dict:
+        return self.policy.get(task) or self.policy["general"]
+
+    def _tracker(self, trackers: dict, key) -> ModelHealth:
+        with self._lock:
+            health = trackers.get(key)
+            if health is None:
+                health = trackers[key] = ModelHealth(settings.LLM_ROUTING_WINDOW_SECONDS)
+            return health
+
+    def candidates(self, task: str, models: list = None) -> list:
+        models = models or self.settings_for(task)["models"]
+
+        def rank(item):
+            index, model = item
+            health = self._tracker(self._health, model)
+            if not health.healthy(settings.LLM_ROUTING_COOLDOWN_SECONDS, settings.LLM_ROUTING_MAX_ERROR_RATE):
+                return (1, 0.0, index)
+            p50 = self._tracker(self._latency, (task, model)).p50()
+            if p50 is None:
+                p50 = 0.0 if index == 0 else float("inf")
+            return (0, p50, index)
+
+        return [model for _, model in sorted(enumerate(models), key=rank)]
+
+    def record(self, task: str, model: str, seconds: float, ok: bool):
+        self._tracker(self._health, model).record(seconds, ok)
+        self._tracker(self._latency, (task, model)).record(seconds, ok)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            health = dict(self._health)
+            latency = dict(self._latency)
+        return {
+            "policy": self.policy,
+            "models": {model: h.snapshot() for model, h in health.items()},
+            "tasks": {f"{task}/{model}": h.snapshot() for (task, model), h in latency.items()},
+        }
@@ -0,0 +1,160 @@
+from collections import OrderedDict
+import contextvars
+import cProfile
+import hmac
+import io
+import logging
+import marshal
+import pstats
+import random
+import threading
+import time
+import uuid
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+# Profile session of the current request; None (the default) means no profiling work at all
+profile_var = contextvars.ContextVar("profile_session", default=None)
+
+# The profiler running on this thread, so nested trace() spans don't start a second one
+_thread_state = threading.local()
+
+
+class ProfileSession:
+    def __init__(self, request_id: str, method: str, path: str):
+        """
+        cProfile data for one request. Each trace() span that is outermost on its
+        thread runs its own profiler; the results are merged when the profile is read,
+        so work fanned out to pipeline and threadpool workers is included.
+        """
+        self.profile_id = uuid.uuid4().hex[:12]
+        self.request_id = request_id
+        self.method = method
+        self.path = path
+        self.started = time.time()
+        self.duration = None
+        self.status = None
+        self.spans = []
+        self._profilers = []
+        self._lock = threading.Lock()
+
+    def enter(self):
+        """Start profiling the current thread unless an outer span already does. Returns the profiler or None."""
+        if getattr(_thread_state, "profiler", None) is not None:
+            return None
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError as e:
+            # Another profiler (e.g. a developer's cProfile run) already owns this thread
+            logger.debug(f"Could not start request profiler: {e}")
+            return None
+        _thread_state.profiler = profiler
+        return profiler
+
+    def exit(self, profiler, stage: str, seconds: float):
+        if profiler is not None:
+            profiler.disable()
+            _thread_state.profiler = None
+        with self._lock:
+            if profiler is not None:
+                self._profilers.append(profiler)
+            self.spans.append({"stage": stage, "seconds": round(seconds, 4), "thread": threading.current_thread().name})
+
+    def stats(self):
+        with self._lock:
+            profilers = list(self._profilers)
+        if not profilers:
+            return None
+        stats = pstats.Stats(profilers[0], stream=io.StringIO())
+        for profiler in profilers[1:]:
+            stats.add(profiler)
+        return stats
+
+    def summary(self) -> dict:
+        with self._lock:
+            spans = len(self.spans)
+        return {
+            "profile_id": self.profile_id,
+            "request_id": self.request_id,
+            "method": self.method,
+            "path": self.path,
+            "status": self.status,
+            "started": self.started,
+            "duration_s": self.duration,
+            "spans": spans,
+        }
+
+    def text_report(self, sort: str = "cumulative", limit: int = 60) -> str:
+        stats = self.stats()
+        if stats is None:
+            return "No profiled stages ran for this request.\n"
+        out = io.StringIO()
+        stats.stream = out
+        stats.sort_stats(sort).print_stats(limit)
+        with self._lock:
+            spans = list(self.spans)
+        out.write("\nStages (outermost per thread are profiled):\n")
+        for span in spans:
+            out.write(f"  {span['stage']:32s} {span['seconds']:9.4f}s  {span['thread']}\n")
+        return out.getvalue()
+
+    def pstats_bytes(self) -> bytes:
+        """Profile in the marshal format written by pstats.Stats.dump_stats (loadable by snakeviz etc.)."""
+        stats = self.stats()
+        return marshal.dumps(stats.stats if stats else {})
+
+
+class ProfileStore:
+    def __init__(self, max_profiles: int):
+        """Ring buffer of the most recent request profiles."""
+        self.max_profiles = max_profiles
+        self._profiles = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, session: ProfileSession):
+        with self._lock:
+            self._profiles[session.profile_id] = session
+            while len(self._profiles) > self.max_profiles:
+                self._profiles.popitem(last=False)
+
+    def get(self, profile_id: str):
+        with self._lock:
+            return self._profiles.get(profile_id)
+
+    def list(self) -> list:
+        with self._lock:
+            sessions = list(self._profiles.values())
+        return [s.summary() for s in reversed(sessions)]
+
+
+STORE = ProfileStore(settings.PROFILING_MAX_PROFILES)
+
+
+def is_admin(token: str) -> bool:
+    return bool(settings.PROFILING_ADMIN_TOKEN) and hmac.compare_digest(
+        (token or "").encode(), settings.PROFILING_ADMIN_TOKEN.encode())
+
+
+def should_profile(method: str, headers) -> bool:
+    """Profile on an admin-authenticated X-Profile header, or sample POST requests at PROFILING_SAMPLE_RATE."""
+    if not settings.PROFILING_ADMIN_TOKEN:
+        return False
+    if headers.get("x-profile", "").lower() in ("1", "true", "yes"):
+        return is_admin(headers.get("x-admin-token"))
+    return method == "POST" and settings.PROFILING_SAMPLE_RATE > 0 and random.random() < settings.PROFILING_SAMPLE_RATE
+
+
+def begin(request_id: str, method: str, path: str):
+    """Start a profile session for the current request; returns (session, reset token)."""
+    session = ProfileSession(request_id, method, path)
+    return session, profile_var.set(session)
+
+
+def finish(session: ProfileSession, token, status: int):
+    session.duration = round(time.time() - session.started, 4)
+    session.status = status
+    profile_var.reset(token)
+    STORE.add(session)
+    logger.info(f"Stored profile {session.profile_id} for {session.method} {session.path}")
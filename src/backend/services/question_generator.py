@@ -1,14 +1,48 @@
 from .llm_client import LLMClient
 from .web_scraper import WebScraper
 from .google_drive_client import GoogleDriveClient
+from .document_source import load_source_documents
+from .telemetry import traced
+import logging
+
+logger = logging.getLogger(__name__)
+
+PRIORITIES = ("High", "Medium", "Low")
+
+# Response schema for the structured (JSON mode) questions call
+QUESTIONS_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "questions": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "question": {"type": "string"},
+                    "priority": {"type": "string", "enum": list(PRIORITIES)},
+                    "category": {"type": "string"},
+                    "rationale": {"type": "string"},
+                },
+                "required": ["question", "priority", "category", "rationale"],
+            },
+        },
+    },
+    "required": ["questions"],
+}
+
 
 class QuestionGenerator:
-    def __init__(self):
-        self.llm = LLMClient()
-        self.scraper = WebScraper()
-        self.drive_client = GoogleDriveClient()
+    def __init__(self, llm: LLMClient = None, scraper: WebScraper = None, drive_client: GoogleDriveClient = None):
+        self.llm = llm or LLMClient()
+        self.scraper = scraper or WebScraper()
+        self.drive_client = drive_client or GoogleDriveClient()
 
-    def generate_questions(self, rfp_text: str, company_url: str = ""):
+    @traced("question_generation")
+    def generate_questions(self, rfp_text: str, company_url: str = "", requirements: list = None) -> list:
+        """
+        Ask the LLM for clarifying questions to put to the client.
+        Returns [{"priority", "question", "category", "rationale"}], empty if the model gave none.
+        """
         website_content = ""
         if company_url:
             website_content = self.scraper.get_website_content(company_url)
@@ -16,9 +50,9 @@ class QuestionGenerator:
         # Get past RFP documents for reference
         past_rfps = []
         try:
-            past_rfps = self.drive_client.get_all_rfp_documents()
+            past_rfps = load_source_documents(self.drive_client)
         except Exception as e:
-            print(f"Could not fetch Google Drive documents: {e}")
+            logger.warning(f"Could not fetch source documents: {e}")
 
         past_rfp_context = ""
         if past_rfps:
@@ -26,6 +60,11 @@ class QuestionGenerator:
             for doc in past_rfps[:2]:
                 past_rfp_context += f"\n--- {doc['name']} ---\n{doc['content'][:800]}...\n"
 
+        requirements_section = ""
+        if requirements:
+            requirements_section = "\n\nSTATED REQUIREMENTS (extracted from the RFP):\n"
+            requirements_section += "\n".join(f"- {r}" for r in requirements[:40])
+
         context_section = ""
         if website_content:
             context_section = f"""
@@ -42,6 +81,7 @@ class QuestionGenerator:
 
         RFP TEXT:
         {rfp_text[:4000]}
+        {requirements_section}
         
         Guidelines:
         - Identify ambiguous requirements.
@@ -49,20 +89,22 @@ class QuestionGenerator:
         - Clarify constraints (timeline, budget).
         - Learn from the types of questions asked in past successful RFPs.
         
-        Output JSON list of objects with fields: question, priority (High/Medium/Low), category, rationale.
+        Return a JSON object {{"questions": [...]}} where each entry has the fields:
+        question, priority (High/Medium/Low), category, rationale.
         """
-        
-        # Mocking for prototype
-        if not company_url:
-             return [
-                {"priority": "High", "question": "Can you clarify the specific KPIs for success?", "category": "Scope", "rationale": "KPIs are not defined."},
-                {"priority": "High", "question": "What is the detailed timeline for Phase 2?", "category": "Timeline", "rationale": "Phase 2 dates are missing."},
-            ]
-
-        return [
-            {"priority": "High", "question": "Can you clarify the specific KPIs for success?", "category": "Scope", "rationale": "KPIs are not defined."},
-            {"priority": "High", "question": f"Given our expertise in cloud migration (as seen on our site) and {len(past_rfps)} past projects, are you open to a hybrid approach?", "category": "Technical", "rationale": "Leverages our specific cloud strengths."},
-            {"priority": "Medium", "question": "Are there specific security certifications required?", "category": "Constraints", "rationale": "Compliance check needed."}
-        ]
-
 
+        data = self.llm.generate_json(prompt, task="questions", schema=QUESTIONS_SCHEMA)
+        questions = []
+        for entry in data.get("questions") or []:
+            if not isinstance(entry, dict) or not str(entry.get("question") or "").strip():
+                continue
+            priority = str(entry.get("priority") or "").capitalize()
+            questions.append({
+                "priority": priority if priority in PRIORITIES else "Medium",
+                "question": str(entry["question"]).strip(),
+                "category": str(entry.get("category") or "General"),
+                "rationale": str(entry.get("rationale") or ""),
+            })
+        if not questions:
+            logger.warning("Question generation returned no usable questions")
+        return questions
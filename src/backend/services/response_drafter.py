@@ -1,6 +1,14 @@
 from .llm_client import LLMClient
 from .web_scraper import WebScraper
 from .google_drive_client import GoogleDriveClient
+from .site_crawler import SiteCrawler
+from .document_source import load_source_documents
+from .answer_memo import corpus_version, get_answer_memo
+from .dedup import dedupe_documents
+from config import settings
+from .telemetry import traced
+from .usage import clip
+import hashlib
 import os
 import re
 try:
@@ -8,26 +16,59 @@ try:
 except ImportError:
     Document = None
 
+# RFP text included in the draft_response prompt
+NARRATIVE_RFP_CHARS = 5000
+
 class ResponseDrafter:
-    def __init__(self):
-        self.llm = LLMClient()
-        self.scraper = WebScraper()
-        self.drive_client = GoogleDriveClient()
+    def __init__(self, llm: LLMClient = None, scraper: WebScraper = None, drive_client: GoogleDriveClient = None):
+        self.llm = llm or LLMClient()
+        self.scraper = scraper or WebScraper()
+        self.drive_client = drive_client or GoogleDriveClient()
+        self.crawler = SiteCrawler(self.scraper)
+
+    def get_website_content(self, company_url: str = "") -> str:
+        """Scrape the company website, returning an empty string when no URL is given."""
+        if not company_url:
+            return ""
+        return self.scraper.get_website_content(company_url)
 
-    def draft_response(self, rfp_text: str, company_url: str = "") -> str:
+    def get_source_documents(self, raise_errors: bool = False) -> list:
+        """Get supporting documents from every configured source (Drive Source Information folder, SharePoint)."""
+        try:
+            return load_source_documents(self.drive_client, raise_errors=raise_errors)
+        except Exception as e:
+            if raise_errors:
+                raise
+            print(f"Could not fetch source documents: {e}")
+            return []
+
+    def dedupe_sources(self, documents: list) -> tuple:
+        """Collapse near-duplicate source paragraphs before prompting. Returns (documents, report or None)."""
+        if not settings.SOURCE_DEDUP_ENABLED or not documents:
+            return documents, None
+        try:
+            return dedupe_documents(documents)
+        except Exception as e:
+            print(f"Source dedup failed, using documents as loaded: {e}")
+            return documents, None
+
+    def get_company_pages(self, company_url: str = "") -> list:
+        """Crawl the company site beyond the landing page and return its pages as source documents."""
+        if not company_url or not settings.SITE_CRAWL_ENABLED:
+            return []
+        return self.crawler.crawl_as_documents(company_url)
+
+    def draft_response(self, rfp_text: str, company_url: str = "",
+                       website_content: str = None, source_documents: list = None) -> str:
         """
         Draft a response using company website and source documents from Google Drive.
+        Pass `website_content` / `source_documents` to reuse context that was already fetched.
         """
-        website_content = ""
-        if company_url:
-            website_content = self.scraper.get_website_content(company_url)
+        if website_content is None:
+            website_content = self.get_website_content(company_url)
 
-        # Get supporting documents from Google Drive Source Information folder
-        source_documents = []
-        try:
-            source_documents = self.drive_client.get_all_rfp_documents()
-        except Exception as e:
-            print(f"Could not fetch Google Drive source documents: {e}")
+        if source_documents is None:
+            source_documents, _ = self.dedupe_sources(self.get_source_documents())
 
         # Build context from source documents
         source_context = ""
@@ -52,7 +93,7 @@ class ResponseDrafter:
         {source_context}
 
         RFP REQUIREMENT/TEXT:
-        {rfp_text[:5000]}
+        {clip(rfp_text, NARRATIVE_RFP_CHARS, "drafter.rfp_text")}
 
         INSTRUCTIONS:
         1. Write a response that directly addresses the requirements.
@@ -64,13 +105,113 @@ class ResponseDrafter:
         DRAFT RESPONSE:
         """
         try:
-            return self.llm.generate_content(prompt)
+            return self.llm.generate_content(prompt, task="draft")
         except Exception as e:
             return f"Error drafting response: {str(e)}"
 
-    def generate_draft_document(self, content: str, input_path: str, output_path: str, company_url: str = ""):
+    def find_placeholders(self, input_path: str) -> set:
+        """
+        Find all [placeholder] markers in the paragraphs and tables of a .docx file.
+        """
+        if not Document or not input_path.endswith('.docx') or not os.path.exists(input_path):
+            return set()
+
+        try:
+            return self._find_placeholders(Document(input_path))
+        except Exception as e:
+            print(f"Error reading placeholders from docx: {e}")
+            return set()
+
+    def _find_placeholders(self, doc) -> set:
+        placeholders = set()
+        placeholder_pattern = r'\[([^\]]+)\]'
+
+        for paragraph in doc.paragraphs:
+            matches = re.findall(placeholder_pattern, paragraph.text)
+            placeholders.update(matches)
+
+        for table in doc.tables:
+            for row in table.rows:
+                for cell in row.cells:
+                    for paragraph in cell.paragraphs:
+                        matches = re.findall(placeholder_pattern, paragraph.text)
+                        placeholders.update(matches)
+
+        return placeholders
+
+    def _section_map(self, doc) -> list:
+        """
+        The document body split at headings, in order, as [{"title", "hash", "placeholders"}].
+        Tables belong to the section they appear in. Used to diff reissued tenders.
+        """
+        from docx.table import Table
+        from docx.text.paragraph import Paragraph
+
+        placeholder_pattern = r'\[([^\]]+)\]'
+        sections = []
+        title, parts = "Preamble", []
+
+        def flush():
+            text = "\n".join(parts)
+            if text.strip():
+                sections.append({
+                    "title": title,
+                    "hash": hashlib.sha256(f"{title}\0{text}".encode('utf-8')).hexdigest(),
+                    "placeholders": sorted(set(re.findall(placeholder_pattern, text))),
+                })
+
+        for child in doc.element.body.iterchildren():
+            tag = child.tag.rsplit('}', 1)[-1]
+            if tag == 'p':
+                paragraph = Paragraph(child, doc)
+                text = paragraph.text
+                style_name = paragraph.style.name if paragraph.style is not None else ""
+                if style_name.lower().startswith("heading") and text.strip():
+                    flush()
+                    title, parts = text.strip(), []
+                parts.append(text)
+            elif tag == 'tbl':
+                for row in Table(child, doc).rows:
+                    parts.append(" | ".join(cell.text for cell in row.cells))
+        flush()
+        return sections
+
+    def _placeholder_contexts(self, doc) -> dict:
+        """
+        Where each placeholder first appears: the nearest preceding heading for body
+        paragraphs, or the header row for table cells. Used to key memoized answers.
+        """
+        contexts = {}
+        placeholder_pattern = r'\[([^\]]+)\]'
+
+        heading = ""
+        for paragraph in doc.paragraphs:
+            text = paragraph.text
+            style_name = paragraph.style.name if paragraph.style is not None else ""
+            if style_name.lower().startswith("heading") and text.strip():
+                heading = text.strip()
+            for match in re.findall(placeholder_pattern, text):
+                contexts.setdefault(match, heading)
+
+        for table in doc.tables:
+            rows = table.rows
+            header = " | ".join(cell.text.strip() for cell in rows[0].cells) if len(rows) else ""
+            for row in rows:
+                for cell in row.cells:
+                    for match in re.findall(placeholder_pattern, cell.text):
+                        contexts.setdefault(match, f"table: {header}")
+
+        return contexts
+
+    @traced("docx_fill")
+    def generate_draft_document(self, content: str, input_path: str, output_path: str, company_url: str = "",
+                                website_content: str = None, source_documents: list = None,
+                                placeholders: set = None, lineage=None):
         """
         Finds and replaces placeholder text in the document with AI-generated content.
+        Context and placeholders already gathered by the caller are reused instead of refetched.
+        With a `lineage` (a DraftLineage), answers from the previous version of this tender are
+        reused for placeholders outside the sections that changed.
         """
         if not Document or not input_path.endswith('.docx') or not os.path.exists(input_path):
             return None
@@ -79,35 +220,33 @@ class ResponseDrafter:
             doc = Document(input_path)
             
             # Get company context
-            website_content = ""
-            if company_url:
-                website_content = self.scraper.get_website_content(company_url)
+            if website_content is None:
+                website_content = self.get_website_content(company_url)
             
             # Get source documents from Google Drive
-            source_documents = []
-            try:
-                source_documents = self.drive_client.get_all_rfp_documents()
-            except Exception as e:
-                print(f"Could not fetch source documents: {e}")
+            if source_documents is None:
+                source_documents = self.get_source_documents()
             
             # Find all placeholders in the document
-            placeholders = set()
-            placeholder_pattern = r'\[([^\]]+)\]'
-            
-            for paragraph in doc.paragraphs:
-                matches = re.findall(placeholder_pattern, paragraph.text)
-                placeholders.update(matches)
-            
-            for table in doc.tables:
-                for row in table.rows:
-                    for cell in row.cells:
-                        for paragraph in cell.paragraphs:
-                            matches = re.findall(placeholder_pattern, paragraph.text)
-                            placeholders.update(matches)
+            if placeholders is None:
+                placeholders = self._find_placeholders(doc)
             
             # Generate replacements for all placeholders in a single batch using LLM
             # This provides much better context and quality than isolated heuristic checks
-            replacements = self._batch_generate_placeholders(placeholders, website_content, source_documents)
+            reused, refresh = {}, set()
+            if lineage is not None:
+                reused, refresh = lineage.plan_placeholders(
+                    self._section_map(doc), corpus_version(source_documents, website_content), placeholders
+                )
+                if reused:
+                    print(f"Re-draft: reusing {len(reused)} answers from the previous version")
+            replacements = self._batch_generate_placeholders(
+                set(placeholders) - set(reused), website_content, source_documents,
+                contexts=self._placeholder_contexts(doc), refresh=refresh
+            )
+            replacements.update(reused)
+            if lineage is not None:
+                lineage.record_answers(replacements)
             
             # Replace placeholders in paragraphs
             for paragraph in doc.paragraphs:
@@ -137,14 +276,42 @@ class ResponseDrafter:
             print(f"Error modifying docx: {e}")
             return None
     
-    def _batch_generate_placeholders(self, placeholders: set, website_content: str, source_documents: list) -> dict:
+    def _batch_generate_placeholders(self, placeholders: set, website_content: str, source_documents: list,
+                                     contexts: dict = None, refresh: set = None) -> dict:
         """
         Generate content for all placeholders in one go using the LLM and Source Documents.
+        Answers memoized for the same placeholder, context and source documents are reused,
+        and only the rest are sent to the model. Placeholders in `refresh` (their section of
+        the tender changed) always go to the model.
         Returns a dictionary {placeholder_name: generated_content}
         """
         if not placeholders:
             return {}
 
+        memo = get_answer_memo()
+        contexts = contexts or {}
+        if memo and (source_documents or website_content):
+            version = corpus_version(source_documents, website_content)
+            memoized = memo.lookup(set(placeholders) - set(refresh or ()), contexts, version)
+            remaining = set(placeholders) - set(memoized)
+            if memoized:
+                print(f"Reusing {len(memoized)} memoized answers; generating {len(remaining)} placeholders")
+            # Each answer is memoized as soon as it streams in, so a failed call keeps the finished ones
+            generated = self._generate_placeholders(
+                remaining, website_content, source_documents,
+                on_answer=lambda p, answer: memo.put(p, contexts.get(p, ''), version, answer),
+            ) if remaining else {}
+            return {**generated, **memoized}
+
+        return self._generate_placeholders(placeholders, website_content, source_documents)
+
+    def _generate_placeholders(self, placeholders: set, website_content: str, source_documents: list,
+                               on_answer=None) -> dict:
+        """
+        Ask the LLM for every placeholder in one structured batch; on_answer(placeholder, content)
+        is called as each answer arrives. Returns {placeholder_name: generated_content}
+        """
+
         # Prepare Source Context
         source_context = ""
         if source_documents:
@@ -159,7 +326,7 @@ class ResponseDrafter:
                 
                 # Limit size per document safer limit
                 if len(content_preview) > 30000:
-                    content_preview = content_preview[:30000] + "...[truncated]"
+                    content_preview = clip(content_preview, 30000, "placeholders.source_document") + "...[truncated]"
                 
                 source_context += f"\n--- DOCUMENT: {doc['name']} ---\n{content_preview}\n"
         
@@ -242,47 +409,32 @@ class ResponseDrafter:
         Return ONLY the JSON object. No markdown, no explanations, no extra text.
         """
 
+        placeholders = sorted(placeholders)
+        schema = {
+            "type": "object",
+            "properties": {p: {"type": "string"} for p in placeholders},
+            "required": placeholders,
+        }
         try:
             print(f"Generating batch response for {len(placeholders)} placeholders...")
-            response_text = self.llm.generate_content(prompt)
-            
-            # Check if LLM client returned an error string
-            if response_text.startswith("Error generating content"):
-                print(f"LLM Generation Error: {response_text}")
-                return {p: f"[{response_text}]" for p in placeholders}
+            # Streamed and parsed key by key: answers are usable as they complete, and if the
+            # call breaks off only the placeholders still missing are asked for again
+            replacements = self.llm.generate_json(prompt, task="placeholders", schema=schema, on_item=on_answer)
+            if not replacements:
+                print("No structured data in the AI response")
+                return {p: "[Error: AI provided no structured data]" for p in placeholders}
 
-            # Robust JSON extraction
             cleaned_replacements = {}
-            import json
-            import re
-            
-            # Find the first '{' and last '}' to extract the JSON object
-            json_match = re.search(r'(\{.*\})', response_text, re.DOTALL)
-            
-            if json_match:
-                json_str = json_match.group(1)
-                try:
-                    replacements = json.loads(json_str)
-                    
-                    # Validate keys match
-                    for p in placeholders:
-                        # the LLM might return keys with brackets or w/o, try to match
-                        if p in replacements:
-                            cleaned_replacements[p] = replacements[p]
-                        elif f"[{p}]" in replacements:
-                            cleaned_replacements[p] = replacements[f"[{p}]"]
-                        else:
-                            # Fallback if missed
-                            cleaned_replacements[p] = "[Information not found in knowledge base]"
-                            
-                    return cleaned_replacements
-                    
-                except json.JSONDecodeError as je:
-                    print(f"JSON Parse Error: {je}. Response was: {response_text[:200]}...")
-                    return {p: "[Error: AI response was not valid data]" for p in placeholders}
-            else:
-                print(f"No JSON found in response. Response was: {response_text[:200]}...")
-                return {p: "[Error: AI provided no structured data]" for p in placeholders}
+            for p in placeholders:
+                # the LLM might return keys with brackets or w/o, try to match
+                if p in replacements:
+                    cleaned_replacements[p] = replacements[p]
+                elif f"[{p}]" in replacements:
+                    cleaned_replacements[p] = replacements[f"[{p}]"]
+                else:
+                    # Fallback if missed
+                    cleaned_replacements[p] = "[Information not found in knowledge base]"
+            return cleaned_replacements
 
         except Exception as e:
             print(f"Error in batch generation: {e}")
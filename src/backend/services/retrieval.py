@@ -0,0 +1,74 @@
+from collections import Counter
+import math
+import re
+import threading
+from .artifact_store import split_sections
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]{3,}")
+STOPWORDS = frozenset(
+    "the and for with that this are you your our has have will shall must from not any all can may "
+    "please provide describe detail details how what which who whether does its their there been".split()
+)
+
+
+def tokenize(text: str) -> list:
+    return [t for t in TOKEN_PATTERN.findall(text.lower()) if t not in STOPWORDS]
+
+
+class PassageIndex:
+    def __init__(self, documents: list, passage_chars: int = 1500):
+        """
+        BM25 keyword index over source document passages (split at headings), so a
+        prompt can carry the passages relevant to its questions instead of the whole corpus.
+        """
+        self.passages = []
+        for doc in documents:
+            for section in split_sections(doc["content"], passage_chars):
+                self.passages.append({"document": doc["name"], "title": section["title"], "text": section["text"]})
+        self._terms = [Counter(tokenize(p["text"])) for p in self.passages]
+        self._lengths = [sum(terms.values()) for terms in self._terms]
+        self._avg_length = (sum(self._lengths) / len(self._lengths)) if self._lengths else 0
+        frequencies = Counter(term for terms in self._terms for term in terms)
+        total = len(self.passages)
+        self._idf = {term: math.log(1 + (total - df + 0.5) / (df + 0.5)) for term, df in frequencies.items()}
+
+    def search(self, query: str, max_chars: int, k1: float = 1.2, b: float = 0.75) -> list:
+        """The best-matching passages for `query`, most relevant first, within `max_chars` in total."""
+        query_terms = set(tokenize(query))
+        if not query_terms or not self.passages:
+            return []
+        scores = []
+        for i, terms in enumerate(self._terms):
+            norm = k1 * (1 - b + b * self._lengths[i] / (self._avg_length or 1))
+            score = sum(
+                self._idf[t] * terms[t] * (k1 + 1) / (terms[t] + norm)
+                for t in query_terms if t in terms
+            )
+            if score > 0:
+                scores.append((score, i))
+        scores.sort(reverse=True)
+
+        selected, used = [], 0
+        for _, i in scores:
+            passage = self.passages[i]
+            if used + len(passage["text"]) > max_chars:
+                continue
+            selected.append(passage)
+            used += len(passage["text"])
+        return selected
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def get_passage_index(documents: list, version: str) -> PassageIndex:
+    """The index for this corpus version, built once and reused until the corpus changes."""
+    with _indexes_lock:
+        index = _indexes.get(version)
+    if index is None:
+        index = PassageIndex(documents)
+        with _indexes_lock:
+            _indexes.clear()  # only the current corpus version is worth keeping
+            _indexes[version] = index
+    return index
@@ -1,20 +1,92 @@
+from concurrent.futures import ThreadPoolExecutor
+from config import settings
+from .artifact_store import split_sections
 from .llm_client import LLMClient
+from .telemetry import trace, traced
+from .usage import clip
+import contextvars
 import logging
 import json
-import re
 
 logger = logging.getLogger(__name__)
 
+# Characters of RFP text that fit the single-call assessment prompt
+SINGLE_CALL_CHARS = 10000
+CRITERIA = ("strategy", "offerings", "resources", "risks")
+
+# Response schemas for the structured (JSON mode) assessment calls
+SCORE_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "score": {"type": "integer"},
+        "recommendation": {"type": "string", "enum": ["Pursue", "No-Pursue"]},
+        "criteria_scores": {
+            "type": "object",
+            "properties": {c: {"type": "integer"} for c in CRITERIA},
+            "required": list(CRITERIA),
+        },
+        "reasoning": {"type": "string"},
+    },
+    "required": ["score", "recommendation", "criteria_scores", "reasoning"],
+}
+SECTION_SCORE_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "relevance": {"type": "integer"},
+        "criteria_scores": {
+            "type": "object",
+            "properties": {c: {"type": "integer", "nullable": True} for c in CRITERIA},
+            "required": list(CRITERIA),
+        },
+        "evidence": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "criterion": {"type": "string", "enum": list(CRITERIA)},
+                    "quote": {"type": "string"},
+                },
+                "required": ["criterion", "quote"],
+            },
+        },
+        "summary": {"type": "string"},
+    },
+    "required": ["relevance", "criteria_scores", "evidence", "summary"],
+}
+
+
+def _relevance(value):
+    """A chunk's relevance as a number in 0-100, or None if the model returned anything else."""
+    if isinstance(value, bool):
+        return None
+    try:
+        relevance = float(value)
+    except (TypeError, ValueError):
+        return None
+    return relevance if 0 <= relevance <= 100 else None
+
 class RFPAnalyzer:
-    def __init__(self):
-        self.llm = LLMClient()
+    def __init__(self, llm: LLMClient = None):
+        self.llm = llm or LLMClient()
 
+    @traced("rfp_analysis")
     def analyze_rfp(self, rfp_text: str):
+        """
+        Score an RFP for a bid/no-bid decision. Documents longer than one prompt are
+        assessed in full with map-reduce (see analyze_rfp_map_reduce).
+        """
+        if settings.ASSESS_MAP_REDUCE and len(rfp_text) > SINGLE_CALL_CHARS:
+            try:
+                return self.analyze_rfp_map_reduce(rfp_text)
+            except Exception as e:
+                logger.error(f"Map-reduce analysis failed with exception: {e}")
+                return {"error": f"Analysis failed: {str(e)}"}
+
         prompt = f"""
         Analyze the following RFP document text and provide a evaluation in JSON format.
         
         RFP TEXT:
-        {rfp_text[:10000]}
+        {clip(rfp_text, 10000, "analyzer.rfp_text")}
         
         EVALUATE AGAINST:
         1. Business strategy and alignment.
@@ -36,34 +108,142 @@ class RFPAnalyzer:
         }}
         """
         try:
-            response = self.llm.generate_content(prompt)
-            logger.info(f"LLM Response received: {response[:200]}...")
-            
-            # More robust JSON extraction - look for JSON block first
-            json_block_match = re.search(r'```json\s*(\{.*?\})\s*```', response, re.DOTALL | re.IGNORECASE)
-            if json_block_match:
-                json_str = json_block_match.group(1)
-            else:
-                # Fallback to searching for any curly brace block
-                json_match = re.search(r'(\{.*?\})', response, re.DOTALL)
-                if json_match:
-                    json_str = json_match.group(1)
-                else:
-                    logger.error(f"No JSON found in LLM response: {response}")
-                    return {"error": f"AI did not return a valid JSON format. Response started with: {response[:100]}"}
+            # Streamed and parsed key by key; a cut-off answer only re-requests the missing keys
+            data = self.llm.generate_json(prompt, task="score", schema=SCORE_SCHEMA)
+            logger.info(f"LLM Response received: {json.dumps(data)[:200]}...")
+            if not data:
+                logger.error("No JSON object in LLM response")
+                return {"error": "AI did not return a valid JSON response"}
+            # Basic validation of required fields
+            if "score" in data and "recommendation" in data:
+                return data
+            logger.error(f"JSON missing required fields: {data}")
+            return {"error": "AI response missing 'score' or 'recommendation'"}
 
-            try:
-                data = json.loads(json_str)
-                # Basic validation of required fields
-                if "score" in data and "recommendation" in data:
-                    return data
-                else:
-                    logger.error(f"JSON missing required fields: {data}")
-                    return {"error": "AI response missing 'score' or 'recommendation'"}
-            except json.JSONDecodeError as e:
-                logger.error(f"Failed to parse JSON: {e}. Raw JSON str: {json_str}")
-                return {"error": f"Failed to parse AI response as JSON: {str(e)}"}
-                
         except Exception as e:
             logger.error(f"Analysis failed with exception: {e}")
             return {"error": f"Analysis failed: {str(e)}"}
+
+    def analyze_rfp_map_reduce(self, rfp_text: str):
+        """
+        Assess the whole document: split it into section-aware chunks, score each chunk
+        in parallel (map), then combine relevance-weighted criterion scores and the
+        strongest evidence quotes (reduce). Wall-clock time stays close to one LLM call.
+        """
+        chunk_chars = settings.ASSESS_CHUNK_CHARS
+        chunks = split_sections(rfp_text, chunk_chars)
+        while len(chunks) > settings.ASSESS_MAX_CHUNKS:
+            chunk_chars = int(chunk_chars * 1.25)
+            chunks = split_sections(rfp_text, chunk_chars)
+        logger.info(f"Map-reduce assessment: {len(rfp_text)} chars in {len(chunks)} chunks")
+
+        with ThreadPoolExecutor(max_workers=min(settings.ASSESS_MAP_WORKERS, len(chunks))) as pool:
+            futures = [
+                pool.submit(contextvars.copy_context().run, self._score_chunk, i, len(chunks), chunk)
+                for i, chunk in enumerate(chunks)
+            ]
+            results = [f.result() for f in futures]
+
+        with trace("rfp_analysis.reduce"):
+            return self._reduce_chunk_scores(chunks, results, len(rfp_text))
+
+    def _score_chunk(self, index: int, total: int, chunk: dict):
+        """Map step: score one excerpt. Returns the parsed dict, or None if the model's answer was unusable."""
+        prompt = f"""
+        You are assessing one excerpt (part {index + 1} of {total}, section "{chunk['title']}") of a longer RFP
+        for a bid/no-bid decision. Judge ONLY what this excerpt reveals.
+
+        EXCERPT:
+        {chunk['text']}
+
+        SCORE AGAINST (use null when the excerpt says nothing about a criterion):
+        1. strategy - business strategy and alignment.
+        2. offerings - core offerings fit.
+        3. resources - resource availability.
+        4. risks - risk and compliance (high = low risk).
+
+        RETURN JSON ONLY:
+        {{
+            "relevance": (0-100, how much this excerpt bears on the decision; evaluation criteria, scope, resourcing and risk terms are high, boilerplate is low),
+            "criteria_scores": {{
+                "strategy": (0-100 or null),
+                "offerings": (0-100 or null),
+                "resources": (0-100 or null),
+                "risks": (0-100 or null)
+            }},
+            "evidence": [
+                {{"criterion": "strategy|offerings|resources|risks", "quote": "verbatim quote of at most 25 words"}}
+            ],
+            "summary": "One sentence on what this excerpt means for the bid"
+        }}
+        """
+        with trace("rfp_analysis.map"):
+            data = self.llm.generate_json(prompt, task="section_score", schema=SECTION_SCORE_SCHEMA,
+                                          required=["relevance", "criteria_scores"])
+            if not data:
+                logger.warning(f"Chunk {index + 1}/{total} returned no JSON")
+                return None
+            if not isinstance(data.get("criteria_scores"), dict):
+                logger.warning(f"Chunk {index + 1}/{total} JSON missing 'criteria_scores'")
+                return None
+            relevance = _relevance(data.get("relevance"))
+            if relevance is None:
+                logger.warning(f"Chunk {index + 1}/{total} has invalid relevance {data.get('relevance')!r}")
+                return None
+            return {**data, "relevance": relevance}
+
+    def _reduce_chunk_scores(self, chunks: list, results: list, total_chars: int):
+        """Reduce step: relevance-weighted mean per criterion, with the top evidence quotes cited by section."""
+        scored = [(chunk, i, r) for i, (chunk, r) in enumerate(zip(chunks, results)) if r]
+        if not scored:
+            return {"error": "Analysis failed: no section of the RFP could be assessed"}
+
+        criteria_scores = {}
+        evidence = {}
+        for criterion in CRITERIA:
+            weighted, weights = 0.0, 0.0
+            for chunk, i, result in scored:
+                value = result["criteria_scores"].get(criterion)
+                if not isinstance(value, (int, float)):
+                    continue
+                weight = max(result["relevance"], 5.0)
+                weighted += weight * value
+                weights += weight
+            if weights:
+                criteria_scores[criterion] = round(weighted / weights)
+
+            quotes = []
+            for chunk, i, result in scored:
+                for item in result.get("evidence") or []:
+                    if isinstance(item, dict) and item.get("criterion") == criterion and item.get("quote"):
+                        quotes.append({
+                            "quote": item["quote"],
+                            "section": chunk["title"],
+                            "chunk": i + 1,
+                            "offset": chunk["start"],
+                            "relevance": result.get("relevance"),
+                        })
+            quotes.sort(key=lambda q: q["relevance"], reverse=True)
+            evidence[criterion] = quotes[:3]
+
+        if not criteria_scores:
+            return {"error": "AI response missing 'score' or 'recommendation'"}
+        score = round(sum(criteria_scores.values()) / len(criteria_scores))
+
+        findings = sorted(scored, key=lambda item: item[2]["relevance"], reverse=True)
+        highlights = " ".join(
+            f"[{chunk['title']}] {result['summary']}" for chunk, _, result in findings[:3] if result.get("summary")
+        )
+        return {
+            "score": score,
+            "recommendation": "Pursue" if score >= settings.ASSESS_PURSUE_THRESHOLD else "No-Pursue",
+            "criteria_scores": criteria_scores,
+            "reasoning": f"Assessed all {len(chunks)} sections of the RFP ({len(scored)} scored). {highlights}".strip(),
+            "evidence": evidence,
+            "coverage": {
+                "mode": "map-reduce",
+                "chars": total_chars,
+                "chunks": len(chunks),
+                "chunks_scored": len(scored),
+            },
+        }
@@ -0,0 +1,92 @@
+import asyncio
+import hashlib
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+def content_key(*parts) -> str:
+    """
+    Build a stable key from raw bytes and/or parameters.
+    Bytes are hashed with sha256; everything else is included as text.
+    """
+    digest = hashlib.sha256()
+    for part in parts:
+        if isinstance(part, (bytes, bytearray, memoryview)):
+            digest.update(bytes(part))
+        else:
+            digest.update(str(part if part is not None else "").encode("utf-8"))
+        digest.update(b"\x00")
+    return digest.hexdigest()
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    def __init__(self, name: str = "single-flight"):
+        """
+        Collapse concurrent calls with the same key into one execution.
+        Callers arriving while a call is in flight wait for it and share its result
+        (or its exception). Nothing is cached once the call completes.
+        """
+        self.name = name
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._async_calls = {}
+
+    def do(self, key, fn, *args, **kwargs):
+        """Run fn(*args, **kwargs) once per key across threads."""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+
+        if not leader:
+            logger.info(f"[{self.name}] joining in-flight call for {str(key)[:80]}")
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn(*args, **kwargs)
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+
+    async def do_async(self, key, fn):
+        """Await fn() once per key on the running event loop."""
+        future = self._async_calls.get(key)
+        if future is not None:
+            logger.info(f"[{self.name}] joining in-flight request for {str(key)[:80]}")
+            return await asyncio.shield(future)
+
+        future = asyncio.get_running_loop().create_future()
+        self._async_calls[key] = future
+        try:
+            result = await fn()
+            future.set_result(result)
+            return result
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            # Mark as retrieved so an unwaited future doesn't log a warning
+            future.exception()
+            raise
+        finally:
+            self._async_calls.pop(key, None)
@@ -0,0 +1,279 @@
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urljoin, urlsplit
+from urllib.robotparser import RobotFileParser
+import asyncio
+import hashlib
+import logging
+import re
+import time
+from config import settings
+from .single_flight import SingleFlight
+from .telemetry import trace
+from .web_scraper import WebScraper, WebsiteCache, normalize_url
+
+logger = logging.getLogger(__name__)
+
+SKIP_EXTENSIONS = (
+    '.pdf', '.jpg', '.jpeg', '.png', '.gif', '.svg', '.webp', '.ico', '.zip', '.mp4', '.mp3',
+    '.css', '.js', '.json', '.doc', '.docx', '.xls', '.xlsx', '.ppt', '.pptx',
+)
+LOC_PATTERN = re.compile(r'<loc>\s*(.*?)\s*</loc>', re.IGNORECASE | re.DOTALL)
+# Longest single request the crawl makes; each is further capped by the time left in the budget
+PAGE_TIMEOUT_SECONDS = 10
+ROBOTS_TIMEOUT_SECONDS = 5
+
+_crawl_flight = SingleFlight("site-crawl")
+
+
+class _CrawlResult:
+    def __init__(self, documents: list):
+        self.documents = documents
+        self.validated_at = time.time()
+
+
+# Crawled sites by normalized start URL, least recently used dropped first
+_crawl_cache = WebsiteCache(
+    ttl_seconds=settings.WEB_CACHE_TTL_SECONDS,
+    max_entries=settings.SITE_CRAWL_CACHE_MAX_ENTRIES,
+)
+
+
+def _timeout(limit: float, deadline: float = None) -> float:
+    """A request timeout of at most `limit` seconds that also ends by `deadline` (time.monotonic())."""
+    if deadline is None:
+        return limit
+    return min(limit, deadline - time.monotonic())
+
+
+def _site_key(host: str) -> str:
+    """Treat example.com and www.example.com as the same site."""
+    return host[4:] if host.startswith('www.') else host
+
+
+class SiteCrawler:
+    def __init__(self, scraper: WebScraper = None, max_pages: int = None, max_concurrency: int = None,
+                 per_host_concurrency: int = None, time_budget: float = None, max_depth: int = None):
+        """
+        Breadth-first crawler for a company website. Seeds from the sitemap and
+        the landing page, follows same-site links up to max_depth hops (skipping
+        paths robots.txt disallows), and fetches pages concurrently (bounded
+        globally and per host) until max_pages or the time budget is hit. The
+        budget covers the whole crawl, robots.txt and sitemaps included.
+        """
+        self.scraper = scraper or WebScraper()
+        self.max_pages = max_pages or settings.SITE_CRAWL_MAX_PAGES
+        self.max_concurrency = max_concurrency or settings.SITE_CRAWL_CONCURRENCY
+        self.per_host_concurrency = per_host_concurrency or settings.SITE_CRAWL_PER_HOST_CONCURRENCY
+        self.time_budget = time_budget or settings.SITE_CRAWL_TIME_BUDGET_SECONDS
+        self.max_depth = settings.SITE_CRAWL_MAX_DEPTH if max_depth is None else max_depth
+
+    def crawl_as_documents(self, start_url: str) -> list:
+        """
+        Crawl a site and return its pages in the same shape as Drive source documents.
+        The landing page is left out: drafts already get it from the website scrape.
+        Results are cached per site for the website cache TTL; concurrent crawls are shared.
+        """
+        if not start_url:
+            return []
+
+        start_url = normalize_url(start_url)
+        cached = _crawl_cache.get(start_url)
+        if cached is not None and _crawl_cache.is_fresh(cached):
+            return cached.documents
+
+        def run():
+            pages = [page for page in asyncio.run(self.crawl(start_url)) if page['url'] != start_url]
+            documents = [
+                {
+                    'id': page['url'],
+                    'name': f"Website: {urlsplit(page['url']).path or '/'}",
+                    'content': page['content'],
+                    'modified': '',
+                    'url': page['url'],
+                }
+                for page in pages
+            ]
+            _crawl_cache.put(start_url, _CrawlResult(documents))
+            return documents
+
+        try:
+            with trace("site_crawl"):
+                return _crawl_flight.do(start_url, run)
+        except Exception as e:
+            logger.error(f"Site crawl failed for {start_url}: {e}")
+            return []
+
+    async def crawl(self, start_url: str) -> list:
+        """
+        Crawl from start_url and return a list of {"url", "content"} dicts, within the time budget.
+        Every request's timeout is capped by the time left, and fetches still running at the
+        deadline are abandoned rather than awaited.
+        """
+        start_url = normalize_url(start_url)
+        site = _site_key(urlsplit(start_url).hostname or '')
+        loop = asyncio.get_running_loop()
+        started = time.monotonic()
+        deadline = started + self.time_budget
+
+        # Own threads, so returning at the deadline does not wait for fetches still in flight
+        executor = ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix="site-crawl")
+
+        async def in_thread(func, *args):
+            return await loop.run_in_executor(executor, func, *args)
+
+        host_slots = defaultdict(lambda: asyncio.Semaphore(self.per_host_concurrency))
+        queue = asyncio.Queue()
+        seen_urls = set()
+        seen_hashes = set()
+        pages = []
+        stats = {"fetched": 0, "duplicates": 0, "errors": 0}
+        robots = None
+
+        def enqueue(url, depth):
+            if url in seen_urls or len(seen_urls) >= self.max_pages * 5 or depth > self.max_depth:
+                return
+            if robots is not None and not robots.can_fetch(self.scraper.headers['User-Agent'], url):
+                return
+            seen_urls.add(url)
+            queue.put_nowait((url, depth))
+
+        async def seed():
+            nonlocal robots
+            robots = await in_thread(self._read_robots, start_url, deadline)
+            enqueue(start_url, 0)
+            for url in await in_thread(self._sitemap_urls, start_url, site, robots, deadline):
+                enqueue(url, 1)
+            await queue.join()
+
+        async def worker():
+            while True:
+                url, depth = await queue.get()
+                try:
+                    if len(pages) >= self.max_pages:
+                        continue
+                    host = urlsplit(url).hostname or ''
+                    async with host_slots[host]:
+                        timeout = _timeout(PAGE_TIMEOUT_SECONDS, deadline)
+                        if timeout <= 0:
+                            continue
+                        result = await in_thread(self._fetch_page, url, site, timeout)
+                    if result is None:
+                        stats["errors"] += 1
+                        continue
+                    stats["fetched"] += 1
+                    text, links = result
+
+                    digest = hashlib.sha256(text.encode('utf-8')).hexdigest()
+                    if not text or digest in seen_hashes:
+                        stats["duplicates"] += 1
+                    elif len(pages) < self.max_pages:
+                        seen_hashes.add(digest)
+                        pages.append({"url": url, "content": text})
+
+                    for link in links:
+                        enqueue(link, depth + 1)
+                finally:
+                    queue.task_done()
+
+        workers = [asyncio.create_task(worker()) for _ in range(self.max_concurrency)]
+        try:
+            await asyncio.wait_for(seed(), timeout=self.time_budget)
+        except asyncio.TimeoutError:
+            logger.warning(f"Site crawl of {start_url} hit its {self.time_budget}s time budget")
+        finally:
+            for task in workers:
+                task.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        logger.info(
+            f"Crawled {start_url}: {len(pages)} pages kept, {stats['fetched']} fetched, "
+            f"{stats['duplicates']} duplicates, {stats['errors']} errors in {time.monotonic() - started:.1f}s"
+        )
+        return pages
+
+    def _fetch_page(self, url: str, site: str, timeout: float = PAGE_TIMEOUT_SECONDS):
+        """Fetch and parse one page (runs in a worker thread). Returns (text, links) or None."""
+        try:
+            html = self.scraper.fetch_html(url, timeout=timeout)
+        except Exception as e:
+            logger.info(f"Crawler skipped {url}: {e}")
+            return None
+        if not html:
+            return None
+
+        soup = self.scraper.make_soup(html)
+        links = self._extract_links(soup, url, site)
+        return self.scraper.soup_to_text(soup), links
+
+    def _extract_links(self, soup, base_url: str, site: str) -> list:
+        links = []
+        for anchor in soup.find_all('a', href=True):
+            href = anchor['href'].strip()
+            if not href or href.startswith(('mailto:', 'tel:', 'javascript:', '#')):
+                continue
+            url = self._same_site_url(urljoin(base_url, href), site)
+            if url:
+                links.append(url)
+        return links
+
+    def _same_site_url(self, url: str, site: str):
+        parts = urlsplit(url)
+        if parts.scheme not in ('http', 'https'):
+            return None
+        if _site_key(parts.hostname or '') != site:
+            return None
+        if parts.path.lower().endswith(SKIP_EXTENSIONS):
+            return None
+        return normalize_url(url)
+
+    def _read_robots(self, start_url: str, deadline: float = None):
+        """The site's parsed robots.txt, or None when it has none (everything may be crawled)."""
+        parts = urlsplit(start_url)
+        robots_url = f"{parts.scheme}://{parts.netloc}/robots.txt"
+        timeout = _timeout(ROBOTS_TIMEOUT_SECONDS, deadline)
+        if timeout <= 0:
+            return None
+        try:
+            response = self.scraper.session.get(robots_url, headers=self.scraper.headers, timeout=timeout)
+        except Exception as e:
+            logger.info(f"No robots.txt for {robots_url}: {e}")
+            return None
+        if not response.ok:
+            return None
+        robots = RobotFileParser(robots_url)
+        robots.parse(response.text.splitlines())
+        return robots
+
+    def _sitemap_urls(self, start_url: str, site: str, robots: RobotFileParser = None,
+                      deadline: float = None) -> list:
+        """Collect page URLs from robots.txt sitemaps or /sitemap.xml, following one level of index files."""
+        parts = urlsplit(start_url)
+        origin = f"{parts.scheme}://{parts.netloc}"
+
+        sitemaps = (robots.site_maps() if robots is not None else None) or [f"{origin}/sitemap.xml"]
+
+        urls = []
+        for _ in range(2):
+            nested = []
+            for sitemap_url in sitemaps[:10]:
+                timeout = _timeout(ROBOTS_TIMEOUT_SECONDS, deadline)
+                if timeout <= 0:
+                    return urls[:self.max_pages * 2]
+                try:
+                    xml = self.scraper.fetch_html(sitemap_url, timeout=timeout) or ''
+                except Exception:
+                    continue
+                for loc in LOC_PATTERN.findall(xml):
+                    if loc.lower().endswith('.xml'):
+                        nested.append(loc)
+                    else:
+                        url = self._same_site_url(loc, site)
+                        if url:
+                            urls.append(url)
+            sitemaps = nested
+            if not sitemaps:
+                break
+
+        return urls[:self.max_pages * 2]
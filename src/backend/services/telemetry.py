@@ -0,0 +1,236 @@
+import contextvars
+import functools
+import logging
+import threading
+import time
+from config import settings
+from .profiling import profile_var
+
+logger = logging.getLogger(__name__)
+
+# Request ID for the current request; copied into worker threads with the context
+request_id_var = contextvars.ContextVar("request_id", default="-")
+# Innermost trace() stage currently running, used to attribute LLM usage
+stage_var = contextvars.ContextVar("stage", default="-")
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+SIZE_BUCKETS = (100, 1000, 5000, 10000, 50000, 100000, 250000, 500000, 1000000)
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labelnames, values, extra=None) -> str:
+    pairs = list(zip(labelnames, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help_text: str, labelnames=()):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {value}")
+        return lines
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[0][i] += 1
+            state[1] += value
+            state[2] += 1
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            for key, (counts, total, count) in sorted(self._values.items()):
+                for bound, bucket_count in zip(self.buckets, counts):
+                    lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, ('le', bound))} {bucket_count}")
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, ('le', '+Inf'))} {count}")
+                lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {total}")
+                lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls, name, *args, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, *args, **kwargs)
+            return metric
+
+    def counter(self, name: str, help_text: str, labelnames=()) -> Counter:
+        return self._get_or_create(Counter, name, help_text, labelnames)
+
+    def gauge(self, name: str, help_text: str, labelnames=()) -> Gauge:
+        return self._get_or_create(Gauge, name, help_text, labelnames)
+
+    def histogram(self, name: str, help_text: str, labelnames=(), buckets=LATENCY_BUCKETS) -> Histogram:
+        return self._get_or_create(Histogram, name, help_text, labelnames, buckets)
+
+    def render(self) -> str:
+        """Render every metric in the Prometheus text exposition format."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+STAGE_SECONDS = REGISTRY.histogram(
+    "rfp_stage_duration_seconds", "Time spent in each processing stage", ("stage",))
+STAGE_ERRORS = REGISTRY.counter(
+    "rfp_stage_errors_total", "Processing stages that raised an exception", ("stage",))
+HTTP_SECONDS = REGISTRY.histogram(
+    "rfp_http_request_duration_seconds", "HTTP request latency", ("method", "route", "status"))
+LLM_SECONDS = REGISTRY.histogram(
+    "rfp_llm_request_duration_seconds", "LLM generate_content latency", ("model", "outcome"))
+LLM_PROMPT_CHARS = REGISTRY.histogram(
+    "rfp_llm_prompt_chars", "LLM prompt size in characters", ("model",), SIZE_BUCKETS)
+LLM_RESPONSE_CHARS = REGISTRY.histogram(
+    "rfp_llm_response_chars", "LLM response size in characters", ("model",), SIZE_BUCKETS)
+
+
+class _Span:
+    __slots__ = ("stage", "observe", "started", "token", "profile", "profiler")
+
+    def __init__(self, stage: str, observe: bool):
+        self.stage = stage
+        self.observe = observe
+        self.started = 0.0
+        self.token = None
+        self.profile = None
+        self.profiler = None
+
+    def __enter__(self):
+        self.token = stage_var.set(self.stage)
+        # Only requests opted into profiling pay for more than this lookup
+        self.profile = profile_var.get()
+        if self.profile is not None:
+            self.profiler = self.profile.enter()
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        elapsed = time.perf_counter() - self.started
+        stage_var.reset(self.token)
+        if self.profile is not None:
+            self.profile.exit(self.profiler, self.stage, elapsed)
+        if not self.observe:
+            return False
+        STAGE_SECONDS.observe(elapsed, stage=self.stage)
+        if exc_type is not None:
+            STAGE_ERRORS.inc(stage=self.stage)
+        logger.debug(f"stage={self.stage} duration={elapsed:.3f}s")
+        return False
+
+
+def trace(stage: str):
+    """
+    Context manager timing a stage into rfp_stage_duration_seconds. The stage name is
+    tracked even when metrics are off so LLM usage can still be attributed to it.
+    """
+    return _Span(stage, settings.METRICS_ENABLED)
+
+
+def traced(stage: str):
+    """Decorator form of trace()."""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with trace(stage):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def record_llm_call(model: str, seconds: float, prompt_chars: int, response_chars: int, ok: bool):
+    if not settings.METRICS_ENABLED:
+        return
+    LLM_SECONDS.observe(seconds, model=model, outcome="ok" if ok else "error")
+    LLM_PROMPT_CHARS.observe(prompt_chars, model=model)
+    LLM_RESPONSE_CHARS.observe(response_chars, model=model)
+
+
+class RequestIdFilter(logging.Filter):
+    """Stamp every log record with the current request ID."""
+
+    def filter(self, record):
+        record.request_id = request_id_var.get()
+        return True
+
+
+def configure_logging():
+    """Install a root handler whose format includes the request ID."""
+    root = logging.getLogger()
+    if not root.handlers:
+        logging.basicConfig(
+            level=settings.LOG_LEVEL,
+            format="%(asctime)s %(levelname)s [%(request_id)s] %(name)s: %(message)s",
+        )
+    for handler in root.handlers:
+        if not any(isinstance(f, RequestIdFilter) for f in handler.filters):
+            handler.addFilter(RequestIdFilter())
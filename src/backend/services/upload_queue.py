@@ -0,0 +1,204 @@
+import json
+import logging
+import os
+import queue
+import re
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from config import settings
+from .telemetry import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+UPLOAD_QUEUE_DEPTH = REGISTRY.gauge("rfp_upload_queue_depth", "Drive uploads waiting for a background worker")
+UPLOAD_JOBS = REGISTRY.counter("rfp_upload_jobs_total", "Background Drive upload jobs by outcome", ("result",))
+
+JOB_ID_PATTERN = re.compile(r"[0-9a-f]{32}")
+# How often a queue looks for job records that other workers have left to expire
+SWEEP_SECONDS = 60
+# Unfinished records older than this belong to a worker that stopped mid-upload
+STALE_JOB_SECONDS = 24 * 3600
+
+
+class UploadQueue:
+    def __init__(self, directory: str = None, max_jobs: int = None, workers: int = None, keep_seconds: int = None):
+        """
+        Drive uploads off the request path. submit() stages the file and returns a job at
+        once; a few worker threads drain a bounded queue, and clients poll the job for
+        the Drive link. Finished jobs are kept for `keep_seconds`. Each job's status is
+        also written to "<job_id>.json" in `directory`, so any worker sharing it can answer a poll.
+        """
+        self.directory = directory or os.path.join(tempfile.gettempdir(), "rfp_uploads")
+        self.max_jobs = max_jobs or settings.UPLOAD_QUEUE_MAX_JOBS
+        self.workers = workers or settings.UPLOAD_QUEUE_WORKERS
+        self.keep_seconds = keep_seconds or settings.UPLOAD_JOB_TTL_SECONDS
+        os.makedirs(self.directory, exist_ok=True)
+        self._queue = queue.Queue(maxsize=self.max_jobs)
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._threads = []
+        self._swept = 0.0
+
+    def _record_path(self, job_id: str) -> str:
+        return os.path.join(self.directory, f"{job_id}.json")
+
+    def _save(self, job: dict):
+        try:
+            fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(job, f)
+            os.replace(temp_path, self._record_path(job["job_id"]))
+        except OSError as e:
+            logger.warning(f"Could not save upload job {job['job_id']}: {e}")
+
+    def _load(self, job_id: str):
+        try:
+            with open(self._record_path(job_id), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _remove_record(self, job_id: str):
+        try:
+            os.remove(self._record_path(job_id))
+        except OSError:
+            pass
+
+    def submit(self, drive_client, file_path: str, filename: str):
+        """Queue an upload of a copy of file_path. Returns the job dict, or None when the queue is full."""
+        self._prune()
+        job_id = uuid.uuid4().hex
+        # The job owns its copy, so the original can be evicted or moved before the upload runs
+        staged_path = os.path.join(self.directory, job_id)
+        try:
+            os.link(file_path, staged_path)
+        except OSError:
+            shutil.copyfile(file_path, staged_path)
+        job = {
+            "job_id": job_id,
+            "status": "queued",
+            "filename": filename,
+            "size": os.path.getsize(staged_path),
+            "file_id": None,
+            "drive_url": None,
+            "error": None,
+            "submitted": time.time(),
+            "finished": None,
+        }
+        with self._lock:
+            self._jobs[job_id] = job
+        # Saved before queueing so a worker's later status update is never overwritten
+        self._save(job)
+        try:
+            self._queue.put_nowait((job_id, drive_client, staged_path))
+        except queue.Full:
+            with self._lock:
+                self._jobs.pop(job_id, None)
+            self._remove_record(job_id)
+            os.remove(staged_path)
+            logger.warning(f"Upload queue full ({self.max_jobs} jobs); not queueing {filename}")
+            return None
+        UPLOAD_QUEUE_DEPTH.set(self._queue.qsize())
+        self._start_workers()
+        return dict(job)
+
+    def get(self, job_id: str):
+        """A snapshot of the job, or None if unknown or expired (submitted to any worker)."""
+        self._prune()
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job:
+                return dict(job)
+        if not JOB_ID_PATTERN.fullmatch(job_id or ""):
+            return None
+        job = self._load(job_id)
+        if job is None or self._expired(job, time.time()):
+            return None
+        return job
+
+    def _start_workers(self):
+        with self._lock:
+            self._threads = [t for t in self._threads if t.is_alive()]
+            while len(self._threads) < self.workers:
+                thread = threading.Thread(target=self._work, name="drive-upload", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def _work(self):
+        while True:
+            job_id, drive_client, staged_path = self._queue.get()
+            UPLOAD_QUEUE_DEPTH.set(self._queue.qsize())
+            try:
+                self._run(job_id, drive_client, staged_path)
+            finally:
+                self._queue.task_done()
+
+    def _run(self, job_id: str, drive_client, staged_path: str):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return
+            job["status"] = "uploading"
+            filename = job["filename"]
+            snapshot = dict(job)
+        self._save(snapshot)
+        update = {}
+        try:
+            result = drive_client.upload_file(staged_path, filename=filename, raise_errors=True)
+            update = {"status": "done", "file_id": result.get("id"), "drive_url": result.get("url"),
+                      "filename": result.get("name") or filename}
+            UPLOAD_JOBS.inc(result="done")
+        except Exception as e:
+            logger.error(f"Background upload of {filename} failed: {e}")
+            update = {"status": "failed", "error": str(e)}
+            UPLOAD_JOBS.inc(result="failed")
+        finally:
+            try:
+                os.remove(staged_path)
+            except OSError:
+                pass
+            with self._lock:
+                job = self._jobs.get(job_id)
+                if job is not None:
+                    job.update(update, finished=time.time())
+                    snapshot = dict(job)
+            if job is not None:
+                self._save(snapshot)
+
+    def wait(self, timeout: float = None) -> bool:
+        """Block until every queued upload has finished (tests, shutdown). False on timeout."""
+        deadline = None if timeout is None else time.time() + timeout
+        while self._queue.unfinished_tasks:
+            if deadline is not None and time.time() > deadline:
+                return False
+            time.sleep(0.01)
+        return True
+
+    def _expired(self, job: dict, now: float) -> bool:
+        if job.get("finished"):
+            return job["finished"] < now - self.keep_seconds
+        return (job.get("submitted") or 0) < now - STALE_JOB_SECONDS
+
+    def _prune(self):
+        """Drop expired jobs; every SWEEP_SECONDS also remove expired records other workers wrote."""
+        now = time.time()
+        with self._lock:
+            expired = [j for j, job in self._jobs.items() if self._expired(job, now)]
+            for job_id in expired:
+                del self._jobs[job_id]
+            sweep = now - self._swept >= SWEEP_SECONDS
+            if sweep:
+                self._swept = now
+            own = set(self._jobs)
+        if sweep:
+            for name in os.listdir(self.directory):
+                job_id = name[:-len(".json")]
+                if name.endswith(".json") and job_id not in own and JOB_ID_PATTERN.fullmatch(job_id):
+                    job = self._load(job_id)
+                    if job is not None and self._expired(job, now):
+                        expired.append(job_id)
+        for job_id in expired:
+            self._remove_record(job_id)
@@ -0,0 +1,218 @@
+from collections import OrderedDict
+import contextvars
+import logging
+import threading
+import time
+from config import settings
+from .telemetry import REGISTRY, request_id_var, stage_var
+
+logger = logging.getLogger(__name__)
+
+# Per-request holder for details only known once routing is done (route template)
+request_info_var = contextvars.ContextVar("request_info", default=None)
+
+LLM_TOKENS = REGISTRY.counter(
+    "rfp_llm_tokens_total", "LLM tokens consumed", ("model", "stage", "direction"))
+TRUNCATION_EVENTS = REGISTRY.counter(
+    "rfp_truncation_events_total", "Inputs cut to fit a prompt budget", ("source",))
+TRUNCATED_CHARS = REGISTRY.counter(
+    "rfp_truncated_chars_total", "Characters dropped from prompts by truncation", ("source",))
+
+
+def estimate_cost(input_tokens: int, output_tokens: int) -> float:
+    return (input_tokens * settings.LLM_INPUT_COST_PER_MTOK
+            + output_tokens * settings.LLM_OUTPUT_COST_PER_MTOK) / 1_000_000
+
+
+def _percentile(values: list, pct: float) -> int:
+    if not values:
+        return 0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))]
+
+
+class RequestUsage:
+    def __init__(self, request_id: str, info: dict = None):
+        """LLM calls and truncation events attributed to one request."""
+        self.request_id = request_id
+        self.info = info if info is not None else {"method": None, "route": "background"}
+        self.started = time.time()
+        self.calls = 0
+        self.estimated_calls = 0
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self.by_stage = {}
+        self.by_model = {}
+        self.truncations = {}
+
+    @property
+    def route(self) -> str:
+        return self.info.get("route") or "unmatched"
+
+    def add_call(self, model: str, stage: str, input_tokens: int, output_tokens: int, estimated: bool):
+        self.calls += 1
+        self.estimated_calls += int(estimated)
+        self.input_tokens += input_tokens
+        self.output_tokens += output_tokens
+        for table, key in ((self.by_stage, stage), (self.by_model, model)):
+            entry = table.setdefault(key, {"calls": 0, "input_tokens": 0, "output_tokens": 0})
+            entry["calls"] += 1
+            entry["input_tokens"] += input_tokens
+            entry["output_tokens"] += output_tokens
+
+    def add_truncation(self, source: str, original_chars: int, kept_chars: int):
+        entry = self.truncations.setdefault(source, {"events": 0, "chars_dropped": 0, "max_original_chars": 0})
+        entry["events"] += 1
+        entry["chars_dropped"] += original_chars - kept_chars
+        entry["max_original_chars"] = max(entry["max_original_chars"], original_chars)
+
+    def summary(self) -> dict:
+        return {
+            "request_id": self.request_id,
+            "method": self.info.get("method"),
+            "route": self.route,
+            "started": self.started,
+            "llm_calls": self.calls,
+            "estimated_calls": self.estimated_calls,
+            "input_tokens": self.input_tokens,
+            "output_tokens": self.output_tokens,
+            "estimated_cost_usd": round(estimate_cost(self.input_tokens, self.output_tokens), 6),
+            "by_stage": self.by_stage,
+            "by_model": self.by_model,
+            "truncations": self.truncations,
+        }
+
+
+class UsageLedger:
+    def __init__(self, max_requests: int, window_seconds: int):
+        """
+        Rolling record of LLM usage per request ID. Keeps at most `max_requests`
+        requests (oldest evicted first); reports cover the last `window_seconds`.
+        """
+        self.max_requests = max_requests
+        self.window_seconds = window_seconds
+        self._requests = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _current(self) -> RequestUsage:
+        # Caller holds the lock
+        request_id = request_id_var.get()
+        record = self._requests.get(request_id)
+        if record is None:
+            record = self._requests[request_id] = RequestUsage(request_id, request_info_var.get())
+            while len(self._requests) > self.max_requests:
+                self._requests.popitem(last=False)
+        return record
+
+    def record_llm_call(self, model: str, input_tokens: int, output_tokens: int, estimated: bool = False):
+        stage = stage_var.get()
+        with self._lock:
+            self._current().add_call(model, stage, input_tokens, output_tokens, estimated)
+        if settings.METRICS_ENABLED:
+            LLM_TOKENS.inc(input_tokens, model=model, stage=stage, direction="input")
+            LLM_TOKENS.inc(output_tokens, model=model, stage=stage, direction="output")
+
+    def record_truncation(self, source: str, original_chars: int, kept_chars: int):
+        with self._lock:
+            self._current().add_truncation(source, original_chars, kept_chars)
+        if settings.METRICS_ENABLED:
+            TRUNCATION_EVENTS.inc(source=source)
+            TRUNCATED_CHARS.inc(original_chars - kept_chars, source=source)
+
+    def get(self, request_id: str):
+        with self._lock:
+            record = self._requests.get(request_id)
+            return record.summary() if record else None
+
+    def report(self) -> dict:
+        """Aggregate usage over the rolling window by route, stage, model and truncation source."""
+        cutoff = time.time() - self.window_seconds
+        with self._lock:
+            records = [r for r in self._requests.values() if r.started >= cutoff]
+            summaries = [r.summary() for r in records]
+
+        routes = {}
+        stages = {}
+        models = {}
+        truncations = {}
+        for s in summaries:
+            route = routes.setdefault(s["route"], {
+                "requests": 0, "llm_calls": 0, "input_tokens": 0, "output_tokens": 0,
+                "_per_request": [], "truncated_requests": 0,
+            })
+            route["requests"] += 1
+            route["llm_calls"] += s["llm_calls"]
+            route["input_tokens"] += s["input_tokens"]
+            route["output_tokens"] += s["output_tokens"]
+            route["_per_request"].append(s["input_tokens"])
+            route["truncated_requests"] += int(bool(s["truncations"]))
+
+            for table, source in ((stages, s["by_stage"]), (models, s["by_model"])):
+                for key, entry in source.items():
+                    total = table.setdefault(key, {"calls": 0, "input_tokens": 0, "output_tokens": 0})
+                    for field in total:
+                        total[field] += entry[field]
+
+            for source, entry in s["truncations"].items():
+                total = truncations.setdefault(source, {"events": 0, "chars_dropped": 0, "max_original_chars": 0})
+                total["events"] += entry["events"]
+                total["chars_dropped"] += entry["chars_dropped"]
+                total["max_original_chars"] = max(total["max_original_chars"], entry["max_original_chars"])
+
+        for route in routes.values():
+            per_request = route.pop("_per_request")
+            route["avg_input_tokens"] = route["input_tokens"] // route["requests"]
+            route["p95_input_tokens"] = _percentile(per_request, 95)
+            route["max_input_tokens"] = max(per_request)
+            route["estimated_cost_usd"] = round(estimate_cost(route["input_tokens"], route["output_tokens"]), 6)
+        for source in truncations.values():
+            source["avg_chars_dropped"] = source["chars_dropped"] // source["events"]
+
+        input_tokens = sum(s["input_tokens"] for s in summaries)
+        output_tokens = sum(s["output_tokens"] for s in summaries)
+        return {
+            "window_seconds": self.window_seconds,
+            "requests": len(summaries),
+            "llm_calls": sum(s["llm_calls"] for s in summaries),
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "estimated_cost_usd": round(estimate_cost(input_tokens, output_tokens), 6),
+            "by_route": routes,
+            "by_stage": stages,
+            "by_model": models,
+            "truncations": truncations,
+        }
+
+
+LEDGER = UsageLedger(settings.USAGE_MAX_REQUESTS, settings.USAGE_WINDOW_SECONDS)
+
+
+def record_llm_usage(model: str, response, prompt: str, text: str):
+    """Record token usage from a Vertex response, estimating from characters when metadata is missing."""
+    metadata = getattr(response, "usage_metadata", None)
+    input_tokens = getattr(metadata, "prompt_token_count", None)
+    output_tokens = getattr(metadata, "candidates_token_count", None)
+    estimated = input_tokens is None or output_tokens is None
+    if estimated:
+        # Roughly four characters per token for English text
+        input_tokens, output_tokens = len(prompt) // 4, len(text) // 4
+    LEDGER.record_llm_call(model, int(input_tokens), int(output_tokens or 0), estimated)
+
+
+def clip(text: str, limit: int, source: str) -> str:
+    """Return text[:limit], recording a truncation event for `source` when anything is dropped."""
+    if text is None or len(text) <= limit:
+        return text
+    LEDGER.record_truncation(source, len(text), limit)
+    return text[:limit]
+
+
+def bind_request(method: str):
+    """Start attributing usage in this context to a new request; returns the reset token."""
+    return request_info_var.set({"method": method, "route": None})
+
+
+def set_route(route: str):
+    info = request_info_var.get()
+    if info is not None:
+        info["route"] = route
@@ -0,0 +1,77 @@
+from concurrent.futures import ThreadPoolExecutor
+import logging
+import threading
+import time
+from .telemetry import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+WARMUP_SECONDS = REGISTRY.gauge(
+    "rfp_warmup_stage_seconds", "Time taken by each startup warm-up stage", ("stage", "status"))
+
+
+class Warmup:
+    def __init__(self, timeout_seconds: float = 120):
+        """
+        Tracks the startup warm-up stages (client construction, corpus prefetch, website
+        cache) so /health can hold traffic until the instance is warm. After
+        `timeout_seconds` the instance reports ready regardless, so a slow or broken
+        dependency degrades the first requests instead of keeping the instance out of service.
+        """
+        self.timeout_seconds = timeout_seconds
+        self.started_at = None
+        self.finished_at = None
+        self._stages = {}
+        self._lock = threading.Lock()
+
+    def start(self):
+        self.started_at = time.time()
+        self.finished_at = None
+
+    def finish(self):
+        self.finished_at = time.time()
+        logger.info(f"Warm-up finished in {self.finished_at - self.started_at:.1f}s")
+
+    @property
+    def ready(self) -> bool:
+        """True once warm-up finished or timed out (or was never started)."""
+        if self.started_at is None or self.finished_at is not None:
+            return True
+        return time.time() - self.started_at >= self.timeout_seconds
+
+    def run_stage(self, name: str, fn, *args):
+        """Run one warm-up stage, recording its outcome. Failures are logged and return None."""
+        with self._lock:
+            self._stages[name] = {"status": "running", "seconds": None}
+        started = time.time()
+        try:
+            result = fn(*args)
+            status, error = "ready", None
+        except Exception as e:
+            logger.warning(f"Warm-up stage {name} failed: {e}")
+            result, status, error = None, "failed", str(e)
+        elapsed = time.time() - started
+        WARMUP_SECONDS.set(elapsed, stage=name, status=status)
+        with self._lock:
+            self._stages[name] = {"status": status, "seconds": round(elapsed, 3)}
+            if error:
+                self._stages[name]["error"] = error
+        return result
+
+    def run_in_background(self, stages: dict):
+        """Run {name: fn} stages concurrently on a background thread, then mark warm-up finished."""
+        def run():
+            with ThreadPoolExecutor(max_workers=max(1, len(stages)), thread_name_prefix="warmup") as pool:
+                for future in [pool.submit(self.run_stage, name, fn) for name, fn in stages.items()]:
+                    future.result()
+            self.finish()
+
+        threading.Thread(target=run, name="warmup", daemon=True).start()
+
+    def status(self) -> dict:
+        with self._lock:
+            stages = {name: dict(stage) for name, stage in self._stages.items()}
+        elapsed = None
+        if self.started_at is not None:
+            elapsed = round((self.finished_at or time.time()) - self.started_at, 3)
+        return {"ready": self.ready, "elapsed_seconds": elapsed, "stages": stages}
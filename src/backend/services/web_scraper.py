@@ -1,46 +1,345 @@
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from bs4 import BeautifulSoup, NavigableString
+from collections import OrderedDict
+from html.parser import HTMLParser
+import codecs
+from urllib.parse import urlsplit, urlunsplit
 import logging
+import threading
+import time
+from config import settings
+from .single_flight import SingleFlight
+from .telemetry import trace
 
 logger = logging.getLogger(__name__)
 
+# Shared across scraper instances so concurrent requests fetch a URL once
+_fetch_flight = SingleFlight("website-fetch")
+
+# Elements whose text never reaches the prompt
+SKIP_TAGS = {"script", "style", "nav", "footer", "header", "noscript", "template", "svg"}
+# Elements that start a new line; text inside inline elements (b, a, span, ...) runs on
+BLOCK_TAGS = {
+    "address", "article", "aside", "blockquote", "body", "br", "caption", "dd", "details", "dialog",
+    "div", "dl", "dt", "fieldset", "figcaption", "figure", "form", "h1", "h2", "h3", "h4", "h5", "h6",
+    "head", "hr", "html", "legend", "li", "main", "menu", "ol", "option", "p", "pre", "section",
+    "summary", "table", "tbody", "td", "tfoot", "th", "thead", "title", "tr", "ul",
+}
+
+
+def _phrases(text: str):
+    """Break into lines and multi-headlines into a line each, dropping blanks."""
+    for line in text.splitlines():
+        for phrase in line.split("  "):
+            phrase = phrase.strip()
+            if phrase:
+                yield phrase
+
+
+class _TextCollector:
+    def __init__(self, max_chars: int):
+        """
+        Parser target that gathers visible text as markup streams in and flags
+        `done` once max_chars has been collected, so the caller can stop reading.
+        """
+        self.max_chars = max_chars
+        self.chunks = []
+        self.pending = []
+        self.total = 0
+        self.skip_depth = 0
+        self.done = False
+
+    def start(self, tag, attrib=None):
+        tag = tag.lower()
+        if tag in BLOCK_TAGS or tag in SKIP_TAGS:
+            self._flush()
+        if tag in SKIP_TAGS:
+            self.skip_depth += 1
+
+    def end(self, tag):
+        tag = tag.lower()
+        if tag in BLOCK_TAGS or tag in SKIP_TAGS:
+            self._flush()
+        if tag in SKIP_TAGS and self.skip_depth:
+            self.skip_depth -= 1
+
+    def data(self, text):
+        # Text of inline elements joins the surrounding text; lines break at block elements
+        if not self.skip_depth and not self.done:
+            self.pending.append(text)
+
+    def _flush(self):
+        if not self.pending:
+            return
+        text = ''.join(self.pending)
+        self.pending = []
+        for phrase in _phrases(text):
+            self.chunks.append(phrase)
+            self.total += len(phrase) + 1
+        if self.total >= self.max_chars:
+            self.done = True
+
+    def close(self):
+        self._flush()
+        return '\n'.join(self.chunks)[:self.max_chars]
+
+
+class _StdlibTextParser(HTMLParser):
+    """html.parser adapter feeding a _TextCollector (used when lxml isn't installed)."""
+
+    def __init__(self, collector: _TextCollector):
+        super().__init__(convert_charrefs=True)
+        self.collector = collector
+
+    def handle_starttag(self, tag, attrs):
+        self.collector.start(tag)
+
+    def handle_endtag(self, tag):
+        self.collector.end(tag)
+
+    def handle_data(self, data):
+        self.collector.data(data)
+
+
+def resolve_parser(name: str) -> str:
+    """Return the configured BeautifulSoup backend, falling back to html.parser if it isn't installed."""
+    if name == 'lxml':
+        try:
+            import lxml  # noqa: F401
+        except ImportError:
+            logger.info("lxml not installed - using html.parser for website content")
+            return 'html.parser'
+    return name
+
+
+def normalize_url(url: str) -> str:
+    """
+    Normalize a URL for use as a cache key: default to https, lowercase the
+    scheme and host, drop default ports, fragments and trailing slashes.
+    """
+    url = url.strip()
+    if not url.startswith('http'):
+        url = 'https://' + url
+
+    parts = urlsplit(url)
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or '').lower()
+    port = parts.port
+    if port and not ((scheme == 'http' and port == 80) or (scheme == 'https' and port == 443)):
+        host = f"{host}:{port}"
+    path = parts.path.rstrip('/') or '/'
+    return urlunsplit((scheme, host, path, parts.query, ''))
+
+
+class _CachedPage:
+    def __init__(self, text: str, etag: str = None, last_modified: str = None):
+        self.text = text
+        self.etag = etag
+        self.last_modified = last_modified
+        self.validated_at = time.time()
+
+
+class WebsiteCache:
+    def __init__(self, ttl_seconds: int = 900, max_entries: int = 256):
+        """
+        Cleaned website text keyed by normalized URL, with the validators needed
+        to revalidate it using conditional requests once the TTL has passed.
+        """
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, url: str):
+        with self._lock:
+            entry = self._entries.get(url)
+            if entry is not None:
+                self._entries.move_to_end(url)
+            return entry
+
+    def is_fresh(self, entry: _CachedPage) -> bool:
+        return time.time() - entry.validated_at < self.ttl_seconds
+
+    def put(self, url: str, entry: _CachedPage):
+        with self._lock:
+            self._entries[url] = entry
+            self._entries.move_to_end(url)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+# Shared by every WebScraper (ResponseDrafter, QuestionGenerator, ...) in this process
+_website_cache = WebsiteCache(
+    ttl_seconds=settings.WEB_CACHE_TTL_SECONDS,
+    max_entries=settings.WEB_CACHE_MAX_ENTRIES,
+)
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_http_session() -> requests.Session:
+    """Return the process-wide keep-alive session, creating it on first use."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=16, pool_maxsize=settings.WEB_POOL_MAXSIZE)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            _session = session
+        return _session
+
+
 class WebScraper:
     def __init__(self):
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         }
+        self.session = get_http_session()
+        self.cache = _website_cache
+        self.parser = resolve_parser(settings.HTML_PARSER)
+        self.max_bytes = settings.WEB_MAX_BYTES
+        self.max_chars = 10000 # Limit context size
 
     def get_website_content(self, url: str) -> str:
         """
         Fetches and cleans text content from a provided URL.
+        Results are cached per normalized URL and revalidated after the TTL;
+        concurrent calls for the same URL share a single fetch.
         """
         if not url:
             return ""
-            
+
+        url = normalize_url(url)
+        entry = self.cache.get(url)
+        if entry is not None and self.cache.is_fresh(entry):
+            return entry.text
+
+        with trace("website_fetch"):
+            return _fetch_flight.do(url, self._fetch_website_content, url)
+
+    def _fetch_website_content(self, url: str) -> str:
+        cached = self.cache.get(url)
+        headers = dict(self.headers)
+        if cached is not None:
+            if cached.etag:
+                headers['If-None-Match'] = cached.etag
+            if cached.last_modified:
+                headers['If-Modified-Since'] = cached.last_modified
+
         try:
-            if not url.startswith('http'):
-                url = 'https://' + url
-                
-            response = requests.get(url, headers=self.headers, timeout=10)
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            # Remove script and style elements
-            for script in soup(["script", "style", "nav", "footer", "header"]):
-                script.decompose()
-                
-            text = soup.get_text()
-            
-            # Break into lines and remove leading/trailing space on each
-            lines = (line.strip() for line in text.splitlines())
-            # Break multi-headlines into a line each
-            chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
-            # Drop blank lines
-            text = '\n'.join(chunk for chunk in chunks if chunk)
-            
-            return text[:10000] # Limit context size
-            
+            with self.session.get(url, headers=headers, timeout=10, stream=True) as response:
+                if response.status_code == 304 and cached is not None:
+                    logger.info(f"Website content not modified, reusing cache: {url}")
+                    cached.validated_at = time.time()
+                    return cached.text
+
+                response.raise_for_status()
+                if settings.WEB_STREAMING_EXTRACT:
+                    text = self._stream_text(response)
+                else:
+                    text = self._html_to_text(self._read_capped(response))
+                etag = response.headers.get('ETag')
+                last_modified = response.headers.get('Last-Modified')
+
+            self.cache.put(url, _CachedPage(text, etag=etag, last_modified=last_modified))
+            return text
+
         except Exception as e:
             logger.error(f"Error fetching website content: {e}")
+            if cached is not None:
+                # Serve the last good copy rather than losing the company context
+                logger.warning(f"Serving stale website content for {url}")
+                return cached.text
             return f"Error reading website: {str(e)}"
+
+    def fetch_html(self, url: str, timeout: int = 10):
+        """
+        Fetch a page's raw HTML through the pooled session (uncached).
+        Returns None for non-HTML responses; raises on HTTP errors.
+        """
+        with self.session.get(url, headers=self.headers, timeout=timeout, stream=True) as response:
+            response.raise_for_status()
+            content_type = response.headers.get('Content-Type', '')
+            if content_type and 'html' not in content_type and 'xml' not in content_type:
+                return None
+            return self._read_capped(response)
+
+    def _read_capped(self, response) -> str:
+        """
+        Read at most max_bytes of the body and stop pulling from the socket after that.
+        Parsers cope fine with the truncated tail of an HTML document.
+        """
+        body = bytearray()
+        for chunk in response.iter_content(chunk_size=16 * 1024):
+            body.extend(chunk)
+            if len(body) >= self.max_bytes:
+                logger.info(f"Website body capped at {self.max_bytes} bytes: {response.url}")
+                del body[self.max_bytes:]
+                break
+        return body.decode(response.encoding or 'utf-8', errors='replace')
+
+    def _stream_text(self, response) -> str:
+        """
+        Extract text while the body is still arriving: chunks are fed to an incremental
+        parser and reading stops at the byte budget or once max_chars of text is collected.
+        """
+        collector = _TextCollector(self.max_chars)
+        if self.parser == 'lxml':
+            from lxml import etree
+            parser = etree.HTMLParser(target=collector, encoding=response.encoding)
+            feed = parser.feed
+        else:
+            parser = _StdlibTextParser(collector)
+            decoder = codecs.getincrementaldecoder(response.encoding or 'utf-8')(errors='replace')
+            feed = lambda chunk: parser.feed(decoder.decode(chunk))
+
+        received = 0
+        for chunk in response.iter_content(chunk_size=16 * 1024):
+            received += len(chunk)
+            feed(chunk)
+            if collector.done or received >= self.max_bytes:
+                break
+
+        try:
+            parser.close()
+        except Exception:
+            # Truncated markup is expected when we stop early
+            pass
+        return collector.close()
+
+    def make_soup(self, html: str):
+        return BeautifulSoup(html, self.parser)
+
+    def _html_to_text(self, html: str) -> str:
+        return self.soup_to_text(self.make_soup(html))
+
+    def soup_to_text(self, soup) -> str:
+        """
+        Collect visible text, skipping script/style/navigation subtrees, and stop as
+        soon as max_chars has been gathered instead of flattening the whole page.
+        Inline text is joined as get_text() joins it; block elements start a new line.
+        """
+        collector = _TextCollector(self.max_chars)
+        # None marks the end of a block element's children
+        stack = [soup]
+        while stack and not collector.done:
+            node = stack.pop()
+            if node is None:
+                collector._flush()
+                continue
+            if isinstance(node, NavigableString):
+                # Exact type check skips comments, doctypes and script/style strings
+                if type(node) is NavigableString:
+                    collector.data(str(node))
+                continue
+            if node.name in SKIP_TAGS:
+                continue
+            if node.name in BLOCK_TAGS:
+                collector._flush()
+                stack.append(None)
+            stack.extend(reversed(node.contents))
+
+        return collector.close()
@@ -0,0 +1,275 @@
+from concurrent.futures import ThreadPoolExecutor
+import contextvars
+import logging
+from config import settings
+from .answer_memo import corpus_version, get_answer_memo, is_confirmed_answer
+from .retrieval import get_passage_index
+from .telemetry import trace, traced
+from .usage import clip
+
+try:
+    import pandas as pd
+    import openpyxl
+except ImportError:
+    pd = None
+    openpyxl = None
+
+logger = logging.getLogger(__name__)
+
+# Header keywords, checked in this order so "Compliance Response" is a compliance column
+COMPLIANCE_HEADERS = ("compliance", "compliant", "comply", "complies", "y/n", "yes/no")
+ANSWER_HEADERS = ("response", "answer", "comment", "reply", "supplier", "vendor", "tenderer", "respondent")
+QUESTION_HEADERS = ("question", "requirement", "description", "criteria", "criterion", "specification", "clause")
+COMPLIANCE_VALUES = ("Compliant", "Partially Compliant", "Non-Compliant")
+NOT_FOUND = "[Information not found in knowledge base]"
+MEMO_CONTEXT = "compliance matrix"
+ANSWER_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "answer": {"type": "string"},
+        # Not an enum: "" (sources do not cover it) is allowed and the value is validated after parsing
+        "compliance": {"type": "string"},
+    },
+    "required": ["answer", "compliance"],
+}
+
+
+def normalize_series(values):
+    """Vectorized answer_memo.normalize_text: the key identical questions are deduplicated on."""
+    return (values.str.casefold()
+            .str.replace(r"\s+", " ", regex=True)
+            .str.strip()
+            .str.strip(" :;,.-[]()"))
+
+
+def detect_columns(frame, scan_rows: int = 20):
+    """
+    Find the header row and the question, answer and compliance columns of a response
+    matrix. Returns {"header_row", "question", "answer", "compliance"} (column positions,
+    answer/compliance may be None) or None when the sheet has no question column.
+    """
+    for row in range(min(scan_rows, len(frame))):
+        found = {"header_row": row, "question": None, "answer": None, "compliance": None}
+        for column, value in enumerate(frame.iloc[row]):
+            if not isinstance(value, str):
+                continue
+            label = value.strip().casefold()
+            if any(k in label for k in COMPLIANCE_HEADERS):
+                kind = "compliance"
+            elif any(k in label for k in ANSWER_HEADERS):
+                kind = "answer"
+            elif any(k in label for k in QUESTION_HEADERS):
+                kind = "question"
+            else:
+                continue
+            if found[kind] is None:
+                found[kind] = column
+        if found["question"] is not None:
+            return found
+    return None
+
+
+class ComplianceMatrixResponder:
+    def __init__(self, llm, batch_size: int = None, workers: int = None, context_chars: int = None):
+        """
+        Answers tender response matrices (XLSX). Questions are deduplicated across rows
+        and sheets, answered in concurrent batches with the source passages retrieved for
+        each batch, and written back in a single save that keeps the workbook's formatting.
+        """
+        self.llm = llm
+        self.batch_size = batch_size or settings.XLSX_BATCH_SIZE
+        self.workers = workers or settings.XLSX_WORKERS
+        self.context_chars = context_chars or settings.XLSX_CONTEXT_CHARS
+
+    def _load_questions(self, workbook):
+        """
+        Per-sheet column layout, one (sheet, row, key, question) frame row per unanswered
+        question (at most XLSX_MAX_ROWS), and how many questions beyond that were left out.
+        """
+        layouts, items = {}, []
+        for sheet in workbook.worksheets:
+            rows = list(sheet.iter_rows(min_row=1, min_col=1, values_only=True))
+            if not rows:
+                continue
+            frame = pd.DataFrame(rows)
+            columns = detect_columns(frame)
+            if columns is None:
+                continue
+            if columns["answer"] is None:
+                columns["answer"] = frame.shape[1]
+                columns["add_answer_header"] = True
+            layouts[sheet.title] = columns
+
+            body = frame.iloc[columns["header_row"] + 1:]
+            questions = body[columns["question"]].fillna("").astype(str).str.strip()
+            if columns["answer"] in body.columns:
+                answered = body[columns["answer"]].fillna("").astype(str).str.strip().str.len() > 0
+            else:
+                answered = pd.Series(False, index=body.index)
+            # Short rows without a question mark are section headings, not questions
+            is_question = (questions.str.split().str.len() >= 3) | questions.str.endswith("?")
+            pending = questions[is_question & ~answered]
+            items.append(pd.DataFrame({
+                "sheet": sheet.title,
+                "row": pending.index,
+                "key": normalize_series(pending),
+                "question": pending,
+            }))
+        frame = pd.concat(items, ignore_index=True) if items else pd.DataFrame(columns=["sheet", "row", "key", "question"])
+        skipped = max(0, len(frame) - settings.XLSX_MAX_ROWS)
+        if skipped:
+            logger.warning(f"Response matrix has {len(frame)} unanswered questions; "
+                           f"leaving {skipped} beyond XLSX_MAX_ROWS={settings.XLSX_MAX_ROWS} unanswered")
+        return layouts, frame.head(settings.XLSX_MAX_ROWS), skipped
+
+    def _answer_batch(self, questions: list, index, website_content: str) -> dict:
+        """Answer one batch of questions. Returns {question: {"answer", "compliance"}}."""
+        passages = index.search(" ".join(questions), self.context_chars) if index else []
+        source_context = "".join(
+            f"\n--- {p['document']} / {p['title']} ---\n{p['text']}\n" for p in passages
+        )
+        if website_content:
+            source_context += f"\n--- WEBSITE CONTENT ---\n{clip(website_content, 5000, 'matrix.website')}\n"
+        if not source_context:
+            return {q: {"answer": NOT_FOUND, "compliance": ""} for q in questions}
+
+        numbered = "\n".join(f"{i + 1}. {q}" for i, q in enumerate(questions))
+        prompt = f"""
+        You are completing a tender compliance matrix on behalf of the company.
+        Answer each numbered requirement using ONLY the source information below.
+        Be specific and concise (1-4 sentences), in a professional, confident tone.
+
+        SOURCE INFORMATION:
+        {source_context}
+
+        REQUIREMENTS:
+        {numbered}
+
+        Return a JSON object mapping each requirement number to an object:
+        {{"1": {{"answer": "...", "compliance": "Compliant" or "Partially Compliant" or "Non-Compliant"}}}}
+        If the sources do not cover a requirement, use "{NOT_FOUND}" as the answer and "" as compliance.
+        Return ONLY the JSON object.
+        """
+        numbers = [str(i + 1) for i in range(len(questions))]
+        schema = {
+            "type": "object",
+            "properties": {n: ANSWER_SCHEMA for n in numbers},
+            "required": numbers,
+        }
+        data = self.llm.generate_json(prompt, task="matrix", schema=schema)
+        if not data:
+            logger.warning(f"Matrix batch of {len(questions)} returned no JSON")
+            return {q: {"answer": "[Error: AI provided no structured data]", "compliance": ""} for q in questions}
+
+        answers = {}
+        for i, question in enumerate(questions):
+            entry = data.get(str(i + 1))
+            if isinstance(entry, str):
+                entry = {"answer": entry}
+            if not isinstance(entry, dict) or not entry.get("answer"):
+                entry = {"answer": NOT_FOUND}
+            compliance = entry.get("compliance") or ""
+            answers[question] = {
+                "answer": str(entry["answer"]),
+                "compliance": compliance if compliance in COMPLIANCE_VALUES else "",
+            }
+        return answers
+
+    def answer_questions(self, questions: list, website_content: str = "", source_documents: list = None) -> tuple:
+        """
+        Answer unique questions: memoized answers first, then the rest in concurrent batches.
+        Returns a tuple ({question: {"answer", "compliance"}}, stats), where stats counts
+        memoized answers, LLM batches and unanswered questions.
+        """
+        source_documents = source_documents or []
+        version = corpus_version(source_documents, website_content)
+        memo = get_answer_memo()
+        results = {}
+        if memo:
+            contexts = {q: MEMO_CONTEXT for q in questions}
+            compliance_contexts = {q: f"{MEMO_CONTEXT}: compliance" for q in questions}
+            answers = memo.lookup(questions, contexts, version)
+            compliance = memo.lookup(answers, compliance_contexts, version)
+            results = {q: {"answer": a, "compliance": compliance.get(q, "")} for q, a in answers.items()}
+        remaining = [q for q in questions if q not in results]
+
+        index = get_passage_index(source_documents, version) if source_documents else None
+        batches = [remaining[i:i + self.batch_size] for i in range(0, len(remaining), self.batch_size)]
+        generated = {}
+        if batches:
+            with ThreadPoolExecutor(max_workers=min(self.workers, len(batches))) as pool:
+                futures = [
+                    pool.submit(contextvars.copy_context().run, self._answer_batch, batch, index, website_content)
+                    for batch in batches
+                ]
+                for future in futures:
+                    generated.update(future.result())
+
+        if memo:
+            memo.store({q: r["answer"] for q, r in generated.items()}, {q: MEMO_CONTEXT for q in generated}, version)
+            memo.store(
+                {q: r["compliance"] for q, r in generated.items() if is_confirmed_answer(r["answer"]) and r["compliance"]},
+                {q: f"{MEMO_CONTEXT}: compliance" for q in generated}, version,
+            )
+        results.update(generated)
+        stats = {
+            "memoized": len(questions) - len(remaining),
+            "llm_batches": len(batches),
+            "unanswered": sum(1 for r in results.values() if not is_confirmed_answer(r["answer"])),
+        }
+        return results, stats
+
+    @traced("xlsx_fill")
+    def fill_workbook(self, input_path: str, output_path: str, website_content: str = "",
+                      source_documents: list = None):
+        """
+        Answer every unanswered question in the workbook's response matrices and save the
+        result to output_path. Returns a summary dict (rows_skipped counts questions left
+        unanswered beyond XLSX_MAX_ROWS), or None if the file is not a readable workbook
+        or has no question column.
+        """
+        if pd is None or openpyxl is None:
+            logger.error("pandas and openpyxl are required for XLSX response matrices")
+            return None
+        try:
+            workbook = openpyxl.load_workbook(input_path)
+        except Exception as e:
+            logger.error(f"Could not open workbook {input_path}: {e}")
+            return None
+
+        with trace("xlsx_fill.load"):
+            layouts, items, skipped = self._load_questions(workbook)
+        if not layouts:
+            logger.warning(f"No question column found in {input_path}")
+            return None
+
+        # Identical questions (after normalization) are answered once
+        unique = items.drop_duplicates("key")
+        answers, stats = self.answer_questions(list(unique["question"]), website_content, source_documents)
+        by_key = {key: answers[question] for key, question in zip(unique["key"], unique["question"])}
+        items["answer"] = items["key"].map(lambda k: by_key[k]["answer"])
+        items["compliance"] = items["key"].map(lambda k: by_key[k]["compliance"])
+
+        with trace("xlsx_fill.write"):
+            for sheet_name, columns in layouts.items():
+                sheet = workbook[sheet_name]
+                if columns.get("add_answer_header"):
+                    sheet.cell(row=columns["header_row"] + 1, column=columns["answer"] + 1, value="Response")
+                rows = items[items["sheet"] == sheet_name]
+                for row, answer, compliance in zip(rows["row"], rows["answer"], rows["compliance"]):
+                    sheet.cell(row=row + 1, column=columns["answer"] + 1, value=answer)
+                    if columns["compliance"] is not None and compliance:
+                        cell = sheet.cell(row=row + 1, column=columns["compliance"] + 1)
+                        if cell.value in (None, ""):
+                            cell.value = compliance
+            workbook.save(output_path)
+
+        summary = {
+            "sheets": list(layouts),
+            "rows_answered": len(items),
+            "rows_skipped": skipped,
+            "unique_questions": len(unique),
+            **stats,
+        }
+        logger.info(f"Filled response matrix: {summary}")
+        return summary
@@ -0,0 +1,14 @@
+import os
+import sys
+import tempfile
+
+# Tests import the backend the way main.py does (config, services.*)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Offline settings: no Secret Manager lookups, and scratch directories for the on-disk caches
+for _name in ("SHAREPOINT_URL", "SHAREPOINT_CLIENT_ID", "SHAREPOINT_CLIENT_SECRET", "SHAREPOINT_TENANT_ID"):
+    os.environ.setdefault(_name, "offline")
+os.environ.setdefault("SHAREPOINT_SYNC_ENABLED", "false")
+for _name in ("CORPUS_STORE_DIR", "EXTRACTION_CACHE_DIR", "ANSWER_MEMO_DIR", "LINEAGE_DIR"):
+    os.environ.setdefault(_name, tempfile.mkdtemp(prefix="rfp_test_"))
+os.environ.setdefault("DRIVE_UPLOAD_RETRY_BASE_SECONDS", "0.001")
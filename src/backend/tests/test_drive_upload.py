@@ -0,0 +1,95 @@
+import os
+
+import pytest
+
+from benchmarks.fakes import FakeDriveService
+from config import settings
+from services.draft_pipeline import upload_draft
+from services.google_drive_client import DriveUploadError, GoogleDriveClient, UPLOAD_CHUNK_UNIT
+from services.upload_queue import UploadQueue
+
+CHUNKS = 4
+
+
+@pytest.fixture
+def draft(tmp_path, monkeypatch):
+    """A draft that uploads in four resumable chunks."""
+    monkeypatch.setattr(settings, "DRIVE_UPLOAD_CHUNK_BYTES", UPLOAD_CHUNK_UNIT)
+    data = os.urandom(CHUNKS * UPLOAD_CHUNK_UNIT)
+    path = tmp_path / "Draft_tender.docx"
+    path.write_bytes(data)
+    return str(path), data
+
+
+def test_resumes_after_503_from_confirmed_offset(draft):
+    path, data = draft
+    service = FakeDriveService([], upload_errors={2: 503})
+    result = GoogleDriveClient(service=service).upload_file(path, "Draft_tender.docx", raise_errors=True)
+
+    upload = service.uploads[result["id"]]
+    assert upload["data"] == data
+    # One extra request for the interrupted chunk, not a restart from the first byte
+    assert upload["chunks"] == CHUNKS + 1
+
+
+def test_non_retryable_4xx_fails_without_retrying(draft):
+    path, _ = draft
+    service = FakeDriveService([], upload_errors={2: 403})
+
+    with pytest.raises(DriveUploadError, match="403"):
+        GoogleDriveClient(service=service).upload_file(path, "Draft_tender.docx", raise_errors=True)
+    assert service.chunk_requests == 2
+    assert service.uploads == {}
+
+    service = FakeDriveService([], upload_errors={1: 403})
+    assert GoogleDriveClient(service=service).upload_file(path, "Draft_tender.docx") is None
+
+
+def test_gives_up_after_max_retries(draft, monkeypatch):
+    path, _ = draft
+    monkeypatch.setattr(settings, "DRIVE_UPLOAD_MAX_RETRIES", 2)
+    service = FakeDriveService([], upload_errors={2: 503, 3: 503, 4: 503})
+
+    with pytest.raises(DriveUploadError, match="503"):
+        GoogleDriveClient(service=service).upload_file(path, "Draft_tender.docx", raise_errors=True)
+
+
+def test_upload_errors_are_reported_per_call(draft):
+    path, _ = draft
+    client = GoogleDriveClient(service=FakeDriveService([], upload_errors={1: 403}))
+
+    failed = upload_draft(client, path, "Draft_tender.docx")
+    succeeded = upload_draft(client, path, "Draft_tender.docx")
+    assert "403" in failed["error"]
+    assert "error" not in succeeded and succeeded["id"]
+
+
+def test_background_jobs_record_their_own_outcome(draft, tmp_path):
+    path, data = draft
+    service = FakeDriveService([], upload_errors={2: 503, 7: 404})
+    client = GoogleDriveClient(service=service)
+    queue = UploadQueue(directory=str(tmp_path / "queue"), workers=1)
+
+    first = queue.submit(client, path, "Draft_one.docx")
+    second = queue.submit(client, path, "Draft_two.docx")
+    assert queue.wait(30)
+
+    done, failed = queue.get(first["job_id"]), queue.get(second["job_id"])
+    assert done["status"] == "done" and service.uploads[done["file_id"]]["data"] == data
+    assert failed["status"] == "failed" and "404" in failed["error"]
+
+
+def test_job_status_is_visible_to_other_workers(draft, tmp_path):
+    path, _ = draft
+    directory = str(tmp_path / "queue")
+    queue = UploadQueue(directory=directory, workers=1)
+
+    job = queue.submit(GoogleDriveClient(service=FakeDriveService([])), path, "Draft_tender.docx")
+    assert queue.wait(30)
+
+    # A second process sharing UPLOAD_QUEUE_DIR answers the poll from the job record
+    other = UploadQueue(directory=directory)
+    assert other.get(job["job_id"]) == queue.get(job["job_id"])
+    assert other.get(job["job_id"])["status"] == "done"
+    assert other.get("0" * 32) is None
+    assert other.get("../" + job["job_id"]) is None
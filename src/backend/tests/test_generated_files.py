@@ -0,0 +1,41 @@
+import json
+import os
+
+from services.generated_files import GeneratedFileStore
+
+
+def generated(tmp_path, name: str, data: bytes) -> str:
+    path = tmp_path / name
+    path.write_bytes(data)
+    return str(path)
+
+
+def test_file_stored_by_one_worker_is_served_by_another(tmp_path):
+    directory = str(tmp_path / "store")
+    stored = GeneratedFileStore(directory).put(generated(tmp_path, "out.docx", b"draft"), "Draft_tender.docx")
+
+    entry = GeneratedFileStore(directory).get(stored.id)
+
+    assert entry is not None
+    assert (entry.filename, entry.size, entry.etag) == ("Draft_tender.docx", 5, stored.etag)
+    assert open(entry.path, "rb").read() == b"draft"
+
+
+def test_unknown_and_malformed_ids_are_not_found(tmp_path):
+    store = GeneratedFileStore(str(tmp_path / "store"))
+    assert store.get("0" * 32) is None
+    assert store.get("../../etc/passwd") is None
+
+
+def test_expired_files_are_removed_by_any_worker(tmp_path):
+    directory = str(tmp_path / "store")
+    stored = GeneratedFileStore(directory).put(generated(tmp_path, "out.docx", b"x"), "Draft.docx")
+    meta_path = os.path.join(directory, f"{stored.id}.json")
+    with open(meta_path) as f:
+        meta = json.load(f)
+    with open(meta_path, "w") as f:
+        json.dump({**meta, "expires": 0}, f)
+
+    other = GeneratedFileStore(directory)
+    assert other.get(stored.id) is None
+    assert os.listdir(directory) == []
@@ -0,0 +1,93 @@
+import pytest
+
+from config import settings
+from services import llm_client
+from services.llm_client import LLMClient
+from services.llm_routing import ModelRouter, load_policy
+
+
+@pytest.fixture(autouse=True)
+def models(monkeypatch):
+    """Offline fake models: "fast" and "primary" from the policy plus one fallback."""
+    monkeypatch.setattr(settings, "LLM_BACKEND", "fake")
+    monkeypatch.setattr(settings, "LLM_FAKE_LATENCY", 0.0)
+    monkeypatch.setattr(settings, "LLM_FAKE_FAILURE_RATE", 0.0)
+    monkeypatch.setattr(settings, "LLM_MODEL", "primary")
+    monkeypatch.setattr(settings, "LLM_FAST_MODEL", "fast")
+    monkeypatch.setattr(settings, "LLM_FALLBACK_MODELS", ["fallback"])
+    monkeypatch.setattr(settings, "LLM_ROUTING_POLICY", "")
+
+
+@pytest.fixture
+def client(monkeypatch):
+    """An LLMClient with its own router, so health from other tests does not carry over."""
+    router = ModelRouter()
+    monkeypatch.setattr(llm_client, "get_router", lambda: router)
+    return LLMClient()
+
+
+def calls(client: LLMClient) -> dict:
+    return {name: client._model_for(name).calls for name in ("fast", "primary", "fallback")}
+
+
+def test_policy_picks_models_per_task(monkeypatch):
+    policy = load_policy()
+    assert policy["score"]["models"] == ["fast", "primary", "fallback"]
+    assert policy["placeholders"]["models"] == ["primary", "fallback"]
+    assert policy["draft"]["max_output_tokens"] > policy["score"]["max_output_tokens"]
+
+    monkeypatch.setattr(settings, "LLM_ROUTING_POLICY", '{"draft": {"models": ["fast"]}}')
+    assert load_policy()["draft"]["models"] == ["fast", "fallback"]
+
+
+def test_structured_task_uses_the_fast_model(client):
+    data = client.generate_json('Return "score" as JSON.', task="score",
+                                schema={"type": "object", "properties": {"score": {"type": "integer"}}})
+
+    assert data == {"score": 72}
+    assert calls(client) == {"fast": 1, "primary": 0, "fallback": 0}
+
+    client.generate_content("Draft a response.", task="draft")
+    assert calls(client) == {"fast": 1, "primary": 1, "fallback": 0}
+
+
+def test_fails_over_to_fallback_model(client):
+    client._model_for("primary").failure_rate = 1.0
+
+    text = client.generate_content("Draft a response.", task="draft")
+
+    assert text.startswith("Synthetic draft response.")
+    assert calls(client) == {"fast": 0, "primary": 1, "fallback": 1}
+
+
+def test_repeated_failures_move_a_model_last(client):
+    client._model_for("primary").failure_rate = 1.0
+    client.generate_content("Draft a response.", task="draft")
+    client.generate_content("Draft a response.", task="draft")
+    assert client.router.candidates("draft") == ["fallback", "primary"]
+
+    # The next call goes straight to the healthy model
+    client.generate_content("Draft a response.", task="draft")
+    assert calls(client)["primary"] == 2
+    assert calls(client)["fallback"] == 3
+
+
+def test_unhealthy_model_is_retried_after_cooldown(client, monkeypatch):
+    for _ in range(2):
+        client.router.record("draft", "primary", 0.1, ok=False)
+    assert client.router.candidates("draft") == ["fallback", "primary"]
+
+    monkeypatch.setattr(settings, "LLM_ROUTING_COOLDOWN_SECONDS", 0)
+    assert client.router.candidates("draft") == ["primary", "fallback"]
+
+
+def test_slow_preferred_model_is_reordered_by_task_latency():
+    router = ModelRouter()
+    assert router.candidates("score") == ["fast", "primary", "fallback"]
+
+    for _ in range(3):
+        router.record("score", "fast", 2.0, ok=True)
+        router.record("score", "primary", 0.2, ok=True)
+    assert router.candidates("score") == ["primary", "fast", "fallback"]
+    # Latency is tracked per task: the fast model is still preferred where it has no history
+    assert router.candidates("section_score") == ["fast", "primary", "fallback"]
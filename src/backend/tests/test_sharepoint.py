@@ -0,0 +1,110 @@
+import time
+
+import pytest
+
+from benchmarks.fakes import FakeGraphSession
+from config import settings
+from integrations.sharepoint import SharePointClient
+from services.extraction_cache import ExtractionCache
+
+FILES = [{"name": f"Proposal {i}.txt", "data": f"Past proposal {i} text.".encode("utf-8")} for i in range(1, 6)]
+
+
+@pytest.fixture
+def graph():
+    return FakeGraphSession(FILES, page_size=2)
+
+
+@pytest.fixture
+def client(graph, tmp_path):
+    return SharePointClient(site_url=graph.site_url, tenant_id="tenant", client_id="client",
+                            client_secret="secret", session=graph, cache=ExtractionCache(str(tmp_path)),
+                            download_workers=2)
+
+
+def contents(documents: list) -> dict:
+    return {doc["name"]: doc["content"] for doc in documents}
+
+
+def test_full_sync_pages_through_the_library(graph, client):
+    documents = client.load_documents()
+
+    assert contents(documents) == {f["name"]: f["data"].decode("utf-8") for f in FILES}
+    # Five items at two per page
+    assert graph.count("/root/delta") == 3
+    assert graph.count("/content") == len(FILES)
+
+
+def test_incremental_sync_downloads_only_changed_items(graph, client):
+    client.load_documents()
+    graph.requests.clear()
+
+    graph.put_file("Proposal 2.txt", b"Revised proposal 2.")
+    graph.put_file("Proposal 6.txt", b"Past proposal 6 text.")
+    documents = contents(client.load_documents())
+
+    assert documents["Proposal 2.txt"] == "Revised proposal 2."
+    assert documents["Proposal 6.txt"] == "Past proposal 6 text."
+    assert len(documents) == 6
+    assert graph.count("/content") == 2
+
+
+def test_deleted_items_are_dropped(graph, client):
+    client.load_documents()
+    graph.delete_file("item-3")
+    graph.requests.clear()
+
+    documents = contents(client.load_documents())
+
+    assert "Proposal 3.txt" not in documents
+    assert len(documents) == len(FILES) - 1
+    assert graph.count("/content") == 0
+
+
+def test_expired_delta_link_re_enumerates(graph, client):
+    client.load_documents()
+    graph.delete_file("item-1")
+    graph.expire_delta_tokens()
+    graph.requests.clear()
+
+    documents = contents(client.load_documents())
+
+    assert sorted(documents) == [f["name"] for f in FILES[1:]]
+    # The saved link gets a 410 and the feed is read again from the start
+    delta_urls = [url for _, url in graph.requests if "/root/delta" in url]
+    assert "token=" in delta_urls[0]
+    assert delta_urls[1].endswith("/root/delta")
+    # Content already extracted for the same versions is not downloaded again
+    assert graph.count("/content") == 0
+
+
+def test_failed_download_is_retried_on_next_sync(graph, client):
+    graph.fail_next("/items/item-2/content", 500)
+
+    first = contents(client.load_documents())
+    assert "Proposal 2.txt" not in first
+    assert len(first) == len(FILES) - 1
+
+    graph.requests.clear()
+    second = contents(client.load_documents())
+    assert second["Proposal 2.txt"] == "Past proposal 2 text."
+    assert graph.count("/content") == 1
+
+
+def test_refreshes_token_once_on_401(graph, client):
+    graph.fail_next("/root/delta", 401)
+
+    assert len(client.load_documents()) == len(FILES)
+    assert graph.count("login.microsoftonline.com") == 2
+
+
+def test_throttling_waits_retry_after_capped(graph, client, monkeypatch):
+    monkeypatch.setattr(settings, "SHAREPOINT_MAX_RETRY_AFTER_SECONDS", 0.05)
+    sleeps = []
+    real_sleep = time.sleep
+    monkeypatch.setattr(time, "sleep", lambda seconds: sleeps.append(seconds) or real_sleep(0))
+    graph.fail_next("/root/delta", 429, headers={"Retry-After": "3"})
+    graph.fail_next("/items/item-1/content", 429, headers={"Retry-After": "3600"})
+
+    assert len(client.load_documents()) == len(FILES)
+    assert [s for s in sleeps if s] == [0.05, 0.05]
@@ -0,0 +1,144 @@
+import asyncio
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from services import site_crawler
+from services.site_crawler import SiteCrawler
+from services.web_scraper import WebsiteCache
+
+# Seconds the test site waits before answering a path
+DELAYS = {}
+
+
+def page(title, *links):
+    anchors = "".join(f'<a href="{href}">{href}</a>' for href in links)
+    return f"<html><body><h1>{title}</h1><p>About {title}.</p>{anchors}</body></html>"
+
+
+@pytest.fixture
+def site():
+    """A small site on 127.0.0.1: robots.txt with a Disallow and a sitemap, and a chain of linked pages."""
+    requested = []
+    pages = {}
+    DELAYS.clear()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            requested.append(self.path)
+            time.sleep(DELAYS.get(self.path, 0))
+            if self.path not in pages:
+                self.send_error(404)
+                return
+            content_type, body = pages[self.path]
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    origin = f"http://127.0.0.1:{server.server_port}"
+    html = "text/html; charset=utf-8"
+    pages.update({
+        "/robots.txt": ("text/plain", f"User-agent: *\nDisallow: /private\nSitemap: {origin}/sitemap.xml\n".encode()),
+        "/sitemap.xml": ("application/xml", f"<urlset><url><loc>{origin}/from-sitemap</loc></url></urlset>".encode()),
+        "/": (html, page("Home", "/about", "/private/secret", "/brochure.pdf",
+                         f"http://localhost:{server.server_port}/other-host", "https://example.org/").encode()),
+        "/about": (html, page("About", "/team").encode()),
+        "/team": (html, page("Team", "/deep").encode()),
+        "/deep": (html, page("Deep").encode()),
+        "/from-sitemap": (html, page("Sitemap").encode()),
+        "/private/secret": (html, page("Secret").encode()),
+        "/other-host": (html, page("Other host").encode()),
+    })
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield origin, requested
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture(autouse=True)
+def fresh_crawl_cache(monkeypatch):
+    monkeypatch.setattr(site_crawler, "_crawl_cache", WebsiteCache(ttl_seconds=900, max_entries=2))
+
+
+def crawler(**kwargs):
+    options = {"max_pages": 20, "max_concurrency": 4, "per_host_concurrency": 4, "time_budget": 10, "max_depth": 2}
+    return SiteCrawler(**{**options, **kwargs})
+
+
+def crawled_paths(origin, pages):
+    return {p["url"][len(origin):] or "/" for p in pages}
+
+
+def test_follows_links_up_to_max_depth(site):
+    origin, _ = site
+    pages = asyncio.run(crawler(max_depth=2).crawl(origin + "/"))
+    # /deep is three hops from the landing page
+    assert crawled_paths(origin, pages) == {"/", "/about", "/team", "/from-sitemap"}
+
+    pages = asyncio.run(crawler(max_depth=3).crawl(origin + "/"))
+    assert "/deep" in crawled_paths(origin, pages)
+
+
+def test_respects_robots_disallow_and_reads_its_sitemap(site):
+    origin, requested = site
+    pages = asyncio.run(crawler().crawl(origin + "/"))
+    assert "/private/secret" not in requested
+    assert "/sitemap.xml" in requested
+    assert "/from-sitemap" in crawled_paths(origin, pages)
+
+
+def test_stays_on_the_same_host(site):
+    origin, requested = site
+    asyncio.run(crawler().crawl(origin + "/"))
+    # localhost is a different host name than 127.0.0.1, even on the same server
+    assert "/other-host" not in requested
+    assert "/brochure.pdf" not in requested
+
+
+def test_same_site_treats_www_as_the_same_host():
+    c = crawler()
+    assert c._same_site_url("https://www.example.com/about/", "example.com") == "https://www.example.com/about"
+    assert c._same_site_url("https://shop.example.com/", "example.com") is None
+    assert c._same_site_url("ftp://example.com/file", "example.com") is None
+
+
+def test_documents_leave_out_the_landing_page_and_are_cached(site):
+    origin, requested = site
+    documents = crawler().crawl_as_documents(origin)
+    names = {doc["name"] for doc in documents}
+    assert "Website: /" not in names
+    assert {"Website: /about", "Website: /team", "Website: /from-sitemap"} <= names
+
+    fetched = len(requested)
+    assert crawler().crawl_as_documents(origin) == documents
+    assert len(requested) == fetched
+
+
+def test_crawl_cache_is_bounded(site):
+    origin, _ = site
+    for path in ("/", "/about", "/team"):
+        crawler(max_depth=0).crawl_as_documents(origin + path)
+    assert site_crawler._crawl_cache.get(origin + "/") is None
+    assert site_crawler._crawl_cache.get(origin + "/team") is not None
+
+
+def test_time_budget_covers_robots_and_in_flight_fetches(site):
+    origin, _ = site
+    DELAYS.update({"/robots.txt": 0.3, "/about": 5})
+
+    started = time.monotonic()
+    pages = asyncio.run(crawler(time_budget=1).crawl(origin + "/"))
+
+    assert time.monotonic() - started < 1.5
+    paths = crawled_paths(origin, pages)
+    assert "/" in paths
+    assert "/about" not in paths
@@ -102,6 +102,24 @@ export default function Home() {
       if (data.drive_url) {
         setDraftUrl(data.drive_url);
         setDraftResult(data.message || "Draft saved to Google Drive successfully.");
+      } else if (data.upload_status_url) {
+        // The Drive upload runs in the background; poll until the link is ready
+        setDraftResult(data.message || "Draft generated; uploading to Google Drive...");
+        for (let attempt = 0; attempt < 90; attempt++) {
+          await new Promise((resolve) => setTimeout(resolve, 2000));
+          const statusResponse = await fetch(`${getApiUrl()}${data.upload_status_url}`);
+          if (!statusResponse.ok) break;
+          const job = await statusResponse.json();
+          if (job.status === "done" && job.drive_url) {
+            setDraftUrl(job.drive_url);
+            setDraftResult("Draft saved to Google Drive successfully.");
+            break;
+          }
+          if (job.status === "failed") {
+            setDraftResult(`Draft generated but Google Drive upload failed: ${job.error}`);
+            break;
+          }
+        }
       } else {
         setDraftResult(data.message || "Draft generated but could not be uploaded to Drive.");
       }